@@ -0,0 +1,100 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Event throughput of single vs. batched CloudEvent delivery.
+
+Calls the WSGI app directly with a trivial cloudevent function and reports
+events per second for one structured event per request, for batches handed to
+the function one event at a time, and for batches handed to a
+@cloud_event_batch function in one call.
+"""
+
+import io
+import json
+import pathlib
+import tempfile
+import time
+
+from cloudevents import conversion as ce_conversion
+from cloudevents.http import CloudEvent
+from werkzeug.test import EnvironBuilder
+
+from functions_framework import create_app
+
+EVENTS = 20000
+BATCH_SIZE = 100
+
+SOURCE = """
+import functions_framework
+
+
+def function(cloud_event):
+    pass
+
+
+@functions_framework.cloud_event_batch
+def batch_function(cloud_events):
+    pass
+"""
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def _event(i):
+    return CloudEvent(
+        {
+            "id": str(i),
+            "source": "//pubsub.googleapis.com/projects/sample/topics/sample",
+            "type": "google.cloud.pubsub.topic.v1.messagePublished",
+        },
+        {"message": {"data": "SGVsbG8gV29ybGQ=", "messageId": str(i)}},
+    )
+
+
+def _events_per_second(app, headers, body, requests, events_per_request):
+    environ = EnvironBuilder(method="POST", headers=headers, data=body).get_environ()
+    body = body.encode() if isinstance(body, str) else body
+    start = time.perf_counter()
+    for _ in range(requests):
+        request = dict(environ, **{"wsgi.input": io.BytesIO(body)})
+        b"".join(app(request, start_response))
+    return requests * events_per_request / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = pathlib.Path(tmp) / "main.py"
+        source.write_text(SOURCE)
+
+        headers, body = ce_conversion.to_structured(_event(0))
+        batch_headers = {"Content-Type": "application/cloudevents-batch+json"}
+        batch_body = json.dumps(
+            [json.loads(ce_conversion.to_json(_event(i))) for i in range(BATCH_SIZE)]
+        )
+        batches = EVENTS // BATCH_SIZE
+
+        app = create_app("function", str(source), "cloudevent")
+        rate = _events_per_second(app, headers, body, EVENTS, 1)
+        print(f"single event per request      {rate:9.0f} events/s")
+        rate = _events_per_second(app, batch_headers, batch_body, batches, BATCH_SIZE)
+        print(f"batch of {BATCH_SIZE}, per-event calls  {rate:9.0f} events/s")
+        app = create_app("batch_function", str(source), "cloudevent")
+        rate = _events_per_second(app, batch_headers, batch_body, batches, BATCH_SIZE)
+        print(f"batch of {BATCH_SIZE}, batch handler    {rate:9.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cold start of the cloud_run_async example through create_app.
+
+Each run is a fresh interpreter that imports the framework and then times
+create_app and the RSS it adds. The "flask app" rows disable the source scan,
+which is how every @aio function was loaded before: a Flask app is built, the
+module runs in its app context, and the Flask app is then thrown away.
+"""
+
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+RUNS = 20
+SOURCE = (
+    pathlib.Path(__file__).resolve().parent.parent
+    / "examples"
+    / "cloud_run_async"
+    / "main.py"
+)
+
+CHILD = """
+import json, sys, time
+
+import functions_framework
+import functions_framework.aio
+from functions_framework import _function_registry
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+if sys.argv[2] == "scan-off":
+    _function_registry.declares_asgi_function = lambda source, target: False
+
+before = rss_kb()
+start = time.perf_counter()
+functions_framework.create_app("hello_async_http", sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb() - before}))
+"""
+
+
+def measure(mode):
+    runs = []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, str(SOURCE), mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(out))
+    return (
+        statistics.median(run["seconds"] for run in runs),
+        statistics.median(run["rss_kb"] for run in runs),
+    )
+
+
+def main():
+    for label, mode in (("flask app", "scan-off"), ("source scan", "scan-on")):
+        seconds, rss_kb = measure(mode)
+        print(
+            f"{label:12s} create_app {seconds * 1000:6.2f}ms  "
+            f"RSS added {rss_kb / 1024:5.2f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""CPU time against compressed size for each compression encoding and level.
+
+Compresses JSON and HTML responses in one piece, and the HTML response
+streamed in small chunks with a flush after each one, as
+`_compression.WsgiMiddleware` and `AsgiMiddleware` do. Encodings whose
+library isn't installed are skipped.
+"""
+
+import json
+import time
+
+from functions_framework import _compression
+
+N = 50
+
+JSON = json.dumps(
+    {
+        "items": [
+            {
+                "id": i,
+                "name": f"item-{i}",
+                "price": round(i * 1.37, 2),
+                "tags": ["alpha", "beta", "gamma"][: i % 3 + 1],
+                "description": f"Description of item {i}",
+            }
+            for i in range(2000)
+        ]
+    }
+).encode()
+
+HTML = (
+    "<html><body><table>"
+    + "".join(
+        f"<tr><td>{i}</td><td>row {i}</td><td>{i * i}</td></tr>" for i in range(4000)
+    )
+    + "</table></body></html>"
+).encode()
+
+# The size of the chunks of a streamed response
+CHUNK_SIZE = 256
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 11], "zstd": [1, 3, 10]}
+
+
+def _available(name):
+    try:
+        return _compression._LOADERS[name]()
+    except ImportError:
+        return None
+
+
+def _whole(encoding, body):
+    return encoding.encoder().finish(body)
+
+
+def _streamed(encoding, body):
+    encoder = encoding.encoder()
+    chunks = [
+        encoder.compress(body[i : i + CHUNK_SIZE])
+        for i in range(0, len(body), CHUNK_SIZE)
+    ]
+    chunks.append(encoder.finish())
+    return b"".join(chunks)
+
+
+def _measure(func, encoding, body):
+    size = len(func(encoding, body))
+    start = time.process_time()
+    for _ in range(N):
+        func(encoding, body)
+    seconds = (time.process_time() - start) / N
+    return size, seconds
+
+
+def main():
+    print(f"{'payload':14s} {'encoding':9s} {'bytes':>8s} {'ratio':>6s} {'cpu':>9s}")
+    for label, func, body in [
+        ("json", _whole, JSON),
+        ("html", _whole, HTML),
+        ("html streamed", _streamed, HTML),
+    ]:
+        print(f"{label:14s} {'identity':9s} {len(body):8d} {1:6.2f} {0:7.2f}ms")
+        for name, levels in LEVELS.items():
+            encoder_class = _available(name)
+            if encoder_class is None:
+                print(f"{label:14s} {name:9s} not installed")
+                continue
+            for level in levels:
+                encoding = _compression.Encoding(name, level, encoder_class)
+                size, seconds = _measure(func, encoding, body)
+                print(
+                    f"{label:14s} {f'{name}:{level}':9s} {size:8d}"
+                    f" {len(body) / size:6.2f} {seconds * 1e3:7.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-request overhead of Flask dispatch for an HTTP function.
+
+Compares the werkzeug URL map with LEAN_DISPATCH_ENABLED=true by calling the
+WSGI app directly with a trivial function, so the difference is the routing
+cost removed from every request.
+"""
+
+import os
+import pathlib
+import tempfile
+import timeit
+
+from werkzeug.test import EnvironBuilder
+
+from functions_framework import create_app
+
+N = 20000
+
+SOURCE = """
+def function(request):
+    return "OK"
+"""
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = pathlib.Path(tmp) / "main.py"
+        source.write_text(SOURCE)
+
+        for lean in ("false", "true"):
+            os.environ["LEAN_DISPATCH_ENABLED"] = lean
+            app = create_app("function", str(source))
+            for path in ("/", "/some/nested/path"):
+                environ = EnvironBuilder(path=path).get_environ()
+
+                def request():
+                    b"".join(app(dict(environ), start_response))
+
+                seconds = min(timeit.repeat(request, number=N, repeat=3))
+                print(f"lean={lean:5s} {path:20s} {seconds / N * 1e6:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cost of decoding the body of a cloudevent function request.
+
+For Pub/Sub and Storage payloads, this compares `cloudevents.http.from_http`
+and, for background events, the parse of `request.get_json()` that followed
+it, with the single parse of `_decoding.DecodedRequest`.
+"""
+
+import base64
+import json
+import timeit
+
+from cloudevents.exceptions import MissingRequiredFields
+from cloudevents.http import from_http
+
+from functions_framework import _decoding, event_conversion
+
+N = 5000
+
+STRUCTURED = {"Content-Type": "application/cloudevents+json"}
+BACKGROUND = {"Content-Type": "application/json"}
+
+PUBSUB_DATA = base64.b64encode(json.dumps({"value": "x" * 512}).encode()).decode()
+
+PUBSUB_CLOUD_EVENT = json.dumps(
+    {
+        "specversion": "1.0",
+        "id": "4102184774039362",
+        "source": "//pubsub.googleapis.com/projects/my-project/topics/my-topic",
+        "type": "google.cloud.pubsub.topic.v1.messagePublished",
+        "time": "2026-10-17T00:00:00.000Z",
+        "datacontenttype": "application/json",
+        "data": {
+            "message": {
+                "attributes": {"origin": "benchmark"},
+                "data": PUBSUB_DATA,
+                "messageId": "4102184774039362",
+                "publishTime": "2026-10-17T00:00:00.000Z",
+            },
+            "subscription": "projects/my-project/subscriptions/my-subscription",
+        },
+    }
+).encode()
+
+PUBSUB_BACKGROUND_EVENT = json.dumps(
+    {
+        "context": {
+            "eventId": "4102184774039362",
+            "timestamp": "2026-10-17T00:00:00.000Z",
+            "eventType": "google.pubsub.topic.publish",
+            "resource": {
+                "service": "pubsub.googleapis.com",
+                "name": "projects/my-project/topics/my-topic",
+                "type": "type.googleapis.com/google.pubsub.v1.PubsubMessage",
+            },
+        },
+        "data": {
+            "@type": "type.googleapis.com/google.pubsub.v1.PubsubMessage",
+            "attributes": {"origin": "benchmark"},
+            "data": PUBSUB_DATA,
+        },
+    }
+).encode()
+
+STORAGE_OBJECT = {
+    "kind": "storage#object",
+    "id": "my-bucket/folder/object.txt/1602057788153123",
+    "selfLink": "https://www.googleapis.com/storage/v1/b/my-bucket/o/folder%2Fobject.txt",
+    "name": "folder/object.txt",
+    "bucket": "my-bucket",
+    "generation": "1602057788153123",
+    "metageneration": "1",
+    "contentType": "text/plain",
+    "timeCreated": "2026-10-17T00:00:00.000Z",
+    "updated": "2026-10-17T00:00:00.000Z",
+    "storageClass": "STANDARD",
+    "timeStorageClassUpdated": "2026-10-17T00:00:00.000Z",
+    "size": "1024",
+    "md5Hash": "kF8MuJQ8zR8NXcFyOmYNqQ==",
+    "mediaLink": "https://www.googleapis.com/download/storage/v1/b/my-bucket/o/folder%2Fobject.txt?generation=1602057788153123&alt=media",
+    "metadata": {f"key{i}": f"value{i}" for i in range(10)},
+    "crc32c": "rTVTeQ==",
+    "etag": "CKOKlZmT0+wCEAE=",
+}
+
+STORAGE_CLOUD_EVENT = json.dumps(
+    {
+        "specversion": "1.0",
+        "id": "1602057788153123",
+        "source": "//storage.googleapis.com/projects/_/buckets/my-bucket",
+        "type": "google.cloud.storage.object.v1.finalized",
+        "subject": "objects/folder/object.txt",
+        "time": "2026-10-17T00:00:00.000Z",
+        "datacontenttype": "application/json",
+        "data": STORAGE_OBJECT,
+    }
+).encode()
+
+STORAGE_BACKGROUND_EVENT = json.dumps(
+    {
+        "context": {
+            "eventId": "1602057788153123",
+            "timestamp": "2026-10-17T00:00:00.000Z",
+            "eventType": "google.storage.object.finalize",
+            "resource": {
+                "service": "storage.googleapis.com",
+                "name": "projects/_/buckets/my-bucket/objects/folder/object.txt",
+                "type": "storage#object",
+            },
+        },
+        "data": STORAGE_OBJECT,
+    }
+).encode()
+
+
+class _ParsedRequest:
+    """A Flask request whose get_json() parses the body, as Flask does once."""
+
+    path = "/"
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.body = body
+
+    def get_json(self):
+        return json.loads(self.body)
+
+
+def before(headers, body):
+    try:
+        return from_http(headers, body)
+    except MissingRequiredFields:
+        return event_conversion.background_event_to_cloud_event(
+            _ParsedRequest(headers, body)
+        )
+
+
+def after(headers, body):
+    decoded = _decoding.DecodedRequest(headers, body)
+    try:
+        return _decoding.to_cloud_event(decoded)
+    except MissingRequiredFields:
+        return event_conversion.background_event_to_cloud_event(decoded)
+
+
+def main():
+    for label, headers, body in [
+        ("pubsub cloudevent", STRUCTURED, PUBSUB_CLOUD_EVENT),
+        ("pubsub background", BACKGROUND, PUBSUB_BACKGROUND_EVENT),
+        ("storage cloudevent", STRUCTURED, STORAGE_CLOUD_EVENT),
+        ("storage background", BACKGROUND, STORAGE_BACKGROUND_EVENT),
+    ]:
+        assert before(headers, body) == after(headers, body)
+        results = []
+        for name, func in [("from_http", before), ("decoded", after)]:
+            seconds = min(
+                timeit.repeat(lambda: func(headers, body), number=N, repeat=3)
+            )
+            results.append(f"{name} {seconds / N * 1e6:7.2f}us")
+        print(f"{label:20s} {len(body):5d}B  " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
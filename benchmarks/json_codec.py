@@ -0,0 +1,85 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-request JSON cost of each codec selectable with FUNCTION_JSON_CODEC.
+
+For each installed codec this measures decoding a Pub/Sub push body,
+encoding a typed function response and formatting one structured log line,
+which together approximate the JSON work of one request.
+"""
+
+import base64
+import json
+import timeit
+
+from functions_framework import _json
+from functions_framework.exceptions import InvalidConfigurationException
+
+N = 20000
+
+PUBSUB_BODY = json.dumps(
+    {
+        "message": {
+            "attributes": {"origin": "benchmark", "priority": "high"},
+            "data": base64.b64encode(
+                json.dumps({"value": "x" * 512}).encode()
+            ).decode(),
+            "messageId": "4102184774039362",
+            "publishTime": "2026-10-17T00:00:00.000Z",
+        },
+        "subscription": "projects/my-project/subscriptions/my-subscription",
+    }
+).encode()
+
+TYPED_RESPONSE = {
+    "id": 1234,
+    "name": "example",
+    "tags": ["a", "b", "c"],
+    "items": [{"sku": f"sku-{i}", "quantity": i, "price": i * 1.5} for i in range(20)],
+}
+
+LOG_LINE = {
+    "message": "handled request",
+    "logging.googleapis.com/labels": {"execution_id": "abcdefghijkl"},
+    "logging.googleapis.com/spanId": "123456",
+}
+
+
+def main():
+    for codec in ("json", "ujson", "orjson"):
+        try:
+            name, dumps, loads, _ = _json.select_codec(codec)
+        except InvalidConfigurationException:
+            print(f"{codec:8s} not installed")
+            continue
+
+        def request():
+            loads(PUBSUB_BODY)
+            dumps(TYPED_RESPONSE)
+            dumps(LOG_LINE)
+
+        results = []
+        for label, func in [
+            ("pubsub", lambda: loads(PUBSUB_BODY)),
+            ("typed", lambda: dumps(TYPED_RESPONSE)),
+            ("log", lambda: dumps(LOG_LINE)),
+            ("request", request),
+        ]:
+            seconds = min(timeit.repeat(func, number=N, repeat=3))
+            results.append(f"{label} {seconds / N * 1e6:7.2f}us")
+        print(f"{name:8s} " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
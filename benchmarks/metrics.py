@@ -0,0 +1,89 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Microbenchmarks for recording request metrics on the hot path."""
+
+import threading
+import time
+import timeit
+
+from functions_framework import _metrics
+
+N = 100000
+THREADS = 8
+
+
+class _LockedRegistry(_metrics.Registry):
+    """A registry behind one shared lock, kept for comparison."""
+
+    def __init__(self):
+        super().__init__()
+        self._shard_lock = threading.Lock()
+        self._single = _metrics._Shard()
+
+    def _shard(self):
+        return self._single
+
+    def inc(self, *args, **kwargs):
+        with self._shard_lock:
+            super().inc(*args, **kwargs)
+
+    def observe(self, *args, **kwargs):
+        with self._shard_lock:
+            super().observe(*args, **kwargs)
+
+
+def record(registry):
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+    registry.observe(_metrics.LATENCY, 0.012, ("http",))
+
+
+def bench(name, func, number=N):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print(f"{name:45s} {seconds / number * 1e6:8.3f} us/call")
+
+
+def bench_threads(name, registry):
+    def run():
+        for _ in range(N // THREADS):
+            record(registry)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    print(f"{name:45s} {seconds / N * 1e6:8.3f} us/call")
+
+
+def main():
+    for name, registry in [
+        ("per-thread shards", _metrics._default_registry()),
+        ("single locked registry", _LockedRegistry()),
+    ]:
+        bench(f"record, 1 thread ({name})", lambda: record(registry))
+        bench_threads(f"record, {THREADS} threads ({name})", registry)
+
+    registry = _metrics._default_registry()
+    wsgi = _metrics.WsgiMiddleware(
+        lambda environ, start_response: start_response("200 OK", []), "http"
+    )
+    bench("WsgiMiddleware", lambda: wsgi({"PATH_INFO": "/"}, lambda *a: None))
+    bench("render (one scrape)", registry.render, number=N // 100)
+
+
+if __name__ == "__main__":
+    main()
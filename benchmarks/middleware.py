@@ -0,0 +1,91 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Microbenchmarks for the execution ID middleware hot path."""
+
+import asyncio
+import random
+import timeit
+
+from functions_framework import execution_id
+
+N = 100000
+
+# A typical set of headers forwarded by the Cloud Run frontend.
+HEADERS = [
+    (b"host", b"example-abcdefghij-uc.a.run.app"),
+    (b"user-agent", b"curl/8.5.0"),
+    (b"accept", b"*/*"),
+    (b"content-type", b"application/json"),
+    (b"content-length", b"27"),
+    (b"traceparent", b"00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"),
+    (b"x-cloud-trace-context", b"0af7651916cd43dd8448eb211c80319c/123;o=1"),
+    (b"x-forwarded-for", b"203.0.113.7"),
+    (b"x-forwarded-proto", b"https"),
+]
+
+
+def generate_execution_id_randrange():
+    # The previous implementation, kept for comparison.
+    charset = execution_id._EXECUTION_ID_CHARSET
+    return "".join(
+        charset[random.randrange(len(charset))]
+        for _ in range(execution_id._EXECUTION_ID_LENGTH)
+    )
+
+
+def bench(name, func, number=N, batch=1):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print(f"{name:40s} {seconds / (number * batch) * 1e6:8.3f} us/call")
+
+
+def main():
+    bench("execution id (random.randrange)", generate_execution_id_randrange)
+    bench("execution id (os.urandom + translate)", execution_id._generate_execution_id)
+
+    wsgi = execution_id.WsgiMiddleware(lambda environ, start_response: None)
+    bench("WsgiMiddleware (generate id)", lambda: wsgi({}, None))
+    bench(
+        "WsgiMiddleware (id in request)",
+        lambda: wsgi({"HTTP_FUNCTION_EXECUTION_ID": "abc"}, None),
+    )
+
+    async def app(scope, receive, send):
+        pass
+
+    asgi = execution_id.AsgiMiddleware(app)
+    loop = asyncio.new_event_loop()
+
+    async def run_asgi(headers, number):
+        for _ in range(number):
+            await asgi({"type": "http", "headers": list(headers)}, None, None)
+
+    for name, headers in [
+        ("AsgiMiddleware (generate id)", HEADERS),
+        (
+            "AsgiMiddleware (id in request)",
+            HEADERS + [(b"function-execution-id", b"abc")],
+        ),
+    ]:
+        bench(
+            name,
+            lambda: loop.run_until_complete(run_asgi(headers, 1000)),
+            number=N // 1000,
+            batch=1000,
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
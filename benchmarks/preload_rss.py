@@ -0,0 +1,122 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory per gunicorn worker with and without PRELOAD_APP (Linux only).
+
+Starts GunicornApplication with several workers for a function whose module
+holds a large object graph, sends requests that force a full collection in
+each worker, and reports RSS, PSS and private dirty memory per worker from
+/proc/<pid>/smaps_rollup.
+"""
+
+import os
+import pathlib
+import socket
+import tempfile
+import time
+import urllib.request
+
+from multiprocessing import Process
+
+from functions_framework import create_app
+from functions_framework._http.gunicorn import GunicornApplication
+
+HOST = "127.0.0.1"
+PORT = 8089
+WORKERS = 4
+
+SOURCE = """
+import gc
+
+# Stands in for the heap built by importing a large dependency tree.
+DATA = [{"key": str(i), "value": [i] * 4} for i in range(300000)]
+
+
+def function(request):
+    gc.collect()
+    return str(len(DATA))
+"""
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+    return children
+
+
+def _memory_kb(pid):
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss", "Private_Dirty"):
+                memory[name] = int(value.split()[0])
+    return memory
+
+
+def _wait_for_listen():
+    while True:
+        try:
+            socket.create_connection((HOST, PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def measure(source, preload):
+    os.environ["WORKERS"] = str(WORKERS)
+    os.environ["THREADS"] = "1"
+    os.environ["PRELOAD_APP"] = "true" if preload else "false"
+    app = create_app("function", source)
+    server = Process(
+        target=GunicornApplication(app, HOST, PORT, False).run, daemon=True
+    )
+    server.start()
+    _wait_for_listen()
+    for _ in range(WORKERS * 10):
+        urllib.request.urlopen(f"http://{HOST}:{PORT}/").read()
+    time.sleep(1)
+
+    workers = [_memory_kb(pid) for pid in _children(server.pid)]
+    server.terminate()
+    server.join()
+    return workers
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = pathlib.Path(tmp) / "main.py"
+        source.write_text(SOURCE)
+        for preload in (False, True):
+            workers = measure(str(source), preload)
+            averages = {
+                name: sum(w[name] for w in workers) / len(workers) / 1024
+                for name in ("Rss", "Pss", "Private_Dirty")
+            }
+            print(
+                f"PRELOAD_APP={str(preload).lower():5s} workers={len(workers)} "
+                + "  ".join(f"{k} {v:6.1f}MiB" for k, v in averages.items())
+            )
+
+
+if __name__ == "__main__":
+    main()
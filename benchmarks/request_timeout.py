@@ -0,0 +1,50 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare the cost of arming and disarming a request timeout.
+
+The baseline is the previous implementation, which started and cancelled a
+`threading.Timer` thread for every request.
+"""
+
+import threading
+import timeit
+
+from functions_framework.request_timeout import ThreadingTimeout
+
+N = 20000
+
+
+def timer_per_request():
+    timer = threading.Timer(30, lambda: None)
+    timer.start()
+    timer.cancel()
+
+
+def timer_wheel():
+    with ThreadingTimeout(30):
+        pass
+
+
+def main():
+    for name, func in [
+        ("threading.Timer per request", timer_per_request),
+        ("shared timer wheel", timer_wheel),
+    ]:
+        seconds = min(timeit.repeat(func, number=N, repeat=3))
+        print(f"{name:30s} {seconds / N * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,37 @@ def isolate_logging():
         reload(logging)
 
 
+@pytest.fixture(scope="function", autouse=True)
+def isolate_drain_state():
+    "Ensure a test that shuts a worker down doesn't leave later tests draining"
+    from functions_framework import _drain
+
+    _tracker = _drain.tracker
+    _drain.tracker = _drain.InFlightTracker()
+    try:
+        yield
+    finally:
+        _drain.tracker = _tracker
+
+
+@pytest.fixture
+def make_client():
+    "Create a test client for the function, served by either the WSGI or ASGI app"
+
+    def make(target, source, signature_type=None, asgi=False):
+        if asgi:
+            from starlette.testclient import TestClient
+
+            from functions_framework.aio import create_asgi_app
+
+            return TestClient(create_asgi_app(target, source, signature_type))
+        from functions_framework import create_app
+
+        return create_app(target, source, signature_type).test_client()
+
+    return make
+
+
 # Safe to remove when we drop Python 3.7 support
 def pytest_ignore_collect(collection_path, config):
     """Ignore async test files on Python 3.7 since Starlette requires Python 3.8+"""
@@ -15,7 +15,6 @@
 import functools
 import inspect
 import io
-import json
 import logging
 import logging.config
 import os
@@ -25,17 +24,30 @@ import sys
 import types
 
 from inspect import signature
-from typing import Callable, Type
+from typing import Any, Callable, Dict, List, Optional, Type
 
 import cloudevents.exceptions as cloud_exceptions
 import flask
 import werkzeug
 
-from cloudevents.http import from_http, is_binary
+from cloudevents.http import is_binary
 from cloudevents.http.event import CloudEvent
 
 from functions_framework import (
+    _admission,
+    _body,
+    _cloudevent_batch,
+    _compression,
+    _decoding,
+    _drain,
     _function_registry,
+    _json,
+    _lifecycle,
+    _memory,
+    _metrics,
+    _profiling,
+    _resources,
+    _startup_report,
     _typed_event,
     event_conversion,
     execution_id,
@@ -45,6 +57,7 @@ from functions_framework.exceptions import (
     EventConversionException,
     FunctionsFrameworkException,
     MissingSourceException,
+    RequestTimeoutException,
 )
 from google.cloud.functions.context import Context
 
@@ -54,6 +67,7 @@ _CRASH = "crash"
 _CLOUDEVENT_MIME_TYPE = "application/cloudevents+json"
 
 CloudEventFunction = Callable[[CloudEvent], None]
+CloudEventBatchFunction = Callable[[List[CloudEvent]], Optional[Dict[str, Any]]]
 HTTPFunction = Callable[[flask.Request], flask.typing.ResponseReturnValue]
 
 
@@ -67,7 +81,7 @@ class _LoggingHandler(io.TextIOWrapper):
 
     def write(self, out):
         payload = dict(severity=self.level, message=out.rstrip("\n"))
-        return self.stderr.write(json.dumps(payload) + "\n")
+        return self.stderr.write(_json.dumps(payload) + "\n")
 
 
 def cloud_event(func: CloudEventFunction) -> CloudEventFunction:
@@ -83,6 +97,48 @@ def cloud_event(func: CloudEventFunction) -> CloudEventFunction:
     return wrapper
 
 
+def cloud_event_batch(func: CloudEventBatchFunction) -> CloudEventBatchFunction:
+    """Decorator that registers a cloudevent function that handles batches.
+
+    The function receives the list of events of each request and may return a
+    mapping of the IDs of the events it failed to process to their errors.
+    """
+    _function_registry.REGISTRY_MAP[func.__name__] = (
+        _function_registry.CLOUDEVENT_SIGNATURE_TYPE
+    )
+    _function_registry.BATCH_FUNCTIONS.add(func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def resource(factory: Callable[[], Any]) -> _resources.Resource:
+    """Decorator that declares a lazily initialized instance resource.
+
+    Calling the decorated function returns the resource, created once per
+    process. Workers create every resource at boot and close them on exit.
+    """
+    return _resources.register(factory)
+
+
+def on_startup(func=None, *, timeout=None):
+    """Decorator that registers a hook to run when a worker starts.
+
+    The hook may be sync or async. `timeout` (or STARTUP_TIMEOUT_SECONDS)
+    bounds how long it may take before the worker fails to boot with
+    StartupTimeoutException. Any other exception from the hook is raised as is.
+    """
+    return _lifecycle.on_startup(func, timeout=timeout)
+
+
+def on_shutdown(func=None, *, timeout=None):
+    """Decorator that registers a hook to run when a worker shuts down."""
+    return _lifecycle.on_shutdown(func, timeout=timeout)
+
+
 def typed(*args):
     def _typed(func):
         _typed_event.register_typed_event(input_type, func)
@@ -145,9 +201,7 @@ def _http_view_func_wrapper(function, request):
 
 
 def _run_cloud_event(function, request):
-    data = request.get_data()
-    event = from_http(request.headers, data)
-    function(event)
+    function(_decoding.to_cloud_event(request))
 
 
 def _typed_event_func_wrapper(function, request, inputType: Type):
@@ -162,7 +216,7 @@ def _typed_event_func_wrapper(function, request, inputType: Type):
             if response.__class__.__module__ == "builtins":
                 return response
             _typed_event._validate_return_type(response)
-            return json.dumps(response.to_dict())
+            return _json.dumps(response.to_dict())
         except Exception as e:
             raise FunctionsFrameworkException(
                 "Function execution failed with the error"
@@ -171,13 +225,50 @@ def _typed_event_func_wrapper(function, request, inputType: Type):
     return view_func
 
 
+def _run_cloud_event_batch(function, batch, batch_handler):
+    if batch_handler:
+        batch.record_handler_failures(function([event for event, _ in batch.events]))
+    else:
+        for event, result in batch.events:
+            try:
+                function(event)
+            except RequestTimeoutException:
+                # The deadline is for the whole batch, not for this event
+                raise
+            except Exception as e:
+                _cloudevent_batch.log_exception(event, e)
+                batch.failed(result, e)
+            else:
+                batch.succeeded(result)
+    body, status = batch.response()
+    return body, status, {"Content-Type": "application/json"}
+
+
 def _cloud_event_view_func_wrapper(function, request):
+    batch_handler = function.__name__ in _function_registry.BATCH_FUNCTIONS
+
+    def deliver(event):
+        if batch_handler:
+            batch = _cloudevent_batch.Batch.from_event(event)
+            return _run_cloud_event_batch(function, batch, batch_handler)
+        function(event)
+        return "OK"
+
     @execution_id.set_execution_context(request, _enable_execution_id_logging())
     def view_func(path):
+        if _cloudevent_batch.is_batch(request.headers):
+            try:
+                batch = _cloudevent_batch.Batch.from_body(request.get_data())
+            except EventConversionException as e:
+                _metrics.record_event_conversion_failure()
+                flask.abort(400, description=str(e))
+            return _run_cloud_event_batch(function, batch, batch_handler)
+
+        decoded = _decoding.DecodedRequest.from_request(request)
         ce_exception = None
         event = None
         try:
-            event = from_http(request.headers, request.get_data())
+            event = _decoding.to_cloud_event(decoded)
         except (
             cloud_exceptions.MissingRequiredFields,
             cloud_exceptions.InvalidRequiredFields,
@@ -185,24 +276,27 @@ def _cloud_event_view_func_wrapper(function, request):
             ce_exception = e
 
         if not ce_exception:
-            function(event)
-            return "OK"
+            return deliver(event)
 
         # Not a CloudEvent. Try converting to a CloudEvent.
         try:
-            function(event_conversion.background_event_to_cloud_event(request))
+            response = deliver(
+                event_conversion.background_event_to_cloud_event(decoded)
+            )
         except EventConversionException as e:
+            _metrics.record_event_conversion_failure()
             flask.abort(
                 400,
                 description=(
                     "Function was defined with FUNCTION_SIGNATURE_TYPE=cloudevent but"
                     " parsing CloudEvent failed and converting from background event to"
-                    f" CloudEvent also failed.\nGot HTTP headers: {request.headers}\nGot"
-                    f" data: {request.get_data()}\nGot CloudEvent exception: {repr(ce_exception)}"
-                    f"\nGot background event conversion exception: {repr(e)}"
+                    f" CloudEvent also failed.\n{decoded.diagnostics()}\nGot CloudEvent"
+                    f" exception: {_decoding._truncate(repr(ce_exception))}\nGot"
+                    " background event conversion exception:"
+                    f" {_decoding._truncate(repr(e))}"
                 ),
             )
-        return "OK"
+        return response
 
     return view_func
 
@@ -230,6 +324,7 @@ def _event_view_func_wrapper(function, request):
             # This is a regular CloudEvent
             event_data = event_conversion.marshal_background_event_data(request)
             if not event_data:
+                _metrics.record_event_conversion_failure()
                 flask.abort(400)
             event_object = BackgroundEvent(**event_data)
             data = event_object.data
@@ -241,7 +336,129 @@ def _event_view_func_wrapper(function, request):
     return view_func
 
 
+class _LeanURLAdapter:
+    """URL adapter for HTTP functions that bypasses werkzeug's URL matcher.
+
+    Every path except the reserved ones (/robots.txt, /favicon.ico and the
+    metrics path) goes to the function, so matching is a set lookup. Reserved
+    paths, whose rules may only allow some methods, and anything else (e.g.
+    url_for) are delegated to a regular adapter, created on first use.
+    """
+
+    def __init__(self, app, request, rules, reserved_paths):
+        self.app = app
+        self.request = request
+        self.rules = rules
+        self.reserved_paths = reserved_paths
+        self._adapter = None
+
+    def match(self, return_rule=False):
+        path = self.request.path
+        if path in self.reserved_paths:
+            return self._regular_adapter().match(return_rule=return_rule)
+        if path == "/":
+            rule, view_args = self.rules["/"], {"path": ""}
+        else:
+            rule, view_args = self.rules["/<path:path>"], {"path": path[1:]}
+        return (rule if return_rule else rule.endpoint), view_args
+
+    def _regular_adapter(self):
+        if self._adapter is None:
+            self._adapter = flask.Flask.create_url_adapter(self.app, self.request)
+        return self._adapter
+
+    def __getattr__(self, name):
+        return getattr(self._regular_adapter(), name)
+
+
+def _configure_lean_dispatch(app):
+    rules = {rule.rule: rule for rule in app.url_map.iter_rules()}
+    # Paths that HTTP functions never receive
+    reserved_paths = frozenset(
+        path for path, rule in rules.items() if rule.endpoint != "run"
+    )
+    create_url_adapter = app.create_url_adapter
+
+    def lean_create_url_adapter(request):
+        if request is None:
+            return create_url_adapter(request)
+        return _LeanURLAdapter(app, request, rules, reserved_paths)
+
+    app.create_url_adapter = lean_create_url_adapter
+
+
+def _configure_metrics(app):
+    app.url_map.add(
+        werkzeug.routing.Rule(
+            _metrics.metrics_path(), endpoint="metrics", methods=["GET"]
+        )
+    )
+    app.view_functions["metrics"] = lambda: (
+        _metrics.registry.render(),
+        200,
+        {"Content-Type": _metrics.CONTENT_TYPE},
+    )
+
+
+def _configure_profiling(app):
+    token = _profiling.profiling_token()
+    app.url_map.add(
+        werkzeug.routing.Rule(
+            _profiling.profiling_path(), endpoint="profile", methods=["GET"]
+        )
+    )
+
+    def sample():
+        if not _profiling.authorized(
+            flask.request.headers.get(_profiling.PROFILE_HEADER), token
+        ):
+            flask.abort(403)
+        try:
+            seconds = _profiling.sample_seconds(flask.request.args.get("seconds"))
+        except ValueError as e:
+            flask.abort(400, description=str(e))
+        return (
+            _profiling.sample(seconds),
+            200,
+            {"Content-Type": _profiling.CONTENT_TYPE},
+        )
+
+    app.view_functions["profile"] = sample
+
+
+def _configure_memory_diagnostics(app):
+    token = _memory.diagnostics_token()
+    diagnostics = _memory.Diagnostics()
+    path = _memory.diagnostics_path()
+    for action, method in _memory.ACTIONS.items():
+        app.url_map.add(
+            werkzeug.routing.Rule(
+                f"{path}/{action}", endpoint="memory", methods=[method]
+            )
+        )
+
+    def memory():
+        if not _profiling.authorized(
+            flask.request.headers.get(_memory.MEMORY_HEADER), token
+        ):
+            flask.abort(403)
+        action = flask.request.path.rsplit("/", 1)[1]
+        status, body = diagnostics.handle(action, flask.request.args)
+        return _json.dumps(body), status, {"Content-Type": "application/json"}
+
+    app.view_functions["memory"] = memory
+    app.wsgi_app = _memory.WsgiMiddleware(app.wsgi_app, diagnostics)
+
+
 def _configure_app(app, function, signature_type):
+    if _metrics._enable_metrics():
+        _configure_metrics(app)
+    if _memory._enable_memory_diagnostics():
+        _configure_memory_diagnostics(app)
+    enable_profiling = _profiling._enable_profiling()
+    if enable_profiling:
+        _configure_profiling(app)
+
     # Mount the function at the root. Support GCF's default path behavior
     # Modify the url_map and view_functions directly here instead of using
     # add_url_rule in order to create endpoints that route all methods
@@ -255,6 +472,8 @@ def _configure_app(app, function, signature_type):
         app.view_functions["run"] = _http_view_func_wrapper(function, flask.request)
         app.view_functions["error"] = lambda: flask.abort(404, description="Not Found")
         app.after_request(read_request)
+        if _enable_lean_dispatch():
+            _configure_lean_dispatch(app)
     elif signature_type == _function_registry.BACKGROUNDEVENT_SIGNATURE_TYPE:
         app.url_map.add(
             werkzeug.routing.Rule(
@@ -305,16 +524,41 @@ def _configure_app(app, function, signature_type):
             )
         )
 
+    if signature_type in (
+        _function_registry.HTTP_SIGNATURE_TYPE,
+        _function_registry.BACKGROUNDEVENT_SIGNATURE_TYPE,
+    ):
+        endpoint = "run"
+    else:
+        endpoint = signature_type
+    if enable_profiling:
+        app.view_functions[endpoint] = _profiling.profile_view(
+            app.view_functions[endpoint], flask.request
+        )
+    limiter = _admission.limiter()
+    if limiter is not None:
+        app.view_functions[endpoint] = _admission.limit_view(
+            app.view_functions[endpoint], limiter
+        )
+
 
 def read_request(response):
     """
     Force the framework to read the entire request before responding, to avoid
     connection errors when returning prematurely. Skipped on streaming responses
     as these may continue to operate on the request after they are returned.
+    Bodies with more than REQUEST_DRAIN_MAX_BYTES left unread close the
+    connection instead.
     """
 
     if not response.is_streamed:
-        flask.request.get_data()
+        try:
+            drained = _body.drain(flask.request.stream, _body.drain_max_bytes())
+        except werkzeug.exceptions.RequestEntityTooLarge:
+            # The response is ready, the rest of the body doesn't matter
+            drained = False
+        if not drained:
+            response.headers["Connection"] = "close"
 
     return response
 
@@ -323,9 +567,23 @@ def crash_handler(e):
     """
     Return crash header to allow logging 'crash' message in logs.
     """
+    _metrics.record_crash()
     return str(e), 500, {_FUNCTION_STATUS_HEADER_FIELD: _CRASH}
 
 
+def _create_asgi_app_from_module(
+    report, target, source, signature_type, source_module, spec
+):
+    from functions_framework.aio import create_asgi_app_from_module
+
+    with report.phase("create_asgi_app"):
+        app = create_asgi_app_from_module(
+            target, source, signature_type, source_module, spec
+        )
+    report.emit()
+    return app
+
+
 def create_app(target=None, source=None, signature_type=None):
     """Create an app for the function.
 
@@ -337,8 +595,11 @@ def create_app(target=None, source=None, signature_type=None):
     Returns:
         A Flask WSGI app or Starlette ASGI app depending on function decorators
     """
-    target = _function_registry.get_function_target(target)
-    source = _function_registry.get_function_source(source)
+    report = _startup_report.StartupReport()
+    with report.phase("resolve_source"):
+        target = _function_registry.get_function_target(target)
+        source = _function_registry.get_function_source(source)
+    report.target, report.source = target, source
 
     # Set the template folder relative to the source path
     # Python 3.5: join does not support PosixPath
@@ -351,13 +612,29 @@ def create_app(target=None, source=None, signature_type=None):
             )
         )
 
-    source_module, spec = _function_registry.load_function_module(source)
+    executed = _function_registry.declares_asgi_function(source, target)
+    with report.phase("load_function_module"):
+        source_module, spec = _function_registry.load_function_module(source)
+    if executed:
+        # @aio functions never use the Flask app, so the module runs before
+        # one is built
+        with report.phase("exec_module"), report.trace_imports():
+            spec.loader.exec_module(source_module)
+        if target in _function_registry.ASGI_FUNCTIONS:
+            return _create_asgi_app_from_module(
+                report, target, source, signature_type, source_module, spec
+            )
+        # The target isn't an @aio function after all, so the Flask app serves
+        # it from the module that already ran, outside of its app context
 
     if _enable_execution_id_logging():
         _configure_app_execution_id_logging()
 
     # Create the application
-    _app = flask.Flask(target, template_folder=template_folder)
+    with report.phase("create_flask_app"):
+        _app = flask.Flask(target, template_folder=template_folder)
+    if _json.FlaskJSONProvider is not None:  # pragma: no branch
+        _app.json = _json.FlaskJSONProvider(_app)
     _app.register_error_handler(500, crash_handler)
     global errorhandler
     errorhandler = _app.errorhandler
@@ -380,11 +657,23 @@ def create_app(target=None, source=None, signature_type=None):
         setup_logging()
 
     _app.wsgi_app = execution_id.WsgiMiddleware(_app.wsgi_app)
+    if _drain._enable_drain():
+        _app.wsgi_app = _drain.WsgiMiddleware(_app.wsgi_app)
+    _app.request_class = _body.Request
+    max_body_bytes = _body.max_body_bytes()
+    if max_body_bytes:
+        _app.wsgi_app = _body.WsgiMiddleware(_app.wsgi_app, max_body_bytes)
+    if _compression._enable_compression():
+        _app.wsgi_app = _compression.WsgiMiddleware(
+            _app.wsgi_app, _compression.Compression.from_env()
+        )
 
     # Execute the module, within the application context
     with _app.app_context():
         try:
-            spec.loader.exec_module(source_module)
+            if not executed:
+                with report.phase("exec_module"), report.trace_imports():
+                    spec.loader.exec_module(source_module)
             function = _function_registry.get_user_function(
                 source, source_module, target
             )
@@ -408,25 +697,24 @@ def create_app(target=None, source=None, signature_type=None):
     use_asgi = target in _function_registry.ASGI_FUNCTIONS
     if use_asgi:
         # This function needs ASGI, delegate to create_asgi_app
-        # Note: @aio decorators only register functions in ASGI_FUNCTIONS when the
-        # module is imported. We can't know if a function uses @aio until after
-        # we load the module.
-        #
-        # To avoid loading modules twice, we always create a Flask app first, load the
-        # module within its context, then check if ASGI is needed. This results in an
-        # unused Flask app for ASGI functions, but we accept this memory overhead as a
-        # trade-off.
-        from functions_framework.aio import create_asgi_app_from_module
-
-        return create_asgi_app_from_module(
-            target, source, signature_type, source_module, spec
+        # Note: @aio functions are normally detected from the source above,
+        # before any app is built. Those only registered in ASGI_FUNCTIONS by
+        # running the module (e.g. a decorator applied through an alias the
+        # scan can't follow) still get here, after the module was loaded in
+        # the Flask app context, which is then left unused.
+        return _create_asgi_app_from_module(
+            report, target, source, signature_type, source_module, spec
         )
 
     # Get the configured function signature type
     signature_type = _function_registry.get_func_signature_type(target, signature_type)
 
-    _configure_app(_app, function, signature_type)
+    with report.phase("configure_app"):
+        _configure_app(_app, function, signature_type)
+    if _metrics._enable_metrics():
+        _app.wsgi_app = _metrics.WsgiMiddleware(_app.wsgi_app, signature_type)
 
+    report.emit()
     return _app
 
 
@@ -470,6 +758,10 @@ def _configure_app_execution_id_logging():
     )
 
 
+def _enable_lean_dispatch():
+    return os.environ.get("LEAN_DISPATCH_ENABLED", "False").lower() == "true"
+
+
 def _enable_execution_id_logging():
     # Based on distutils.util.strtobool
     truthy_values = ("y", "yes", "t", "true", "on", "1")
@@ -0,0 +1,207 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control in front of the function.
+
+Setting ADMISSION_MAX_CONCURRENCY limits how many calls to the function run
+at once in a worker. Up to ADMISSION_MAX_QUEUE more requests (default 0) wait
+up to ADMISSION_QUEUE_TIMEOUT_SECONDS (default 1) for a free slot, and any
+other request gets a fast 503 with a Retry-After header, rather than adding
+to the latency of everything else.
+
+With gunicorn's gthread worker, requests only reach the limit once they have
+a thread, so ADMISSION_MAX_CONCURRENCY should be below THREADS to leave
+threads for queueing and shedding.
+
+Setting ADMISSION_TARGET_LATENCY_SECONDS makes the limit adaptive (AIMD):
+every call slower than the target cuts it by a tenth, and every faster call
+raises it by 1/limit, up to ADMISSION_MAX_CONCURRENCY.
+"""
+
+import asyncio
+import collections
+import functools
+import os
+import threading
+import time
+
+from functions_framework import _metrics
+
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 1.0
+
+RETRY_AFTER_SECONDS = "1"
+REJECTED_BODY = "Service Unavailable: too many requests in flight"
+
+_DECREASE_FACTOR = 0.9
+
+
+class _Limit:
+    """A concurrency limit, adapted to latency if there is a target."""
+
+    def __init__(self, max_concurrency, max_queue=0, queue_timeout=None, target=None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = (
+            DEFAULT_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        )
+        self.target = target
+        self.limit = max_concurrency
+        self._limit = float(max_concurrency)
+        self.active = 0
+
+    def _adapt(self, latency):
+        if self.target is None:
+            return
+        if latency > self.target:
+            self._limit = max(1.0, self._limit * _DECREASE_FACTOR)
+        else:
+            self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+        self.limit = int(self._limit)
+
+
+class Limiter(_Limit):
+    """Limit for the threads of a WSGI worker."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queued = 0
+        self._free = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot; return False if the request should be shed."""
+        with self._free:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if self.queued >= self.max_queue:
+                return False
+            self.queued += 1
+            try:
+                admitted = self._free.wait_for(
+                    lambda: self.active < self.limit, self.queue_timeout
+                )
+            finally:
+                self.queued -= 1
+            if admitted:
+                self.active += 1
+            return admitted
+
+    def release(self, latency):
+        with self._free:
+            self.active -= 1
+            self._adapt(latency)
+            self._free.notify(max(self.limit - self.active, 0))
+
+
+class AsyncLimiter(_Limit):
+    """Limit for the coroutines of an ASGI worker, on a single event loop."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Futures resolved with True when admitted, or False on timeout
+        self._waiters = collections.deque()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a free slot; return False if the request should be shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        expiry = loop.call_later(self.queue_timeout, self._expire, waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # The slot was handed over just as the request was cancelled
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.active -= 1
+                self._admit_waiters()
+            raise
+        finally:
+            expiry.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            waiter.set_result(False)
+
+    def _admit_waiters(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(True)
+
+    def release(self, latency):
+        self.active -= 1
+        self._adapt(latency)
+        self._admit_waiters()
+
+
+def _limit_options():
+    max_concurrency = int(os.environ.get("ADMISSION_MAX_CONCURRENCY", 0))
+    if max_concurrency < 1:
+        return None
+    target = os.environ.get("ADMISSION_TARGET_LATENCY_SECONDS")
+    return {
+        "max_concurrency": max_concurrency,
+        "max_queue": int(os.environ.get("ADMISSION_MAX_QUEUE", 0)),
+        "queue_timeout": float(
+            os.environ.get(
+                "ADMISSION_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS
+            )
+        ),
+        "target": float(target) if target else None,
+    }
+
+
+def limiter():
+    """The limiter configured by the environment for a WSGI app, if any."""
+    options = _limit_options()
+    return Limiter(**options) if options else None
+
+
+def async_limiter():
+    """The limiter configured by the environment for an ASGI app, if any."""
+    options = _limit_options()
+    return AsyncLimiter(**options) if options else None
+
+
+def limit_view(view, limiter):
+    """Run the Flask view of the function only once `limiter` admits it."""
+
+    @functools.wraps(view)
+    def limited_view(*args, **kwargs):
+        if not limiter.acquire():
+            _metrics.record_shed()
+            return (
+                REJECTED_BODY,
+                503,
+                {"Content-Type": "text/plain", "Retry-After": RETRY_AFTER_SECONDS},
+            )
+        start = time.perf_counter()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    return limited_view
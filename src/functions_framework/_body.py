@@ -0,0 +1,167 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Request bodies in bounded memory.
+
+Setting MAX_REQUEST_BODY_BYTES caps the size of request bodies. Requests that
+declare a larger Content-Length get a 413 before the function runs, and
+chunked bodies get one once they are read past the limit.
+
+Files uploaded in multipart bodies are parsed as they stream in, and spooled
+to a temporary file once they grow past REQUEST_SPOOL_BYTES (default 500 KiB),
+both for Flask's `request.files` and for `functions_framework.aio.parse_form`.
+
+Bodies left unread by the function are read and dropped in chunks, rather
+than buffered, before the response is sent. If more than
+REQUEST_DRAIN_MAX_BYTES (default 1 MiB) is left, the rest isn't read and the
+response asks for the connection to be closed instead.
+"""
+
+import os
+import tempfile
+import threading
+
+import flask
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+DEFAULT_SPOOL_BYTES = 500 * 1024
+# Fields of multipart bodies that aren't files are kept in memory
+MAX_FORM_MEMORY_BYTES = 500 * 1024
+CHUNK_SIZE = 64 * 1024
+DEFAULT_DRAIN_MAX_BYTES = 1024 * 1024
+
+TOO_LARGE_BODY = b"Request Entity Too Large"
+
+# Chunks of unread bodies are read into this, a buffer per thread
+_scratch = threading.local()
+
+
+def max_body_bytes():
+    """The largest request body allowed, or None for no limit."""
+    return int(os.environ.get("MAX_REQUEST_BODY_BYTES", 0)) or None
+
+
+def spool_bytes():
+    return int(os.environ.get("REQUEST_SPOOL_BYTES", DEFAULT_SPOOL_BYTES))
+
+
+def drain_max_bytes():
+    return int(os.environ.get("REQUEST_DRAIN_MAX_BYTES", DEFAULT_DRAIN_MAX_BYTES))
+
+
+def spooled_file():
+    """A file that stays in memory until it grows past REQUEST_SPOOL_BYTES."""
+    return tempfile.SpooledTemporaryFile(max_size=spool_bytes(), mode="rb+")
+
+
+def declared_too_large(content_length, max_bytes):
+    """Whether a Content-Length header value is above `max_bytes`."""
+    try:
+        return int(content_length) > max_bytes
+    except (TypeError, ValueError):
+        return False
+
+
+def _scratch_buffer():
+    try:
+        return _scratch.buffer
+    except AttributeError:
+        _scratch.buffer = bytearray(CHUNK_SIZE)
+        return _scratch.buffer
+
+
+def drain(stream, max_bytes=None):
+    """Read `stream` to the end, without keeping what is read.
+
+    Returns False, with the rest of the stream unread, once more than
+    `max_bytes` have been read.
+    """
+    readinto = getattr(stream, "readinto", None)
+    if readinto is not None:
+        buffer = _scratch_buffer()
+    drained = 0
+    while max_bytes is None or drained <= max_bytes:
+        if readinto is not None:
+            size = readinto(buffer)
+        else:
+            # Streams such as gunicorn's only have read()
+            size = len(stream.read(CHUNK_SIZE))
+        if not size:
+            return True
+        drained += size
+    return False
+
+
+class Request(flask.Request):
+    """Flask request that spools uploaded files past REQUEST_SPOOL_BYTES."""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        return spooled_file()
+
+
+class _LimitedInput:
+    """A `wsgi.input` that raises RequestEntityTooLarge past `max_bytes`.
+
+    Flask's MAX_CONTENT_LENGTH isn't used for this, as `get_data()` silently
+    truncates chunked bodies at that length.
+    """
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.read_bytes = 0
+
+    def _limit(self, size):
+        # Read one byte past the limit to tell whether the body goes over it
+        remaining = self.max_bytes - self.read_bytes + 1
+        if size is None or size < 0:
+            return remaining
+        return min(size, remaining)
+
+    def _count(self, data):
+        self.read_bytes += len(data)
+        if self.read_bytes > self.max_bytes:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size=-1):
+        return self._count(self.stream.read(self._limit(size)))
+
+    def readline(self, size=-1):
+        return self._count(self.stream.readline(self._limit(size)))
+
+
+class WsgiMiddleware:
+    """Limits request bodies to `max_bytes`.
+
+    Requests that declare a larger body are rejected right away, and chunked
+    bodies once they are read past the limit.
+    """
+
+    def __init__(self, wsgi_app, max_bytes):
+        self.wsgi_app = wsgi_app
+        self.max_bytes = max_bytes
+
+    def __call__(self, environ, start_response):
+        if declared_too_large(environ.get("CONTENT_LENGTH"), self.max_bytes):
+            start_response(
+                "413 Request Entity Too Large", [("Content-Type", "text/plain")]
+            )
+            return [TOO_LARGE_BODY]
+        if environ.get("wsgi.input_terminated") and not environ.get("CONTENT_LENGTH"):
+            environ["wsgi.input"] = _LimitedInput(environ["wsgi.input"], self.max_bytes)
+        return self.wsgi_app(environ, start_response)
@@ -38,7 +38,16 @@ from functions_framework._http import create_server
     is_flag=True,
     help="Use ASGI server for function execution",
 )
-def _cli(target, source, signature_type, host, port, debug, asgi):
+@click.option(
+    "--preload",
+    envvar="PRELOAD_APP",
+    is_flag=True,
+    help="Load the function once before forking workers and share it between them",
+)
+def _cli(target, source, signature_type, host, port, debug, asgi, preload):
+    if preload:
+        # Read by the gunicorn applications, like WORKERS and THREADS
+        os.environ["PRELOAD_APP"] = "true"
     if asgi:
         from functions_framework.aio import create_asgi_app
 
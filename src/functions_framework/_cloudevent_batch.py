@@ -0,0 +1,148 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""CloudEvents batch content mode (application/cloudevents-batch+json).
+
+A batch request carries a JSON array of structured CloudEvents. Functions are
+invoked once per event unless they were registered with a cloud_event_batch
+decorator, in which case they receive every event of the batch in one call.
+Either way, each event gets its own entry in the response so that one failing
+event doesn't fail the rest of the batch.
+"""
+
+import base64
+import logging
+import traceback
+
+from collections.abc import Mapping
+
+import cloudevents.exceptions as cloud_exceptions
+
+from cloudevents.http import CloudEvent, from_dict
+
+from functions_framework import _json, _metrics
+from functions_framework.exceptions import EventConversionException
+
+BATCH_MIME_TYPE = "application/cloudevents-batch+json"
+
+logger = logging.getLogger(__name__)
+
+_OK = "OK"
+_ERROR = "error"
+
+
+def is_batch(headers):
+    content_type = headers.get("content-type") or ""
+    return content_type.split(";", 1)[0].strip().lower() == BATCH_MIME_TYPE
+
+
+def _event_from_dict(item):
+    if not isinstance(item, dict):
+        raise cloud_exceptions.InvalidStructuredJSON(
+            f"Expected a CloudEvent object, got {type(item).__name__}"
+        )
+    if "specversion" not in item:
+        raise cloud_exceptions.MissingRequiredFields(
+            "Failed to find specversion in CloudEvent"
+        )
+    if "data_base64" in item:
+        attributes = dict(item)
+        data = base64.b64decode(attributes.pop("data_base64"), validate=True)
+        return CloudEvent(attributes, data)
+    return from_dict(item)
+
+
+def log_exception(event, e):
+    """Log an exception raised by the function for one event of a batch."""
+    tb_text = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+    logger.error(f"Exception on CloudEvent {event['id']}\n{tb_text}".rstrip())
+
+
+class Batch:
+    """The events of a batch request and the outcome of each of them.
+
+    `events` holds (event, result) pairs for the entries that are valid
+    CloudEvents; entries that aren't are marked as failed right away.
+    """
+
+    def __init__(self, items):
+        self.events = []
+        self.results = []
+        self.failures = 0
+        for item in items:
+            result = {"id": item.get("id") if isinstance(item, dict) else None}
+            self.results.append(result)
+            try:
+                event = _event_from_dict(item)
+            except (cloud_exceptions.GenericException, TypeError, ValueError) as e:
+                _metrics.record_event_conversion_failure()
+                self.failed(result, e)
+                continue
+            self.events.append((event, result))
+
+    @classmethod
+    def from_body(cls, data):
+        try:
+            items = _json.loads(data)
+        except _json.JSONDecodeError as e:
+            raise EventConversionException(
+                f"Failed to parse CloudEvents batch: {e}"
+            ) from e
+        if not isinstance(items, list):
+            raise EventConversionException(
+                "Failed to parse CloudEvents batch: expected a JSON array, got "
+                f"{type(items).__name__}"
+            )
+        return cls(items)
+
+    @classmethod
+    def from_event(cls, event):
+        batch = cls([])
+        result = {"id": event["id"]}
+        batch.results.append(result)
+        batch.events.append((event, result))
+        return batch
+
+    def succeeded(self, result):
+        result["status"] = _OK
+
+    def failed(self, result, error):
+        result["status"] = _ERROR
+        result["error"] = error if isinstance(error, str) else repr(error)
+        self.failures += 1
+
+    def record_handler_failures(self, failures):
+        """Record the outcome of a batch handler call.
+
+        `failures` is what the handler returned: None, or a mapping of the IDs
+        of the events it failed to process to the error for each of them.
+        """
+        if failures is None:
+            failures = {}
+        elif not isinstance(failures, Mapping):
+            raise TypeError(
+                "A cloud_event_batch function must return None or a dict of the"
+                " IDs of the events it failed to process to their errors, not"
+                f" {type(failures).__name__}"
+            )
+        for event, result in self.events:
+            if event["id"] in failures:
+                self.failed(result, failures[event["id"]])
+            else:
+                self.succeeded(result)
+
+    def response(self):
+        """Return the response body and status: 207 if any event failed."""
+        status = 207 if self.failures else 200
+        return _json.dumps({"results": self.results}), status
@@ -0,0 +1,481 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Response compression, negotiated with Accept-Encoding.
+
+Setting COMPRESSION_ENABLED=true compresses responses of at least
+COMPRESSION_MIN_BYTES (default 1024) with the encoding the client prefers
+among COMPRESSION_ENCODINGS, a comma-separated list of `name[:level]` in
+order of preference (default "zstd,br,gzip"). gzip is always available; zstd
+needs the zstandard package and br the brotli (or brotlicffi) package, and
+are left out of the default list when they aren't installed.
+
+Responses that are already encoded, ask for no-transform, are partial, or
+have a content type that doesn't compress (images, audio, video, archives,
+server-sent events) are sent as they are. A strong ETag of a compressed
+response is made weak, since it named the uncompressed bytes.
+
+Streamed responses are compressed chunk by chunk and flushed after each
+chunk, so clients still see them incrementally. In the ASGI app, large
+chunks are compressed on a thread rather than on the event loop.
+"""
+
+import asyncio
+import functools
+import itertools
+import os
+import zlib
+
+from werkzeug.wsgi import ClosingIterator
+
+from functions_framework.exceptions import InvalidConfigurationException
+
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_ENCODINGS = "zstd,br,gzip"
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+# Bodies of WSGI responses that declare a larger Content-Length are streamed
+# rather than compressed in one piece
+MAX_BUFFERED_BYTES = 1024 * 1024
+# ASGI body chunks at least this large are compressed off the event loop
+OFFLOAD_BYTES = 64 * 1024
+
+_INCOMPRESSIBLE_TYPE_PREFIXES = ("image/", "audio/", "video/", "font/woff")
+_COMPRESSIBLE_IMAGE_TYPES = frozenset({"image/svg+xml", "image/bmp"})
+_INCOMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+        "application/zstd",
+        "application/x-7z-compressed",
+        "application/x-bzip2",
+        "application/x-rar-compressed",
+        "application/x-xz",
+        "text/event-stream",
+    }
+)
+_UNCOMPRESSED_STATUSES = frozenset({204, 206, 304})
+
+# zlib's window bits for a gzip header and trailer
+_GZIP_WBITS = 31
+
+
+def _enable_compression():
+    return os.environ.get("COMPRESSION_ENABLED", "False").lower() == "true"
+
+
+class _GzipEncoder:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+
+    def compress(self, data):
+        """Compress `data`, flushed so that it can be sent right away."""
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data=b""):
+        """Compress the last of the body, and end the stream."""
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def _load_gzip():
+    return _GzipEncoder
+
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        import brotlicffi as brotli
+
+    class _BrotliEncoder:
+        def __init__(self, level):
+            self._compressor = brotli.Compressor(quality=level)
+
+        def compress(self, data):
+            return self._compressor.process(data) + self._compressor.flush()
+
+        def finish(self, data=b""):
+            return self._compressor.process(data) + self._compressor.finish()
+
+    return _BrotliEncoder
+
+
+def _load_zstd():
+    import zstandard
+
+    class _ZstdEncoder:
+        def __init__(self, level):
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+        def compress(self, data):
+            return self._compressor.compress(data) + self._compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+
+        def finish(self, data=b""):
+            return self._compressor.compress(data) + self._compressor.flush()
+
+    return _ZstdEncoder
+
+
+_LOADERS = {"zstd": _load_zstd, "br": _load_brotli, "gzip": _load_gzip}
+
+
+class Encoding:
+    """A content coding, and the level to compress with."""
+
+    def __init__(self, name, level, encoder_class):
+        self.name = name
+        self.level = level
+        self._encoder_class = encoder_class
+
+    def encoder(self):
+        return self._encoder_class(self.level)
+
+
+def _parse_encodings(value, explicit):
+    encodings = []
+    for item in value.split(","):
+        name, _, level = item.strip().lower().partition(":")
+        if name not in _LOADERS:
+            raise InvalidConfigurationException(
+                f"Invalid encoding '{name}' in COMPRESSION_ENCODINGS, expected one"
+                f" of: {', '.join(_LOADERS)}"
+            )
+        try:
+            encoder_class = _LOADERS[name]()
+        except ImportError as e:
+            if not explicit:
+                continue
+            raise InvalidConfigurationException(
+                f"COMPRESSION_ENCODINGS includes '{name}' but it is not installed"
+            ) from e
+        try:
+            level = int(level) if level else DEFAULT_LEVELS[name]
+        except ValueError:
+            raise InvalidConfigurationException(
+                f"Invalid level '{level}' for '{name}' in COMPRESSION_ENCODINGS"
+            ) from None
+        encodings.append(Encoding(name, level, encoder_class))
+    return encodings
+
+
+def _qualities(accept_encoding):
+    """The quality of each coding in an Accept-Encoding header."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities
+
+
+def _media_type(content_type):
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def _compressible_type(media_type):
+    if media_type in _INCOMPRESSIBLE_TYPES:
+        return False
+    return media_type in _COMPRESSIBLE_IMAGE_TYPES or not media_type.startswith(
+        _INCOMPRESSIBLE_TYPE_PREFIXES
+    )
+
+
+def _content_length(headers):
+    try:
+        return int(headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _vary(value):
+    """The Vary header value with Accept-Encoding added to `value`."""
+    if not value:
+        return "Accept-Encoding"
+    names = {name.strip().lower() for name in value.split(",")}
+    if "accept-encoding" in names or "*" in names:
+        return value
+    return f"{value}, Accept-Encoding"
+
+
+class Compression:
+    """The encodings responses are compressed with, in order of preference."""
+
+    def __init__(self, encodings, min_bytes=DEFAULT_MIN_BYTES):
+        self.encodings = encodings
+        self.min_bytes = min_bytes
+        # Clients send few distinct Accept-Encoding values
+        self.negotiate = functools.lru_cache(maxsize=64)(self._negotiate)
+
+    @classmethod
+    def from_env(cls):
+        value = os.environ.get("COMPRESSION_ENCODINGS")
+        return cls(
+            _parse_encodings(value or DEFAULT_ENCODINGS, explicit=bool(value)),
+            int(os.environ.get("COMPRESSION_MIN_BYTES", DEFAULT_MIN_BYTES)),
+        )
+
+    def _negotiate(self, accept_encoding):
+        """The encoding to use for an Accept-Encoding header, or None.
+
+        The client's highest quality wins, and ties go to our preference.
+        """
+        if not accept_encoding:
+            return None
+        qualities = _qualities(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = qualities.get(encoding.name, qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compressible(self, status, headers):
+        """Whether a response could be compressed, given its status and headers.
+
+        `headers` maps lowercase header names to values.
+        """
+        if status < 200 or status in _UNCOMPRESSED_STATUSES:
+            return False
+        if headers.get("content-encoding", "identity").lower() != "identity":
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        if not _compressible_type(_media_type(headers.get("content-type", ""))):
+            return False
+        length = _content_length(headers)
+        return length is None or length >= self.min_bytes
+
+
+def _compressed_headers(headers, encoding):
+    compressed = []
+    for name, value in headers:
+        lower = name.lower()
+        if lower in ("content-length", "content-encoding"):
+            continue
+        if lower == "etag" and value.startswith('"'):
+            value = f"W/{value}"
+        compressed.append((name, value))
+    return compressed + [("Content-Encoding", encoding.name)]
+
+
+def _with_vary(headers, name="Vary"):
+    vary = None
+    rest = []
+    for header, value in headers:
+        if header.lower() == name.lower():
+            vary = value if vary is None else f"{vary}, {value}"
+        else:
+            rest.append((header, value))
+    return rest + [(name, _vary(vary))]
+
+
+def _compress_chunks(chunks, encoder):
+    for chunk in chunks:
+        if chunk:
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+    yield encoder.finish()
+
+
+def _no_write(data):
+    raise RuntimeError("write() is not supported for compressed responses")
+
+
+def _read_first_chunk(app_iter):
+    """Read the first chunk of `app_iter`, and return an iterator of all of them."""
+    app_iter = ClosingIterator(app_iter)
+    try:
+        first = list(itertools.islice(app_iter, 1))
+    except BaseException:
+        app_iter.close()
+        raise
+    return ClosingIterator(itertools.chain(first, app_iter), app_iter.close)
+
+
+class WsgiMiddleware:
+    """Compresses the responses of a WSGI app."""
+
+    def __init__(self, wsgi_app, compression):
+        self.wsgi_app = wsgi_app
+        self.compression = compression
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return self.wsgi_app(environ, start_response)
+        encoding = self.compression.negotiate(environ.get("HTTP_ACCEPT_ENCODING"))
+        started = False
+        # Set when the body is compressed: (status, headers) until it is
+        # compressed in one piece, or the encoder of a streamed body
+        buffered = None
+        streamed = None
+
+        def compressing_start_response(status, headers, exc_info=None):
+            nonlocal started, buffered, streamed
+            started = True
+            header_map = {name.lower(): value for name, value in headers}
+            if exc_info is not None or not self.compression.compressible(
+                int(status[:3]), header_map
+            ):
+                buffered = streamed = None
+                return start_response(status, headers, exc_info)
+            headers = _with_vary(headers)
+            if encoding is None:
+                return start_response(status, headers)
+            headers = _compressed_headers(headers, encoding)
+            length = _content_length(header_map)
+            if length is not None and length <= MAX_BUFFERED_BYTES:
+                buffered = (status, headers)
+                return _no_write
+            streamed = encoding.encoder()
+            write = start_response(status, headers)
+            return lambda data: write(streamed.compress(data))
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if not started:
+            # Generator apps only call start_response once they are iterated
+            app_iter = _read_first_chunk(app_iter)
+        if buffered is not None:
+            status, headers = buffered
+            try:
+                body = encoding.encoder().finish(b"".join(app_iter))
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            start_response(status, headers + [("Content-Length", str(len(body)))])
+            return [body]
+        if streamed is not None:
+            return ClosingIterator(
+                _compress_chunks(app_iter, streamed), getattr(app_iter, "close", None)
+            )
+        return app_iter
+
+
+def _encode_start(message, headers):
+    return {
+        **message,
+        "headers": [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ],
+    }
+
+
+async def _run(function, data):
+    """Call `function(data)`, on a thread if `data` is large."""
+    if len(data) < OFFLOAD_BYTES:
+        return function(data)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, function, data)
+
+
+class AsgiMiddleware:
+    """Compresses the responses of an ASGI app."""
+
+    def __init__(self, app, compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = self.compression.negotiate(accept_encoding)
+        # The start of a compressible response, held until its first body
+        # message tells whether it is worth compressing
+        start = None
+        encoder = None
+
+        async def compressing_send(message):
+            nonlocal start, encoder
+            if encoder is not None:
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                data = await _run(
+                    encoder.compress if more_body else encoder.finish, body
+                )
+                if data or not more_body:
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": data,
+                            "more_body": more_body,
+                        }
+                    )
+                return
+
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message["headers"]
+                ]
+                header_map = {name.lower(): value for name, value in headers}
+                if self.compression.compressible(message["status"], header_map):
+                    start = (message, _with_vary(headers))
+                else:
+                    await send(message)
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            message_start, headers = start
+            start = None
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if (
+                message["type"] != "http.response.body"
+                or encoding is None
+                or (not more_body and len(body) < self.compression.min_bytes)
+            ):
+                await send(_encode_start(message_start, headers))
+                await send(message)
+                return
+
+            headers = _compressed_headers(headers, encoding)
+            encoder = encoding.encoder()
+            if more_body:
+                await send(_encode_start(message_start, headers))
+                data = await _run(encoder.compress, body)
+                if data:
+                    await send(
+                        {"type": "http.response.body", "body": data, "more_body": True}
+                    )
+                return
+            data = await _run(encoder.finish, body)
+            await send(
+                _encode_start(
+                    message_start, headers + [("Content-Length", str(len(data)))]
+                )
+            )
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,180 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Event request bodies, read once and parsed as JSON at most once.
+
+The cloudevent wrappers share a DecodedRequest between CloudEvent parsing,
+conversion from background events and error messages, instead of each parsing
+the body again. Structured CloudEvents are built from that single parse, where
+`cloudevents.http.from_http` parses the body twice and then round-trips
+`data` through JSON once more.
+"""
+
+import base64
+import binascii
+
+import cloudevents.exceptions as cloud_exceptions
+
+from cloudevents.http import CloudEvent, from_http
+from cloudevents.sdk.converters import is_binary
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+from werkzeug.http import parse_options_header
+
+from functions_framework import _json
+
+# Longest headers or body put in an error message
+MAX_DIAGNOSTIC_CHARS = 1024
+
+# Attributes required by every supported CloudEvents specversion
+_REQUIRED_ATTRIBUTES = frozenset({"id", "source", "type", "specversion"})
+_SPEC_VERSIONS = frozenset({"0.3", "1.0"})
+# Context attributes defined by the supported specversions. Like `from_http`,
+# these are left out when null, while null extension attributes are kept.
+_CONTEXT_ATTRIBUTES = _REQUIRED_ATTRIBUTES | {
+    "datacontentencoding",
+    "datacontenttype",
+    "dataschema",
+    "schemaurl",
+    "subject",
+    "time",
+}
+
+_UNPARSED = object()
+
+
+def _truncate(text, limit=MAX_DIAGNOSTIC_CHARS):
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more characters)"
+
+
+class DecodedRequest:
+    """The headers and body of a request, with the body parsed lazily.
+
+    Has the attributes of a Flask request that `event_conversion` uses, so it
+    can be passed in place of one.
+    """
+
+    def __init__(self, headers, body, path="/"):
+        self.headers = headers
+        self.body = body
+        self.path = path
+        self.json_error = None
+        self._json = _UNPARSED
+
+    @classmethod
+    def from_request(cls, request):
+        return cls(request.headers, request.get_data(), request.path)
+
+    @property
+    def json(self):
+        """The body parsed as JSON, or None with `json_error` set if it isn't."""
+        if self._json is _UNPARSED:
+            try:
+                self._json = _json.loads(self.body)
+            except (ValueError, TypeError) as e:
+                self._json = None
+                self.json_error = e
+        return self._json
+
+    @property
+    def is_json(self):
+        mimetype = parse_options_header(self.headers.get("Content-Type"))[0]
+        return mimetype == "application/json" or (
+            mimetype.startswith("application/") and mimetype.endswith("+json")
+        )
+
+    def get_json(self):
+        """The body parsed as JSON, failing like Flask's `request.get_json()`."""
+        if not self.is_json:
+            raise UnsupportedMediaType(
+                "Did not attempt to load JSON data because the request"
+                " Content-Type was not 'application/json'."
+            )
+        data = self.json
+        if self.json_error is not None:
+            raise BadRequest(f"Failed to decode JSON object: {self.json_error}")
+        return data
+
+    def diagnostics(self):
+        """The headers and body for an error message, truncated."""
+        body = repr(self.body[:MAX_DIAGNOSTIC_CHARS])
+        if len(self.body) > MAX_DIAGNOSTIC_CHARS:
+            body += f"... ({len(self.body)} bytes)"
+        return f"Got HTTP headers: {_truncate(str(self.headers))}\nGot data: {body}"
+
+
+def _json_or_bytes(data):
+    try:
+        return _json.loads(data)
+    except (ValueError, TypeError):
+        return data
+
+
+def to_cloud_event(request):
+    """The CloudEvent of a request, in binary or structured content mode.
+
+    Raises the same exceptions as `cloudevents.http.from_http`.
+    """
+    if isinstance(request, DecodedRequest):
+        decoded = request
+    else:
+        decoded = DecodedRequest(request.headers, request.get_data())
+    if is_binary(decoded.headers):
+        return from_http(decoded.headers, decoded.body)
+
+    raw = decoded.json
+    if decoded.json_error is not None:
+        raise cloud_exceptions.MissingRequiredFields(
+            "Failed to read specversion from both headers and data. The body is"
+            f" not valid JSON: {decoded.json_error}"
+        )
+    if not isinstance(raw, dict):
+        raise cloud_exceptions.MissingRequiredFields(
+            "Failed to read specversion from both headers and data. Expected a"
+            f" JSON object, got {type(raw).__name__}"
+        )
+    specversion = raw.get("specversion")
+    if specversion is None:
+        raise cloud_exceptions.MissingRequiredFields(
+            "Failed to find specversion in HTTP request"
+        )
+    if not isinstance(specversion, str) or specversion not in _SPEC_VERSIONS:
+        raise cloud_exceptions.InvalidRequiredFields(
+            f"Found invalid specversion {specversion}"
+        )
+    missing = _REQUIRED_ATTRIBUTES - raw.keys()
+    if missing:
+        raise cloud_exceptions.MissingRequiredFields(
+            f"Missing required attributes: {missing}"
+        )
+
+    attributes = {
+        name: value
+        for name, value in raw.items()
+        if name not in ("data", "data_base64")
+        and (value is not None or name not in _CONTEXT_ATTRIBUTES)
+    }
+    if "data_base64" in raw:
+        try:
+            data = _json_or_bytes(base64.b64decode(raw["data_base64"]))
+        except (binascii.Error, TypeError, ValueError) as e:
+            raise cloud_exceptions.DataUnmarshallerError(
+                f"Failed to unmarshall data with error: {type(e).__name__}('{e}')"
+            )
+    else:
+        data = raw.get("data")
+    if data == "" or data == b"":
+        data = None
+    return CloudEvent(attributes, data)
@@ -0,0 +1,184 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-flight request tracking and draining on SIGTERM.
+
+Setting GRACEFUL_TIMEOUT_SECONDS makes both the WSGI and the ASGI app count
+the requests they are handling. When a worker receives SIGTERM, it starts
+draining: the server stops accepting connections, requests that are already
+running finish, and any request that still starts on an open connection gets a
+fast 503. Shutdown then waits up to that grace period for in-flight requests
+before running shutdown hooks and flushing log buffers.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger(__name__)
+
+_RETRY_AFTER_SECONDS = "1"
+_UNAVAILABLE_BODY = b"Service Unavailable: instance is shutting down"
+
+
+def _enable_drain():
+    return bool(os.environ.get("GRACEFUL_TIMEOUT_SECONDS"))
+
+
+def grace_period():
+    return float(os.environ["GRACEFUL_TIMEOUT_SECONDS"])
+
+
+class InFlightTracker:
+    """Counts the requests in flight in this process."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.draining = False
+        self.rejected = 0
+        self._idle = threading.Condition()
+
+    def enter(self):
+        with self._idle:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._idle:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._idle.notify_all()
+
+    def reject(self):
+        with self._idle:
+            self.rejected += 1
+
+    def begin_drain(self):
+        self.draining = True
+
+    def wait_idle(self, timeout):
+        """Wait until no request is in flight; return False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.in_flight, timeout)
+
+
+tracker = InFlightTracker()
+
+
+def install_signal_handler():
+    """Start draining on SIGTERM, then defer to the server's own handler.
+
+    Only servers that handle SIGTERM themselves (gunicorn and uvicorn workers)
+    shut down gracefully, so nothing is installed over the default handler.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous) or getattr(previous, "_ff_drain", False):
+        return
+
+    def handler(signum, frame):
+        tracker.begin_drain()
+        previous(signum, frame)
+
+    handler._ff_drain = True
+    signal.signal(signal.SIGTERM, handler)
+
+
+def drain(timeout):
+    """Stop taking requests and wait up to `timeout` seconds for in-flight ones."""
+    tracker.begin_drain()
+    start = time.monotonic()
+    if not tracker.wait_idle(timeout):
+        logger.warning(
+            "Grace period of %ss elapsed with %d requests still in flight",
+            timeout,
+            tracker.in_flight,
+        )
+    return time.monotonic() - start
+
+
+class WsgiMiddleware:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if tracker.draining:
+            tracker.reject()
+            start_response(
+                "503 Service Unavailable",
+                [
+                    ("Content-Type", "text/plain"),
+                    ("Retry-After", _RETRY_AFTER_SECONDS),
+                ],
+            )
+            return [_UNAVAILABLE_BODY]
+        tracker.enter()
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            tracker.exit()
+            raise
+        # The request is in flight until the server is done with the body
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(app_iter, file_wrapper):
+            # Keep the server's fast path for files, e.g. sendfile in gunicorn
+            return _close_with(app_iter, tracker.exit)
+        return ClosingIterator(app_iter, tracker.exit)
+
+
+def _close_with(app_iter, callback):
+    close = app_iter.close
+
+    def closing():
+        try:
+            close()
+        finally:
+            callback()
+
+    app_iter.close = closing
+    return app_iter
+
+
+class AsgiMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if tracker.draining:
+            tracker.reject()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"content-type", b"text/plain"),
+                        (b"retry-after", _RETRY_AFTER_SECONDS.encode()),
+                        (b"connection", b"close"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": _UNAVAILABLE_BODY})
+            return
+        tracker.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            tracker.exit()
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import ast
 import importlib.util
 import os
 import sys
@@ -44,6 +45,19 @@ INPUT_TYPE_MAP = {}
 # Functions decorated with @aio.http or @aio.cloud_event are added here.
 ASGI_FUNCTIONS = set()
 
+# BATCH_FUNCTIONS stores the names of cloudevent functions that receive a list
+# of events per call. Functions decorated with @cloud_event_batch are added here.
+BATCH_FUNCTIONS = set()
+
+# Decorators that add a function to ASGI_FUNCTIONS
+_ASGI_DECORATORS = frozenset(
+    (
+        "functions_framework.aio.http",
+        "functions_framework.aio.cloud_event",
+        "functions_framework.aio.cloud_event_batch",
+    )
+)
+
 
 def get_user_function(source, source_module, target):
     """Returns user function, raises exception for invalid function."""
@@ -90,6 +104,65 @@ def load_function_module(source):
     return source_module, spec
 
 
+def _dotted_name(node):
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def declares_asgi_function(source, target):
+    """Return whether the target is decorated with @aio.http or @aio.cloud_event.
+
+    This reads the source without executing it, so the app type can be chosen
+    before the module is loaded. Only decorators that literally refer to
+    functions_framework.aio are recognized; anything else is left to the
+    registry once the module has run.
+    """
+    try:
+        with open(source, "rb") as f:
+            tree = ast.parse(f.read(), filename=source)
+    except (OSError, SyntaxError, ValueError):
+        return False
+
+    # Only module-level functions can be targets; nested functions and methods
+    # with the same name are something else
+    functions = [
+        node
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and node.name == target
+    ]
+    # Names bound by imports, mapped to the dotted path they refer to
+    imports = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    imports[alias.asname] = alias.name
+                else:
+                    name = alias.name.split(".")[0]
+                    imports[name] = name
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+    for function in functions:
+        for decorator in function.decorator_list:
+            name = _dotted_name(decorator) or ""
+            head, _, rest = name.partition(".")
+            if head not in imports:
+                continue
+            resolved = f"{imports[head]}.{rest}" if rest else imports[head]
+            if resolved in _ASGI_DECORATORS:
+                return True
+    return False
+
+
 def get_function_source(source):
     """Get the configured function source."""
     source = source or os.environ.get("FUNCTION_SOURCE", DEFAULT_SOURCE)
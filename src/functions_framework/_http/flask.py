@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import werkzeug.serving
+
+from functions_framework import _lifecycle
+
 
 class FlaskApplication:
     def __init__(self, app, host, port, debug, **options):
@@ -22,4 +26,12 @@ class FlaskApplication:
         self.options = options
 
     def run(self):
-        self.app.run(self.host, self.port, debug=self.debug, **self.options)
+        # With the reloader, only the child process serves requests
+        serving = not self.debug or werkzeug.serving.is_running_from_reloader()
+        if serving:
+            _lifecycle.run_startup()
+        try:
+            self.app.run(self.host, self.port, debug=self.debug, **self.options)
+        finally:
+            if serving:
+                _lifecycle.run_shutdown()
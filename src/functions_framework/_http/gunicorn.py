@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
 import os
 
 import gunicorn.app.base
 
 from gunicorn.workers.gthread import ThreadWorker
 
+from .. import _lifecycle, _metrics, _shared_metrics
 from ..request_timeout import ThreadingTimeout
 
 # global for use in our custom gthread worker; the gunicorn arbiter spawns these
@@ -27,6 +29,100 @@ from ..request_timeout import ThreadingTimeout
 TIMEOUT_SECONDS = None
 
 
+def _freeze_gc(server, worker):
+    # Move everything allocated by the arbiter (the user module, the app) into
+    # the permanent generation, so the collector in the workers never touches
+    # those objects and their pages stay shared with the arbiter.
+    gc.freeze()
+
+
+def _set_gc_threshold(server, worker):
+    threshold = os.environ.get("GC_THRESHOLD")
+    if threshold:
+        gc.set_threshold(*(int(value) for value in threshold.split(",")))
+
+
+def _preload_options():
+    """Options to load the app in the arbiter and share it copy-on-write."""
+    if os.environ.get("PRELOAD_APP", "False").lower() != "true":
+        return {}
+    return {
+        "preload_app": True,
+        "pre_fork": _freeze_gc,
+        "post_fork": _set_gc_threshold,
+    }
+
+
+def _worker_started(worker):
+    _lifecycle.run_startup()
+
+
+def _worker_exiting(server, worker):
+    # The worker has already waited up to graceful_timeout for its requests
+    _lifecycle.run_shutdown(drain=False)
+
+
+def _lifecycle_options():
+    """Options to run the startup and shutdown hooks in each WSGI worker.
+
+    ASGI workers run them from the app's lifespan instead.
+    """
+    return {
+        "post_worker_init": _worker_started,
+        "worker_exit": _worker_exiting,
+    }
+
+
+def _graceful_options():
+    """How long workers may take to finish in-flight requests on SIGTERM."""
+    grace_period = os.environ.get("GRACEFUL_TIMEOUT_SECONDS")
+    if not grace_period:
+        return {}
+    return {"graceful_timeout": int(grace_period)}
+
+
+def _shared_metrics_options(workers):
+    """Options to sum up metrics across workers through shared memory."""
+    if workers < 2 or not _metrics._enable_metrics():
+        return {}
+    # Created in the arbiter, so that every worker inherits the mapping
+    store = _shared_metrics.SharedStore(workers)
+
+    def assign_slot(server, worker):
+        worker.metrics_slot = store.assign()
+
+    def attach_slot(server, worker):
+        store.attach(worker.metrics_slot, _metrics.registry)
+
+    def publish_last(server, worker):
+        store.detach()
+
+    def release_slot(server, worker):
+        store.release(worker.metrics_slot)
+
+    return {
+        "pre_fork": assign_slot,
+        "post_fork": attach_slot,
+        "worker_exit": publish_last,
+        "child_exit": release_slot,
+    }
+
+
+def _chain(*hooks):
+    # gunicorn checks the arity of hooks, and every chained one takes two
+    def chained(server, worker):
+        for hook in hooks:
+            hook(server, worker)
+
+    return chained
+
+
+def _add_hooks(options, hooks):
+    """Add server hooks to `options`, after any hook already set for them."""
+    for name, hook in hooks.items():
+        options[name] = _chain(options[name], hook) if name in options else hook
+
+
 class GunicornApplication(gunicorn.app.base.BaseApplication):
     def __init__(self, app, host, port, debug, **options):
         threads = int(os.environ.get("THREADS", (os.cpu_count() or 1) * 4))
@@ -53,6 +149,10 @@ class GunicornApplication(gunicorn.app.base.BaseApplication):
         else:
             self.options["timeout"] = TIMEOUT_SECONDS
 
+        self.options.update(_lifecycle_options())
+        self.options.update(_preload_options())
+        self.options.update(_graceful_options())
+        _add_hooks(self.options, _shared_metrics_options(self.options["workers"]))
         self.options.update(options)
         self.app = app
 
@@ -84,6 +184,9 @@ class UvicornApplication(gunicorn.app.base.BaseApplication):
             "loglevel": os.environ.get("GUNICORN_LOG_LEVEL", "error"),
             "limit_request_line": 0,
         }
+        self.options.update(_preload_options())
+        self.options.update(_graceful_options())
+        _add_hooks(self.options, _shared_metrics_options(self.options["workers"]))
         self.options.update(options)
         self.app = app
 
@@ -0,0 +1,109 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON codec used on the framework's request and logging hot paths.
+
+The codec is chosen once at import time by the FUNCTION_JSON_CODEC
+environment variable: "orjson", "ujson", "json" (the default), or "auto",
+which picks the fastest installed library and falls back to the standard
+library. The standard library stays the default because the fast codecs emit
+compact JSON, which would change log lines and typed function responses for
+anyone who happens to have one of them installed.
+"""
+
+import json
+import os
+
+from functions_framework.exceptions import InvalidConfigurationException
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # pragma: no cover
+    # Flask < 2.2 has no pluggable JSON provider
+    DefaultJSONProvider = None
+
+FUNCTION_JSON_CODEC = "FUNCTION_JSON_CODEC"
+
+DEFAULT_CODEC = "json"
+
+# Preference order for "auto"
+_CODECS = ("orjson", "ujson", "json")
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+
+    return dumps, orjson.loads, orjson.JSONDecodeError
+
+
+def _load_ujson():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, escape_forward_slashes=False)
+
+    return dumps, ujson.loads, ujson.JSONDecodeError
+
+
+def _load_json():
+    return json.dumps, json.loads, json.JSONDecodeError
+
+
+_LOADERS = {"orjson": _load_orjson, "ujson": _load_ujson, "json": _load_json}
+
+
+def select_codec(codec=None):
+    """Return (name, dumps, loads, JSONDecodeError) for the configured codec."""
+    codec = (codec or os.environ.get(FUNCTION_JSON_CODEC) or DEFAULT_CODEC).lower()
+    if codec == "auto":
+        for candidate in _CODECS:  # pragma: no branch
+            try:
+                return (candidate,) + _LOADERS[candidate]()
+            except ImportError:
+                continue
+    if codec not in _LOADERS:
+        raise InvalidConfigurationException(
+            f"Invalid {FUNCTION_JSON_CODEC} '{codec}', expected one of: "
+            f"auto, {', '.join(_CODECS)}"
+        )
+    try:
+        return (codec,) + _LOADERS[codec]()
+    except ImportError as e:
+        raise InvalidConfigurationException(
+            f"{FUNCTION_JSON_CODEC} is set to '{codec}' but it is not installed"
+        ) from e
+
+
+name, dumps, loads, JSONDecodeError = select_codec()
+
+
+if DefaultJSONProvider is not None:  # pragma: no branch
+
+    class FlaskJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider that decodes request bodies with the codec.
+
+        Encoding is left to Flask so that `jsonify` output in user code is
+        unchanged.
+        """
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return loads(s)
+
+else:  # pragma: no cover
+    FlaskJSONProvider = None
@@ -0,0 +1,111 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Startup and shutdown hooks, run once per worker by either server stack.
+
+Hooks are registered with @functions_framework.on_startup and
+@functions_framework.on_shutdown and may be sync or async. The ASGI app runs
+them from its lifespan; WSGI apps run them from gunicorn's worker hooks, or
+around the Flask development server. Startup hooks run in registration order
+before instance resources are warmed. A startup hook that raises fails the
+worker boot with its own exception, and one that times out fails it with
+StartupTimeoutException. Shutdown first waits for in-flight requests to drain
+when GRACEFUL_TIMEOUT_SECONDS is set, then runs shutdown hooks in reverse
+order, closes resources and flushes buffered logs; errors in shutdown hooks
+are only logged.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+
+from functions_framework import _drain, _resources, execution_id
+from functions_framework.exceptions import StartupTimeoutException
+
+logger = logging.getLogger(__name__)
+
+# (hook, timeout in seconds or None) pairs, in registration order
+_STARTUP_HOOKS = []
+_SHUTDOWN_HOOKS = []
+
+
+def _register(hooks, func, timeout):
+    def decorator(func):
+        hooks.append((func, timeout))
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def on_startup(func=None, *, timeout=None):
+    return _register(_STARTUP_HOOKS, func, timeout)
+
+
+def on_shutdown(func=None, *, timeout=None):
+    return _register(_SHUTDOWN_HOOKS, func, timeout)
+
+
+async def _run_hook(hook, timeout):
+    if inspect.iscoroutinefunction(hook):
+        call = hook()
+    elif timeout:
+        # Sync hooks can only be given up on if they don't block the loop
+        call = asyncio.get_running_loop().run_in_executor(None, hook)
+    else:
+        hook()
+        return
+    if not timeout:
+        await call
+        return
+    try:
+        await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        raise StartupTimeoutException(
+            f"Hook {hook.__name__} did not finish within {timeout} seconds"
+        ) from None
+
+
+async def startup():
+    if _drain._enable_drain():
+        _drain.install_signal_handler()
+    default_timeout = float(os.environ.get("STARTUP_TIMEOUT_SECONDS", 0)) or None
+    for hook, timeout in _STARTUP_HOOKS:
+        await _run_hook(hook, timeout or default_timeout)
+    _resources.warm_resources()
+
+
+async def shutdown(drain=True):
+    loop = asyncio.get_running_loop()
+    if drain and _drain._enable_drain():
+        await loop.run_in_executor(None, _drain.drain, _drain.grace_period())
+    for hook, timeout in reversed(_SHUTDOWN_HOOKS):
+        try:
+            await _run_hook(hook, timeout)
+        except Exception:
+            logger.exception("Shutdown hook %s failed", hook.__name__)
+    await loop.run_in_executor(None, _resources.close_resources)
+    execution_id.flush_logs()
+
+
+def run_startup():
+    """Run the startup hooks from a thread without an event loop."""
+    asyncio.run(startup())
+
+
+def run_shutdown(drain=True):
+    """Run the shutdown hooks from a thread without an event loop."""
+    asyncio.run(shutdown(drain))
@@ -0,0 +1,246 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory leak diagnostics with tracemalloc.
+
+Setting MEMORY_DIAGNOSTICS_ENABLED=true, together with a secret
+MEMORY_DIAGNOSTICS_TOKEN, mounts these routes under MEMORY_DIAGNOSTICS_PATH
+(default /_ff/memory). Each needs an `X-FF-Memory: <token>` header and
+returns JSON.
+
+- POST /start?frames=1 starts tracing allocations, keeping `frames` frames
+  of the traceback of each.
+- POST /snapshot takes a snapshot and returns its ID. Only the last
+  MAX_SNAPSHOTS are kept.
+- GET /diff?from=<id>&to=<id>&top=20 returns the `top` lines whose allocated
+  memory grew the most between two snapshots. `to` defaults to a new
+  snapshot.
+- GET /requests returns how much memory every MEMORY_SAMPLE_EVERY-th request
+  (default 100) allocated while tracing. Allocations by concurrent requests
+  are counted too.
+- POST /stop stops tracing and drops all snapshots and samples.
+
+Nothing is mounted when disabled, so it costs requests nothing.
+"""
+
+import collections
+import itertools
+import os
+import threading
+import tracemalloc
+
+from functions_framework.exceptions import InvalidConfigurationException
+
+MEMORY_HEADER = "X-FF-Memory"
+DEFAULT_DIAGNOSTICS_PATH = "/_ff/memory"
+DEFAULT_SAMPLE_EVERY = 100
+DEFAULT_TOP = 20
+MAX_SNAPSHOTS = 10
+MAX_SAMPLES = 1000
+
+# The HTTP method of each route
+ACTIONS = {
+    "start": "POST",
+    "snapshot": "POST",
+    "diff": "GET",
+    "requests": "GET",
+    "stop": "POST",
+}
+
+# Leave out allocations made by tracemalloc itself
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _enable_memory_diagnostics():
+    return os.environ.get("MEMORY_DIAGNOSTICS_ENABLED", "False").lower() == "true"
+
+
+def diagnostics_path():
+    return os.environ.get("MEMORY_DIAGNOSTICS_PATH", DEFAULT_DIAGNOSTICS_PATH)
+
+
+def diagnostics_token():
+    token = os.environ.get("MEMORY_DIAGNOSTICS_TOKEN")
+    if not token:
+        raise InvalidConfigurationException(
+            "MEMORY_DIAGNOSTICS_TOKEN must be set when MEMORY_DIAGNOSTICS_ENABLED "
+            "is true"
+        )
+    return token
+
+
+class _Error(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _positive_int(params, name, default=None):
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise _Error(400, f"{name} is required")
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise _Error(400, f"{name} must be an integer") from None
+    if value < 1:
+        raise _Error(400, f"{name} must be positive")
+    return value
+
+
+class Diagnostics:
+    """Snapshots and per-request samples of one app."""
+
+    def __init__(self, sample_every=None):
+        if sample_every is None:
+            sample_every = int(
+                os.environ.get("MEMORY_SAMPLE_EVERY", DEFAULT_SAMPLE_EVERY)
+            )
+        self.sample_every = sample_every
+        self.snapshots = collections.OrderedDict()
+        self.samples = collections.deque(maxlen=MAX_SAMPLES)
+        self._ids = itertools.count(1)
+        self._requests = itertools.count()
+        self._lock = threading.Lock()
+
+    def handle(self, action, params):
+        """Run a route, and return its status code and JSON body."""
+        try:
+            return 200, getattr(self, action)(params)
+        except _Error as e:
+            return e.status, {"error": str(e)}
+
+    def _state(self):
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": list(self.snapshots),
+        }
+
+    def _take_snapshot(self):
+        if not tracemalloc.is_tracing():
+            raise _Error(409, "Not tracing, POST to start first")
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def _snapshot(self, params, name):
+        snapshot_id = _positive_int(params, name)
+        try:
+            return self.snapshots[snapshot_id]
+        except KeyError:
+            raise _Error(404, f"No snapshot {snapshot_id}") from None
+
+    def start(self, params):
+        frames = _positive_int(params, "frames", 1)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self._state()
+
+    def snapshot(self, params):
+        snapshot = self._take_snapshot()
+        with self._lock:
+            snapshot_id = next(self._ids)
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > MAX_SNAPSHOTS:
+                self.snapshots.popitem(last=False)
+        return {"id": snapshot_id, **self._state()}
+
+    def diff(self, params):
+        top = _positive_int(params, "top", DEFAULT_TOP)
+        old = self._snapshot(params, "from")
+        if "to" in params:
+            new = self._snapshot(params, "to")
+        else:
+            new = self._take_snapshot()
+        stats = new.compare_to(old, "lineno")[:top]
+        return {
+            "stats": [
+                {
+                    "file": stat.traceback[0].filename,
+                    "line": stat.traceback[0].lineno,
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                }
+                for stat in stats
+            ]
+        }
+
+    def requests(self, params):
+        return {"sample_every": self.sample_every, "requests": list(self.samples)}
+
+    def stop(self, params):
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+        self.samples.clear()
+        return self._state()
+
+    def should_sample(self):
+        return (
+            next(self._requests) % self.sample_every == 0 and tracemalloc.is_tracing()
+        )
+
+    def record(self, path, before):
+        if not tracemalloc.is_tracing():
+            # Stopped while the request was in flight
+            return
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        self.samples.append({"path": path, "allocated_bytes": allocated})
+
+
+class WsgiMiddleware:
+    """Samples the memory allocated by every Nth request while tracing.
+
+    For streamed responses, only allocations until the function returns are
+    counted.
+    """
+
+    def __init__(self, wsgi_app, diagnostics):
+        self.wsgi_app = wsgi_app
+        self.diagnostics = diagnostics
+
+    def __call__(self, environ, start_response):
+        if not self.diagnostics.should_sample():
+            return self.wsgi_app(environ, start_response)
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            self.diagnostics.record(environ.get("PATH_INFO"), before)
+
+
+class AsgiMiddleware:
+    """Samples the memory allocated by every Nth request while tracing."""
+
+    def __init__(self, app, diagnostics):
+        self.app = app
+        self.diagnostics = diagnostics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.diagnostics.should_sample():
+            await self.app(scope, receive, send)
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.diagnostics.record(scope["path"], before)
@@ -0,0 +1,340 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prometheus metrics for the requests a worker serves.
+
+Setting METRICS_ENABLED=true serves request counts, latency histograms, the
+number of requests in flight, crashes, event conversion failures, requests
+shed by admission control, resource init times and the function thread pool's
+queue depth in the Prometheus text format at METRICS_PATH (default /metrics).
+
+Each thread counts into its own shard without taking a lock, and the shards
+are only summed up when the endpoint is scraped.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from functions_framework import _drain
+
+DEFAULT_METRICS_PATH = "/metrics"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+REQUESTS = "function_requests_total"
+LATENCY = "function_request_duration_seconds"
+CRASHES = "function_crashes_total"
+EVENT_CONVERSION_FAILURES = "function_event_conversion_failures_total"
+SHED = "function_requests_shed_total"
+RESOURCE_INIT = "function_resource_init_seconds"
+
+
+def _enable_metrics():
+    return os.environ.get("METRICS_ENABLED", "False").lower() == "true"
+
+
+def metrics_path():
+    return os.environ.get("METRICS_PATH", DEFAULT_METRICS_PATH)
+
+
+class _Shard:
+    """Counters and histograms written by a single thread.
+
+    Shards that sum up a whole worker also carry its gauge readings.
+    """
+
+    __slots__ = ("thread", "counters", "histograms", "gauges")
+
+    def __init__(self, thread=None):
+        self.thread = thread
+        # {(name, labels): value}
+        self.counters = {}
+        # {(name, labels): [count per bucket..., count above all buckets, sum]}
+        self.histograms = {}
+        # {name: value}
+        self.gauges = {}
+
+    def merge(self, other):
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in list(other.histograms.items()):
+            merged = self.histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(list(values)):
+                merged[i] += value
+        for name, value in other.gauges.items():
+            self.gauges[name] = self.gauges.get(name, 0) + value
+
+
+class Registry:
+    """Metric families and the per-thread shards holding their values."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        # Shards of threads that have exited, folded into one
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+        # {name: (type, help, labelnames)}
+        self._families = {}
+        # {name: (help, callable)}
+        self._gauges = {}
+        # Where workers of a multi-worker server share their metrics, if any
+        self.store = None
+
+    def counter(self, name, help, labelnames=()):
+        self._families[name] = ("counter", help, tuple(labelnames))
+
+    def histogram(self, name, help, labelnames=()):
+        self._families[name] = ("histogram", help, tuple(labelnames))
+
+    def gauge(self, name, help, read):
+        """Register a gauge whose value is read from `read()` on scrape."""
+        self._gauges[name] = (help, read)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = histograms.get(key)
+        if buckets is None:
+            buckets = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        buckets[-1] += value
+
+    def snapshot(self):
+        """Sum every shard into a single one."""
+        total = _Shard()
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                else:
+                    self._retired.merge(shard)
+            self._shards = live
+            total.merge(self._retired)
+        for shard in live:
+            total.merge(shard)
+        return total
+
+    def collect(self):
+        """Sum every shard and read every gauge of this process."""
+        snapshot = self.snapshot()
+        snapshot.gauges = {name: read() for name, (_, read) in self._gauges.items()}
+        return snapshot
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        snapshot = self.collect()
+        if self.store is not None:
+            snapshot = self.store.aggregate(snapshot)
+        by_family = {}
+        for (name, labels), value in snapshot.counters.items():
+            by_family.setdefault(name, []).append((labels, value))
+        for (name, labels), value in snapshot.histograms.items():
+            by_family.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help, labelnames) in self._families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(by_family.get(name, ())):
+                pairs = list(zip(labelnames, labels))
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                else:
+                    lines.extend(_histogram_lines(name, pairs, value))
+        for name, (help, _) in self._gauges.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(snapshot.gauges.get(name, 0))}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, pairs, buckets):
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+        cumulative += count
+        labels = _labels(pairs + [("le", str(bound))])
+        yield f"{name}_bucket{labels} {cumulative}"
+    yield f"{name}_sum{_labels(pairs)} {_number(buckets[-1])}"
+    yield f"{name}_count{_labels(pairs)} {cumulative}"
+
+
+def _default_registry():
+    registry = Registry()
+    registry.counter(
+        REQUESTS, "Requests handled by the function.", ("signature_type", "code")
+    )
+    registry.histogram(
+        LATENCY, "Time taken until the response starts.", ("signature_type",)
+    )
+    registry.counter(CRASHES, "Requests that failed with an unhandled exception.")
+    registry.counter(
+        EVENT_CONVERSION_FAILURES,
+        "Requests whose body could not be converted to the function's event.",
+    )
+    registry.counter(SHED, "Requests rejected because too many were in flight.")
+    registry.histogram(
+        RESOURCE_INIT, "Time taken to initialize each resource.", ("resource",)
+    )
+    registry.gauge(
+        "function_requests_in_flight",
+        "Requests currently being handled.",
+        lambda: requests_in_flight.in_flight,
+    )
+    registry.gauge(
+        "function_requests_rejected_total",
+        "Requests rejected because the worker was shutting down.",
+        lambda: _drain.tracker.rejected,
+    )
+    return registry
+
+
+# Requests the metrics middleware is handling, scrapes aside
+requests_in_flight = _drain.InFlightTracker()
+
+registry = _default_registry()
+
+
+def record_crash():
+    registry.inc(CRASHES)
+
+
+def record_event_conversion_failure():
+    registry.inc(EVENT_CONVERSION_FAILURES)
+
+
+def record_resource_init(name, seconds):
+    registry.observe(RESOURCE_INIT, seconds, (name,))
+
+
+def record_shed():
+    registry.inc(SHED)
+
+
+def _record_request(signature_type, code, start):
+    registry.inc(REQUESTS, (signature_type, code))
+    registry.observe(LATENCY, time.perf_counter() - start, (signature_type,))
+
+
+class WsgiMiddleware:
+    """Counts and times every request except scrapes of the metrics path.
+
+    Latency and requests in flight are measured until the function returns its
+    response, so they leave out the time spent sending a streamed body.
+    """
+
+    def __init__(self, wsgi_app, signature_type):
+        self.wsgi_app = wsgi_app
+        self.signature_type = signature_type
+        self.path = metrics_path()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") == self.path:
+            return self.wsgi_app(environ, start_response)
+        start = time.perf_counter()
+        code = "500"
+
+        def recording_start_response(status, headers, exc_info=None):
+            nonlocal code
+            code = status[:3]
+            return start_response(status, headers, exc_info)
+
+        requests_in_flight.enter()
+        try:
+            return self.wsgi_app(environ, recording_start_response)
+        finally:
+            requests_in_flight.exit()
+            _record_request(self.signature_type, code, start)
+
+
+class AsgiMiddleware:
+    """Counts and times every request except scrapes of the metrics path.
+
+    Like the WSGI middleware, latency is measured until the response starts.
+    """
+
+    def __init__(self, app, signature_type):
+        self.app = app
+        self.signature_type = signature_type
+        self.path = metrics_path()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == self.path:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+
+        async def recording_send(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start":
+                recorded = True
+                _record_request(self.signature_type, str(message["status"]), start)
+            await send(message)
+
+        requests_in_flight.enter()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            requests_in_flight.exit()
+            if not recorded:
+                _record_request(self.signature_type, "500", start)
@@ -0,0 +1,273 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-demand CPU profiling of a deployed function.
+
+Setting PROFILING_ENABLED=true, together with a secret PROFILING_TOKEN, allows
+two kinds of profiles, both requested with an `X-FF-Profile: <token>` header:
+
+- Any request to the function with the header runs the function under
+  cProfile, and logs its collapsed stacks to stderr as a JSON line once the
+  function returns. Only one request is profiled at a time.
+- A GET to PROFILING_PATH (default /_ff/profile) samples the stacks of every
+  thread for `?seconds=` (default 10, at most 60) and returns the number of
+  samples per stack.
+
+Both use the collapsed stack format read by flame graph tools. cProfile only
+sees the thread running the function; for async functions, that's the event
+loop, so coroutines of concurrent requests show up as well. Functions run in
+a FUNCTION_PROCESSES pool aren't profiled per request.
+
+Nothing is installed when profiling is disabled, so it costs requests nothing.
+"""
+
+import collections
+import contextlib
+import contextvars
+import cProfile
+import functools
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+
+from functions_framework import _json
+from functions_framework.exceptions import InvalidConfigurationException
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-FF-Profile"
+DEFAULT_PROFILING_PATH = "/_ff/profile"
+CONTENT_TYPE = "text/plain; charset=utf-8"
+
+DEFAULT_SAMPLE_SECONDS = 10.0
+MAX_SAMPLE_SECONDS = 60.0
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+# Call paths that took less than this many seconds are left out of profiles
+_MIN_SECONDS = 1e-6
+_MAX_DEPTH = 128
+
+# Path of the request to profile, set by the ASGI handler for the function
+_requested = contextvars.ContextVar("ff_profile_requested", default=None)
+_profile_lock = threading.Lock()
+
+
+def _enable_profiling():
+    return os.environ.get("PROFILING_ENABLED", "False").lower() == "true"
+
+
+def profiling_path():
+    return os.environ.get("PROFILING_PATH", DEFAULT_PROFILING_PATH)
+
+
+def profiling_token():
+    token = os.environ.get("PROFILING_TOKEN")
+    if not token:
+        raise InvalidConfigurationException(
+            "PROFILING_TOKEN must be set when PROFILING_ENABLED is true"
+        )
+    return token
+
+
+def authorized(value, token):
+    return value is not None and hmac.compare_digest(
+        value.encode("utf-8"), token.encode("utf-8")
+    )
+
+
+def sample_seconds(value):
+    """Parse the `seconds` query parameter of the sampling endpoint."""
+    seconds = DEFAULT_SAMPLE_SECONDS if value is None else float(value)
+    if not 0 < seconds <= MAX_SAMPLE_SECONDS:
+        raise ValueError(f"seconds must be in (0, {MAX_SAMPLE_SECONDS:g}]")
+    return seconds
+
+
+def _label(filename, lineno, name):
+    if filename == "~":
+        # Built-in functions
+        return name
+    return f"{name} ({filename}:{lineno})"
+
+
+def _collapsed(stacks, scale):
+    lines = []
+    for stack, value in sorted(stacks.items()):
+        value = round(value * scale)
+        if value:
+            lines.append(f"{';'.join(stack)} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def collapse_profile(profile):
+    """Return the time spent in each call path of `profile`, in microseconds.
+
+    cProfile only records callers, not whole stacks, so the time a function
+    spent is split between its callers in proportion to the time each of them
+    spent calling it.
+    """
+    profile.create_stats()
+    # {(filename, lineno, name): (primitive calls, calls, own time, total time,
+    #  {caller: (primitive calls, calls, own time, total time)})}
+    stats = profile.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    stacks = collections.Counter()
+
+    def walk(func, stack, share):
+        _, _, own_time, _, _ = stats[func]
+        stack = stack + (func,)
+        stacks[tuple(_label(*frame) for frame in stack)] += own_time * share
+        if len(stack) == _MAX_DEPTH:
+            return
+        for callee, time_in_callee in callees.get(func, ()):
+            total_time = stats[callee][3]
+            if callee in stack or time_in_callee * share < _MIN_SECONDS:
+                continue
+            walk(callee, stack, share * time_in_callee / total_time)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, (), 1.0)
+    return _collapsed(stacks, 1e6)
+
+
+@contextlib.contextmanager
+def profiling(path):
+    """Run the body under cProfile and log its profile, if no other is running."""
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("Not profiling %s, another request is being profiled", path)
+        yield
+        return
+    try:
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler, e.g. a debugger, is active
+            logger.warning("Not profiling %s: %s", path, e)
+            profile = None
+        if profile is None:
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            report = {
+                "profile": {
+                    "path": path,
+                    "seconds": time.perf_counter() - start,
+                    "collapsed": collapse_profile(profile),
+                }
+            }
+            sys.stderr.write(_json.dumps(report) + "\n")
+    finally:
+        _profile_lock.release()
+
+
+def _thread_stack(name, frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    stack.append(name)
+    return tuple(reversed(stack))
+
+
+def sample(seconds, interval=SAMPLE_INTERVAL_SECONDS):
+    """Sample the stacks of every other thread for `seconds`.
+
+    Returns the number of samples of each stack, rooted at the thread's name.
+    """
+    current = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while True:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != current:
+                stacks[_thread_stack(names.get(ident, str(ident)), frame)] += 1
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(interval)
+    return _collapsed(stacks, 1)
+
+
+def profile_view(view, request):
+    """Profile the Flask view of the function for requests with the header."""
+    token = profiling_token()
+
+    @functools.wraps(view)
+    def profiled_view(*args, **kwargs):
+        if not authorized(request.headers.get(PROFILE_HEADER), token):
+            return view(*args, **kwargs)
+        with profiling(request.path):
+            return view(*args, **kwargs)
+
+    return profiled_view
+
+
+def profile_handler(handler):
+    """Mark requests with the header for profiling by `profile_function`."""
+    token = profiling_token()
+
+    @functools.wraps(handler)
+    async def profiled_handler(request):
+        if not authorized(request.headers.get(PROFILE_HEADER), token):
+            return await handler(request)
+        reset = _requested.set(request.url.path)
+        try:
+            return await handler(request)
+        finally:
+            _requested.reset(reset)
+
+    return profiled_handler
+
+
+def profile_function(function, is_async):
+    """Profile calls to an ASGI function made for requests marked for it.
+
+    The profile is taken in the thread that runs the function, which for sync
+    functions is an executor thread rather than the event loop.
+    """
+    if is_async:
+
+        @functools.wraps(function)
+        async def async_wrapper(arg):
+            path = _requested.get()
+            if path is None:
+                return await function(arg)
+            with profiling(path):
+                return await function(arg)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(arg):
+        path = _requested.get()
+        if path is None:
+            return function(arg)
+        with profiling(path):
+            return function(arg)
+
+    return wrapper
@@ -0,0 +1,124 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Instance-scoped resources declared with @functions_framework.resource.
+
+A resource is a function that creates something expensive that should be
+shared by every request an instance serves, like a client or a connection
+pool. Calling the decorated function returns that object, creating it on
+first use in the current process. The framework also creates every declared
+resource when a worker boots, so that neither the cold start nor the first
+request pays for it, and closes them when the worker exits.
+
+If the function is a generator, the value it yields is the resource and the
+code after the yield runs when the resource is closed.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+from functions_framework import _metrics
+
+logger = logging.getLogger(__name__)
+
+# Declared resources, in declaration order
+_RESOURCES = []
+
+
+class Resource:
+    """A lazily initialized, per-process value shared by all requests."""
+
+    def __init__(self, factory):
+        functools.update_wrapper(self, factory)
+        self.factory = factory
+        self.init_seconds = None
+        self._value = None
+        self._teardown = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        # Objects created before a fork (e.g. in a preloading arbiter) are
+        # left to the parent; each worker gets its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():  # pragma: no branch
+                    self._initialize()
+        return self._value
+
+    def _initialize(self):
+        start = time.perf_counter()
+        if inspect.isgeneratorfunction(self.factory):
+            teardown = self.factory()
+            value = next(teardown)
+        else:
+            teardown = None
+            value = self.factory()
+        self._value, self._teardown = value, teardown
+        self._pid = os.getpid()
+        self.init_seconds = time.perf_counter() - start
+        logger.info(
+            "Initialized resource %s in %.3fms",
+            self.__name__,
+            self.init_seconds * 1000,
+        )
+        _metrics.record_resource_init(self.__name__, self.init_seconds)
+
+    @property
+    def initialized(self):
+        return self._pid == os.getpid()
+
+    def close(self):
+        """Tear down the resource if it was initialized in this process."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            teardown = self._teardown
+            self._value = self._teardown = self._pid = None
+        if teardown is not None:
+            next(teardown, None)
+
+
+def register(factory):
+    resource = Resource(factory)
+    _RESOURCES.append(resource)
+    return resource
+
+
+def warm_resources():
+    """Initialize every declared resource.
+
+    Init times are logged and recorded in the function_resource_init_seconds
+    metric. A resource that fails to initialize is logged and left to be
+    retried on first use, so that a flaky dependency doesn't keep the worker
+    from booting.
+    """
+    for resource in list(_RESOURCES):
+        try:
+            resource()
+        except Exception:
+            logger.exception("Failed to initialize resource %s", resource.__name__)
+
+
+def close_resources():
+    """Close every resource initialized in this process, newest first."""
+    for resource in reversed(_RESOURCES):
+        try:
+            resource.close()
+        except Exception:
+            logger.exception("Failed to close resource %s", resource.__name__)
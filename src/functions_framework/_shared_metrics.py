@@ -0,0 +1,230 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Metrics shared between the workers of a multi-worker gunicorn server.
+
+With more than one worker, each scrape of the metrics endpoint lands on a
+single worker. So that it still reports the whole instance, the arbiter maps
+a shared memory region before forking and gives every worker its own slot in
+it. Workers publish their metrics into their slot every
+METRICS_PUBLISH_INTERVAL_SECONDS (default 1) and on exit, and a scrape sums up
+the slots of all the other workers with the live metrics of its own.
+
+When a worker exits, the arbiter folds its last published counters into a
+slot that keeps the metrics of all exited workers, so that instance counters
+never go backwards, and frees its slot for the next worker.
+
+Each slot is a seqlock: the writer makes the sequence number odd while it
+updates the payload, and readers retry until they read the same even number
+before and after copying it. A slot that still can't be decoded is left out
+of the scrape.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from functions_framework import _json, _metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOT_SIZE = 64 * 1024
+DEFAULT_PUBLISH_INTERVAL_SECONDS = 1.0
+
+# pid, sequence number, payload length
+_HEADER = struct.Struct("<qQI")
+_PID = struct.Struct("<q")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 8
+_LENGTH = struct.Struct("<I")
+_LENGTH_OFFSET = 16
+_READ_ATTEMPTS = 100
+
+# Holds the metrics of every worker that has exited
+_RETIRED_SLOT = 0
+
+
+def _publish_interval():
+    return float(
+        os.environ.get(
+            "METRICS_PUBLISH_INTERVAL_SECONDS", DEFAULT_PUBLISH_INTERVAL_SECONDS
+        )
+    )
+
+
+def encode(snapshot):
+    return _json.dumps(
+        {
+            "counters": [
+                [name, list(labels), value]
+                for (name, labels), value in snapshot.counters.items()
+            ],
+            "histograms": [
+                [name, list(labels), values]
+                for (name, labels), values in snapshot.histograms.items()
+            ],
+            "gauges": snapshot.gauges,
+        }
+    ).encode("utf-8")
+
+
+def decode(payload):
+    data = _json.loads(payload)
+    snapshot = _metrics._Shard()
+    for name, labels, value in data["counters"]:
+        snapshot.counters[(name, tuple(labels))] = value
+    for name, labels, values in data["histograms"]:
+        snapshot.histograms[(name, tuple(labels))] = values
+    snapshot.gauges = data["gauges"]
+    return snapshot
+
+
+class SharedStore:
+    """Per-worker slots in an anonymous shared memory mapping.
+
+    The store must be created in the arbiter before it forks any worker, so
+    that every worker inherits the same mapping.
+    """
+
+    def __init__(self, workers, slot_size=DEFAULT_SLOT_SIZE):
+        # Old and new workers briefly overlap when the arbiter reloads, so
+        # there is room for twice as many workers, plus the retired slot.
+        self.slots = 2 * workers + 1
+        self.slot_size = slot_size
+        self._mmap = mmap.mmap(-1, self.slots * slot_size)
+        self._free = list(range(self.slots - 1, _RETIRED_SLOT, -1))
+        self.slot = None
+        self.registry = None
+        self._stop = threading.Event()
+        self._publisher = None
+        self._too_large = False
+
+    def _offset(self, slot):
+        return slot * self.slot_size
+
+    def _read(self, slot):
+        """Return the pid and payload in `slot`, or (pid, None) if it's empty."""
+        offset = self._offset(slot)
+        for _ in range(_READ_ATTEMPTS):
+            pid, sequence, length = _HEADER.unpack_from(self._mmap, offset)
+            if sequence % 2:
+                continue
+            start = offset + _HEADER.size
+            payload = self._mmap[start : start + length]
+            if _SEQUENCE.unpack_from(self._mmap, offset + _SEQUENCE_OFFSET)[0] == (
+                sequence
+            ):
+                return pid, payload or None
+        return pid, None
+
+    def _write(self, slot, pid, payload):
+        offset = self._offset(slot)
+        if _HEADER.size + len(payload) > self.slot_size:
+            if not self._too_large:
+                self._too_large = True
+                logger.warning(
+                    "Metrics of %d bytes don't fit in a %d byte slot, not sharing "
+                    "them with other workers",
+                    len(payload),
+                    self.slot_size,
+                )
+            return
+        (sequence,) = _SEQUENCE.unpack_from(self._mmap, offset + _SEQUENCE_OFFSET)
+        # Still odd if a writer was killed mid-write, which this write repairs
+        sequence |= 1
+        _SEQUENCE.pack_into(self._mmap, offset + _SEQUENCE_OFFSET, sequence)
+        _PID.pack_into(self._mmap, offset, pid)
+        _LENGTH.pack_into(self._mmap, offset + _LENGTH_OFFSET, len(payload))
+        start = offset + _HEADER.size
+        self._mmap[start : start + len(payload)] = payload
+        _SEQUENCE.pack_into(self._mmap, offset + _SEQUENCE_OFFSET, sequence + 1)
+
+    def _snapshot(self, slot):
+        for _ in range(_READ_ATTEMPTS):
+            _, payload = self._read(slot)
+            if not payload:
+                break
+            try:
+                return decode(payload)
+            except (UnicodeDecodeError, _json.JSONDecodeError):
+                continue
+        else:
+            logger.warning("Leaving out the unreadable metrics in slot %d", slot)
+        return _metrics._Shard()
+
+    # Arbiter side
+
+    def assign(self):
+        """Reserve a slot for a worker about to be forked."""
+        if not self._free:
+            return None
+        return self._free.pop()
+
+    def release(self, slot):
+        """Fold the last metrics of an exited worker into the retired slot."""
+        if slot is None:
+            return
+        retired = self._snapshot(_RETIRED_SLOT)
+        exited = self._snapshot(slot)
+        # Gauges describe live workers only
+        exited.gauges = {}
+        retired.merge(exited)
+        self._write(_RETIRED_SLOT, 0, encode(retired))
+        self._write(slot, 0, b"")
+        self._free.append(slot)
+
+    # Worker side
+
+    def attach(self, slot, registry):
+        """Publish `registry` into `slot` from now on."""
+        self.slot = slot
+        self.registry = registry
+        registry.store = self
+        if slot is None:
+            logger.warning("No free metrics slot, metrics are per worker")
+            return
+        self._publisher = threading.Thread(
+            target=self._publish_periodically,
+            name="ff-metrics-publisher",
+            daemon=True,
+        )
+        self._publisher.start()
+
+    def publish(self):
+        if self.slot is not None:
+            self._write(self.slot, os.getpid(), encode(self.registry.collect()))
+
+    def _publish_periodically(self):
+        interval = _publish_interval()
+        while not self._stop.wait(interval):
+            self.publish()
+
+    def detach(self):
+        """Stop publishing, after publishing the final metrics of the worker."""
+        self._stop.set()
+        # A slot must only have one writer at a time
+        if self._publisher is not None:
+            self._publisher.join()
+        self.publish()
+
+    def aggregate(self, snapshot):
+        """Sum `snapshot`, of this worker, with every other slot."""
+        total = _metrics._Shard()
+        total.merge(snapshot)
+        for slot in range(self.slots):
+            if slot != self.slot:
+                total.merge(self._snapshot(slot))
+        return total
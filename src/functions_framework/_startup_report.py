@@ -0,0 +1,161 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cold-start timing report.
+
+Setting STARTUP_REPORT=true logs a JSON report of how long each phase of
+building the app took, and which modules imported by the user's source were
+the slowest, to stderr at boot. STARTUP_REPORT_FILE additionally writes the
+report to the given path.
+"""
+
+import contextlib
+import importlib.abc
+import os
+import sys
+import threading
+import time
+
+from functions_framework import _json
+
+_SLOWEST_IMPORTS = 10
+
+
+def _enable_startup_report():
+    return os.environ.get("STARTUP_REPORT", "False").lower() == "true" or bool(
+        os.environ.get("STARTUP_REPORT_FILE")
+    )
+
+
+class _TimedLoader:
+    """Wraps a module loader to time the execution of the module."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Put the real loader back so that nothing after the import sees the
+        # wrapper.
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:  # pragma: no branch
+            module.__spec__.loader = self.loader
+        self.timer.start(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.stop()
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Records cumulative and self time of every module imported while active."""
+
+    def __init__(self):
+        self.timings = {}
+        self._local = threading.local()
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def start(self, name):
+        stack = self._local.__dict__.setdefault("stack", [])
+        # [name, start time, time spent importing children]
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self):
+        stack = self._local.stack
+        name, start, children = stack.pop()
+        cumulative = time.perf_counter() - start
+        if stack:
+            stack[-1][2] += cumulative
+        self.timings[name] = (cumulative, cumulative - children)
+
+
+class StartupReport:
+    """Collects phase and import timings while the app is being built."""
+
+    def __init__(self, target=None, source=None):
+        self.enabled = _enable_startup_report()
+        self.target = target
+        self.source = source
+        self.phases = {}
+        self._import_timer = None
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A phase run more than once counts all of its runs
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def trace_imports(self):
+        if not self.enabled:
+            yield
+            return
+        self._import_timer = _ImportTimer()
+        sys.meta_path.insert(0, self._import_timer)
+        try:
+            yield
+        finally:
+            sys.meta_path.remove(self._import_timer)
+
+    def to_dict(self):
+        timings = self._import_timer.timings if self._import_timer else {}
+        slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            "target": self.target,
+            "source": self.source,
+            "total_seconds": time.perf_counter() - self._start,
+            "phases": self.phases,
+            "imported_modules": len(timings),
+            "slowest_imports": [
+                {
+                    "module": name,
+                    "cumulative_seconds": cumulative,
+                    "self_seconds": self_time,
+                }
+                for name, (cumulative, self_time) in slowest[:_SLOWEST_IMPORTS]
+            ],
+        }
+
+    def emit(self):
+        """Write the report to stderr and STARTUP_REPORT_FILE, if enabled."""
+        if not self.enabled:
+            return
+        report = _json.dumps(self.to_dict())
+        sys.stderr.write(report + "\n")
+        path = os.environ.get("STARTUP_REPORT_FILE")
+        if path:
+            with open(path, "w") as f:
+                f.write(report)
@@ -13,17 +13,20 @@
 # limitations under the License.
 
 import asyncio
+import contextlib
 import contextvars
 import functools
 import inspect
 import logging
 import logging.config
 import os
+import threading
+import time
 import traceback
 
-from typing import Any, Awaitable, Callable, Dict, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
-from cloudevents.http import from_http
 from cloudevents.http.event import CloudEvent
 from starlette.applications import Starlette
 from starlette.exceptions import HTTPException
@@ -33,13 +36,31 @@ from starlette.responses import JSONResponse, Response
 from starlette.routing import Route
 
 from functions_framework import (
+    _admission,
+    _body,
+    _cloudevent_batch,
+    _compression,
+    _decoding,
+    _drain,
     _enable_execution_id_logging,
     _function_registry,
+    _json,
+    _lifecycle,
+    _memory,
+    _metrics,
+    _profiling,
+    _startup_report,
     execution_id,
 )
+from functions_framework.aio import _batching
+from functions_framework.aio._batching import BatchStats, batched
+from functions_framework.aio._forms import BodyLimitMiddleware, parse_form
+from functions_framework.aio._process_pool import FunctionProcessPool
 from functions_framework.exceptions import (
+    EventConversionException,
     FunctionsFrameworkException,
     MissingSourceException,
+    RequestTimeoutException,
 )
 
 HTTPResponse = Union[
@@ -54,6 +75,10 @@ _FUNCTION_STATUS_HEADER_FIELD = "X-Google-Status"
 _CRASH = "crash"
 
 CloudEventFunction = Callable[[CloudEvent], Union[None, Awaitable[None]]]
+CloudEventBatchFunction = Callable[
+    [List[CloudEvent]],
+    Union[Optional[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+]
 HTTPFunction = Callable[[Request], Union[HTTPResponse, Awaitable[HTTPResponse]]]
 
 
@@ -78,6 +103,32 @@ def cloud_event(func: CloudEventFunction) -> CloudEventFunction:
     return wrapper
 
 
+def cloud_event_batch(func: CloudEventBatchFunction) -> CloudEventBatchFunction:
+    """Decorator that registers a cloudevent function that handles batches.
+
+    The function receives the list of events of each request and may return a
+    mapping of the IDs of the events it failed to process to their errors.
+    """
+    _function_registry.REGISTRY_MAP[func.__name__] = (
+        _function_registry.CLOUDEVENT_SIGNATURE_TYPE
+    )
+    _function_registry.ASGI_FUNCTIONS.add(func.__name__)
+    _function_registry.BATCH_FUNCTIONS.add(func.__name__)
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
 def http(func: HTTPFunction) -> HTTPFunction:
     """Decorator that registers http as user function signature type."""
     _function_registry.REGISTRY_MAP[func.__name__] = (
@@ -100,25 +151,104 @@ def http(func: HTTPFunction) -> HTTPFunction:
     return wrapper
 
 
-def _http_func_wrapper(function, is_async, enable_id_logging=False):
+class _CodecJSONResponse(JSONResponse):
+    """JSONResponse that renders dict results with the framework JSON codec."""
+
+    def render(self, content):
+        return _json.dumps(content).encode("utf-8")
+
+
+# Starlette already renders compact JSON with the standard library
+_JSONResponse = JSONResponse if _json.name == "json" else _CodecJSONResponse
+
+
+class FunctionExecutor(ThreadPoolExecutor):
+    """Thread pool that runs sync user functions served by the ASGI app.
+
+    The pool is owned by the framework rather than shared with asyncio's
+    default executor, and is sized by the THREADS environment variable, the
+    same setting used for the gunicorn gthread worker.
+    """
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get("THREADS", (os.cpu_count() or 1) * 4))
+        super().__init__(max_workers=max_workers, thread_name_prefix="ff-function")
+        self._active_workers = 0
+        self._active_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(self._run, fn, *args, **kwargs)
+
+    def _run(self, fn, *args, **kwargs):
+        with self._active_lock:
+            self._active_workers += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._active_lock:
+                self._active_workers -= 1
+
+    @property
+    def active_workers(self):
+        """Number of threads currently running a user function."""
+        return self._active_workers
+
+    @property
+    def queue_depth(self):
+        """Number of calls waiting for a free thread."""
+        return self._work_queue.qsize()
+
+
+async def _call_user_function(function, is_async, arg, timeout=None, executor=None):
+    """Invoke the user function, cancelling it once `timeout` seconds pass.
+
+    Only the awaiting request is cancelled, so other in-flight requests on the
+    event loop are unaffected. Sync functions keep running on their executor
+    thread after the deadline, but the request is answered immediately.
+    """
+    if is_async:
+        call = function(arg)
+    elif isinstance(executor, FunctionProcessPool):
+        call = executor.call(arg)
+    else:
+        # TODO: Use asyncio.to_thread when we drop Python 3.8 support
+        loop = asyncio.get_event_loop()
+        ctx = contextvars.copy_context()
+        call = loop.run_in_executor(executor, ctx.run, function, arg)
+
+    return await _with_timeout(call, timeout)
+
+
+async def _with_timeout(call, timeout):
+    if not timeout:
+        return await call
+
+    try:
+        return await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        raise RequestTimeoutException(
+            f"Request handling exceeded {timeout} seconds timeout"
+        ) from None
+
+
+def _http_func_wrapper(
+    function, is_async, enable_id_logging=False, timeout=None, executor=None
+):
     @execution_id.set_execution_context_async(enable_id_logging)
     @functools.wraps(function)
     async def handler(request):
-        if is_async:
-            result = await function(request)
-        else:
-            # TODO: Use asyncio.to_thread when we drop Python 3.8 support
-            loop = asyncio.get_event_loop()
-            ctx = contextvars.copy_context()
-            result = await loop.run_in_executor(None, ctx.run, function, request)
+        result = await _call_user_function(
+            function, is_async, request, timeout, executor
+        )
         if isinstance(result, str):
             return Response(result)
         elif isinstance(result, dict):
-            return JSONResponse(result)
+            return _JSONResponse(result)
         elif isinstance(result, tuple) and len(result) == 2:
             content, status_code = result
             if isinstance(content, dict):
-                return JSONResponse(content, status_code=status_code)
+                return _JSONResponse(content, status_code=status_code)
             else:
                 return Response(content, status_code=status_code)
         elif result is None:
@@ -129,34 +259,200 @@ def _http_func_wrapper(function, is_async, enable_id_logging=False):
     return handler
 
 
-def _cloudevent_func_wrapper(function, is_async, enable_id_logging=False):
+def _cloudevent_func_wrapper(
+    function, is_async, enable_id_logging=False, timeout=None, executor=None
+):
+    batch_handler = function.__name__ in _function_registry.BATCH_FUNCTIONS
+
+    async def run_events(batch):
+        for event, result in batch.events:
+            try:
+                await _call_user_function(function, is_async, event, executor=executor)
+            except Exception as e:
+                _cloudevent_batch.log_exception(event, e)
+                batch.failed(result, e)
+            else:
+                batch.succeeded(result)
+
+    async def run_batch(batch):
+        if batch_handler:
+            events = [event for event, _ in batch.events]
+            batch.record_handler_failures(
+                await _call_user_function(function, is_async, events, timeout, executor)
+            )
+        else:
+            # One deadline for the whole batch, rather than one per event
+            await _with_timeout(run_events(batch), timeout)
+        body, status = batch.response()
+        return Response(body, status, media_type="application/json")
+
     @execution_id.set_execution_context_async(enable_id_logging)
     @functools.wraps(function)
     async def handler(request):
         data = await request.body()
 
+        if _cloudevent_batch.is_batch(request.headers):
+            try:
+                batch = _cloudevent_batch.Batch.from_body(data)
+            except EventConversionException as e:
+                _metrics.record_event_conversion_failure()
+                raise HTTPException(400, detail=f"Bad Request: {e}")
+            return await run_batch(batch)
+
         try:
-            event = from_http(request.headers, data)
+            event = _decoding.to_cloud_event(
+                _decoding.DecodedRequest(request.headers, data, request.url.path)
+            )
         except Exception as e:
+            _metrics.record_event_conversion_failure()
             raise HTTPException(
                 400, detail=f"Bad Request: Got CloudEvent exception: {repr(e)}"
             )
-        if is_async:
-            await function(event)
-        else:
-            # TODO: Use asyncio.to_thread when we drop Python 3.8 support
-            loop = asyncio.get_event_loop()
-            ctx = contextvars.copy_context()
-            await loop.run_in_executor(None, ctx.run, function, event)
+        if batch_handler:
+            return await run_batch(_cloudevent_batch.Batch.from_event(event))
+        await _call_user_function(function, is_async, event, timeout, executor)
         return Response("OK")
 
     return handler
 
 
+def _limit_handler(handler, limiter):
+    @functools.wraps(handler)
+    async def limited_handler(request):
+        if not await limiter.acquire():
+            _metrics.record_shed()
+            return Response(
+                _admission.REJECTED_BODY,
+                status_code=503,
+                headers={"Retry-After": _admission.RETRY_AFTER_SECONDS},
+                media_type="text/plain",
+            )
+        start = time.perf_counter()
+        try:
+            return await handler(request)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    return limited_handler
+
+
+def _guard_handler(handler, enable_profiling, limiter):
+    """Add opt-in profiling and admission control to the function's handler."""
+    if enable_profiling:
+        handler = _profiling.profile_handler(handler)
+    if limiter is not None:
+        handler = _limit_handler(handler, limiter)
+    return handler
+
+
+def _lifespan(executor):
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await _lifecycle.startup()
+        yield
+        if executor:
+            # Let in-flight sync calls finish without blocking the event loop.
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, executor.shutdown)
+        await _lifecycle.shutdown()
+
+    return lifespan
+
+
 async def _handle_not_found(request: Request):
     raise HTTPException(status_code=404, detail="Not Found")
 
 
+async def _handle_metrics(request: Request):
+    return Response(_metrics.registry.render(), media_type=_metrics.CONTENT_TYPE)
+
+
+def _configure_metrics(routes, middleware, signature_type, executor, function):
+    # Ahead of the function's catch-all routes and of the other middleware
+    routes.insert(
+        0, Route(_metrics.metrics_path(), endpoint=_handle_metrics, methods=["GET"])
+    )
+    middleware.insert(
+        0, Middleware(_metrics.AsgiMiddleware, signature_type=signature_type)
+    )
+    if isinstance(executor, FunctionExecutor):
+        _metrics.registry.gauge(
+            "function_executor_queue_depth",
+            "Calls to the function waiting for a free thread.",
+            lambda: executor.queue_depth,
+        )
+        _metrics.registry.gauge(
+            "function_executor_active_threads",
+            "Threads currently running the function.",
+            lambda: executor.active_workers,
+        )
+    stats = getattr(function, "stats", None)
+    if isinstance(stats, BatchStats):
+        _metrics.registry.gauge(
+            "function_batches_total",
+            "Batches the batched function was called with.",
+            lambda: stats.batches,
+        )
+        _metrics.registry.gauge(
+            "function_batched_requests_total",
+            "Requests handled in batches.",
+            lambda: stats.requests,
+        )
+        _metrics.registry.gauge(
+            "function_batch_queue_seconds_total",
+            "Time requests spent waiting for their batch to start.",
+            lambda: stats.queue_seconds,
+        )
+        _metrics.registry.gauge(
+            "function_batch_queue_seconds_max",
+            "Longest time a request waited for its batch to start.",
+            lambda: stats.max_queue_seconds,
+        )
+
+
+def _configure_profiling(routes):
+    token = _profiling.profiling_token()
+
+    async def sample(request: Request):
+        if not _profiling.authorized(
+            request.headers.get(_profiling.PROFILE_HEADER), token
+        ):
+            raise HTTPException(status_code=403, detail="Forbidden")
+        try:
+            seconds = _profiling.sample_seconds(request.query_params.get("seconds"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Sample from another thread, so that the event loop keeps serving
+        loop = asyncio.get_event_loop()
+        stacks = await loop.run_in_executor(None, _profiling.sample, seconds)
+        return Response(stacks, media_type=_profiling.CONTENT_TYPE)
+
+    routes.insert(
+        0, Route(_profiling.profiling_path(), endpoint=sample, methods=["GET"])
+    )
+
+
+def _configure_memory_diagnostics(routes, middleware):
+    token = _memory.diagnostics_token()
+    diagnostics = _memory.Diagnostics()
+    path = _memory.diagnostics_path()
+
+    async def memory(request: Request):
+        if not _profiling.authorized(request.headers.get(_memory.MEMORY_HEADER), token):
+            raise HTTPException(status_code=403, detail="Forbidden")
+        action = request.url.path.rsplit("/", 1)[1]
+        # Snapshots can take a while, so take them off the event loop
+        loop = asyncio.get_event_loop()
+        status, body = await loop.run_in_executor(
+            None, diagnostics.handle, action, dict(request.query_params)
+        )
+        return _JSONResponse(body, status_code=status)
+
+    for action, method in _memory.ACTIONS.items():
+        routes.insert(0, Route(f"{path}/{action}", endpoint=memory, methods=[method]))
+    middleware.insert(0, Middleware(_memory.AsgiMiddleware, diagnostics=diagnostics))
+
+
 def _configure_app_execution_id_logging():
     logging.config.dictConfig(
         {
@@ -184,6 +480,7 @@ class ExceptionHandlerMiddleware:
         try:
             await self.app(scope, receive, send)
         except Exception as exc:
+            _metrics.record_crash()
             logger = logging.getLogger()
             tb_lines = traceback.format_exception(type(exc), exc, exc.__traceback__)
             tb_text = "".join(tb_lines)
@@ -235,7 +532,9 @@ def create_asgi_app_from_module(target, source, signature_type, source_module, s
     function = _function_registry.get_user_function(source, source_module, target)
     signature_type = _function_registry.get_func_signature_type(target, signature_type)
 
-    return _create_asgi_app_with_function(function, signature_type, enable_id_logging)
+    return _create_asgi_app_with_function(
+        function, signature_type, enable_id_logging, source, target
+    )
 
 
 def create_asgi_app(target=None, source=None, signature_type=None):
@@ -250,33 +549,62 @@ def create_asgi_app(target=None, source=None, signature_type=None):
     Returns:
         A Starlette ASGI application instance
     """
-    target = _function_registry.get_function_target(target)
-    source = _function_registry.get_function_source(source)
+    report = _startup_report.StartupReport()
+    with report.phase("resolve_source"):
+        target = _function_registry.get_function_target(target)
+        source = _function_registry.get_function_source(source)
+    report.target, report.source = target, source
 
     if not os.path.exists(source):
         raise MissingSourceException(
             f"File {source} that is expected to define function doesn't exist"
         )
 
-    source_module, spec = _function_registry.load_function_module(source)
+    with report.phase("load_function_module"):
+        source_module, spec = _function_registry.load_function_module(source)
 
     enable_id_logging = _enable_execution_id_logging()
     if enable_id_logging:
         _configure_app_execution_id_logging()
 
-    spec.loader.exec_module(source_module)
+    with report.phase("exec_module"), report.trace_imports():
+        spec.loader.exec_module(source_module)
     function = _function_registry.get_user_function(source, source_module, target)
     signature_type = _function_registry.get_func_signature_type(target, signature_type)
 
-    return _create_asgi_app_with_function(function, signature_type, enable_id_logging)
+    with report.phase("create_asgi_app"):
+        app = _create_asgi_app_with_function(
+            function, signature_type, enable_id_logging, source, target
+        )
+    report.emit()
+    return app
 
 
-def _create_asgi_app_with_function(function, signature_type, enable_id_logging):
+def _create_asgi_app_with_function(
+    function, signature_type, enable_id_logging, source=None, target=None
+):
     """Create an ASGI app with the given function and signature type."""
     is_async = inspect.iscoroutinefunction(function)
+    timeout = int(os.environ.get("CLOUD_RUN_TIMEOUT_SECONDS", 0))
+    processes = int(os.environ.get("FUNCTION_PROCESSES", 0))
+    if is_async:
+        executor = FunctionExecutor() if _batching.runs_on_executor(function) else None
+    elif processes > 0:
+        # Opt-in for CPU-bound sync functions that would otherwise serialize on
+        # the GIL.
+        executor = FunctionProcessPool(source, target, processes, enable_id_logging)
+    else:
+        executor = FunctionExecutor()
+    enable_profiling = _profiling._enable_profiling()
+    if enable_profiling:
+        function = _profiling.profile_function(function, is_async)
+    limiter = _admission.async_limiter()
     routes = []
     if signature_type == _function_registry.HTTP_SIGNATURE_TYPE:
-        http_handler = _http_func_wrapper(function, is_async, enable_id_logging)
+        http_handler = _http_func_wrapper(
+            function, is_async, enable_id_logging, timeout, executor
+        )
+        http_handler = _guard_handler(http_handler, enable_profiling, limiter)
         routes.append(
             Route(
                 "/",
@@ -297,7 +625,10 @@ def _create_asgi_app_with_function(function, signature_type, enable_id_logging):
         )
     elif signature_type == _function_registry.CLOUDEVENT_SIGNATURE_TYPE:
         cloudevent_handler = _cloudevent_func_wrapper(
-            function, is_async, enable_id_logging
+            function, is_async, enable_id_logging, timeout, executor
+        )
+        cloudevent_handler = _guard_handler(
+            cloudevent_handler, enable_profiling, limiter
         )
         routes.append(
             Route("/{path:path}", endpoint=cloudevent_handler, methods=["POST"])
@@ -317,13 +648,35 @@ def _create_asgi_app_with_function(function, signature_type, enable_id_logging):
             f"Unsupported signature type for ASGI server: {signature_type}"
         )
 
+    middleware = [
+        Middleware(ExceptionHandlerMiddleware),
+        Middleware(execution_id.AsgiMiddleware),
+    ]
+    if _drain._enable_drain():
+        middleware.insert(0, Middleware(_drain.AsgiMiddleware))
+    max_body_bytes = _body.max_body_bytes()
+    if max_body_bytes:
+        middleware.append(Middleware(BodyLimitMiddleware, max_bytes=max_body_bytes))
+    if _compression._enable_compression():
+        middleware.append(
+            Middleware(
+                _compression.AsgiMiddleware,
+                compression=_compression.Compression.from_env(),
+            )
+        )
+    if _metrics._enable_metrics():
+        _configure_metrics(routes, middleware, signature_type, executor, function)
+    if enable_profiling:
+        _configure_profiling(routes)
+    if _memory._enable_memory_diagnostics():
+        _configure_memory_diagnostics(routes, middleware)
+
     app = Starlette(
         routes=routes,
-        middleware=[
-            Middleware(ExceptionHandlerMiddleware),
-            Middleware(execution_id.AsgiMiddleware),
-        ],
+        middleware=middleware,
+        lifespan=_lifespan(executor),
     )
+    app.state.executor = executor
 
     return app
 
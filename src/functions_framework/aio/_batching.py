@@ -0,0 +1,177 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import functools
+import inspect
+import logging
+
+from functions_framework.exceptions import FunctionsFrameworkException
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_SECONDS = 0.005
+
+
+class BatchStats:
+    """Batch sizes and queueing latency of a batched function."""
+
+    def __init__(self):
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = collections.Counter()
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+    @property
+    def mean_batch_size(self):
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def mean_queue_seconds(self):
+        return self.queue_seconds / self.requests if self.requests else 0.0
+
+    def record(self, waits):
+        self.batches += 1
+        self.requests += len(waits)
+        self.batch_sizes[len(waits)] += 1
+        self.queue_seconds += sum(waits)
+        self.max_queue_seconds = max(self.max_queue_seconds, *waits)
+
+
+def _executor(arg):
+    """The function executor of the app serving `arg`, if it is a request."""
+    app = getattr(arg, "scope", {}).get("app")
+    return getattr(getattr(app, "state", None), "executor", None)
+
+
+def runs_on_executor(function):
+    """Whether `function` is a batched sync function.
+
+    Those are called through an async wrapper, but still run on the app's
+    function executor.
+    """
+    batcher = getattr(function, "_batcher", None)
+    return batcher is not None and not inspect.iscoroutinefunction(batcher.function)
+
+
+class _Batcher:
+    """Collects concurrent calls and runs them through the function at once.
+
+    A batch is started as soon as max_batch_size calls are waiting, or
+    max_wait_seconds after the first of them arrived, whichever comes first.
+    """
+
+    def __init__(self, function, max_batch_size, max_wait_seconds):
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = BatchStats()
+        self._pending = []
+        self._timer = None
+        # Running batches, so that their tasks aren't garbage collected
+        self._tasks = set()
+
+    async def submit(self, arg):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((arg, future, loop.time()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        waits = [now - enqueued for _, _, enqueued in batch]
+        self.stats.record(waits)
+        logger.debug(
+            "Running batch of %d requests, queued for up to %.3fms",
+            len(batch),
+            max(waits) * 1000,
+        )
+        args = [arg for arg, _, _ in batch]
+        try:
+            if inspect.iscoroutinefunction(self.function):
+                results = await self.function(args)
+            else:
+                results = await loop.run_in_executor(
+                    _executor(args[0]), self.function, args
+                )
+            if len(results) != len(args):
+                raise FunctionsFrameworkException(
+                    f"Batched function {self.function.__name__} returned "
+                    f"{len(results)} results for {len(args)} requests"
+                )
+        except Exception as e:
+            results = [e] * len(args)
+        for (_, future, _), result in zip(batch, results):
+            # The request may have timed out while the batch was running
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def batched(
+    func=None,
+    *,
+    max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+    max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS,
+):
+    """Decorator that coalesces concurrent calls into one call with a list.
+
+    The decorated function receives a list of requests and must return a list
+    of results in the same order; a result that is an exception is raised for
+    its request only. Use it below @aio.http:
+
+        @functions_framework.aio.http
+        @functions_framework.aio.batched(max_batch_size=64, max_wait_seconds=0.01)
+        async def predict(requests):
+            ...
+
+    Sync functions run on the app's function executor. The batch sizes and
+    queueing latency achieved are available as `stats` on the decorated
+    function, and are exported as metrics when METRICS_ENABLED is set.
+    """
+
+    def decorator(func):
+        batcher = _Batcher(func, max_batch_size, max_wait_seconds)
+
+        @functools.wraps(func)
+        async def wrapper(arg):
+            return await batcher.submit(arg)
+
+        wrapper.stats = batcher.stats
+        wrapper._batcher = batcher
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
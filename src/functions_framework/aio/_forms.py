@@ -0,0 +1,169 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Request body limits and streaming form parsing for the ASGI app."""
+
+import urllib.parse
+
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from werkzeug.datastructures import FileStorage, MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import MultiPartParser
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import (
+    Data,
+    Epilogue,
+    Field,
+    File,
+    MultipartDecoder,
+    NeedData,
+)
+
+from functions_framework import _body
+
+
+class BodyLimitMiddleware:
+    """Rejects request bodies larger than the limit.
+
+    Bodies that declare a larger Content-Length are rejected before the
+    function runs. Chunked bodies are rejected once the function reads past
+    the limit, which only turns into a 413 if the response hasn't started.
+    """
+
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"content-length" and _body.declared_too_large(
+                value, self.max_bytes
+            ):
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 413,
+                        "headers": [
+                            (b"content-type", b"text/plain"),
+                            (b"connection", b"close"),
+                        ],
+                    }
+                )
+                await send({"type": "http.response.body", "body": _body.TOO_LARGE_BODY})
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(413, detail="Request Entity Too Large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# Picks the charset of a part, or of a body, from its headers
+_charset = MultiPartParser().get_part_charset
+
+
+async def _parse_multipart(request, boundary):
+    decoder = MultipartDecoder(
+        boundary.encode("latin-1"), max_form_memory_size=_body.MAX_FORM_MEMORY_BYTES
+    )
+    fields = []
+    files = []
+
+    async def chunks():
+        async for chunk in request.stream():
+            if chunk:
+                yield chunk
+        # Signals the end of the body
+        yield None
+
+    async for chunk in chunks():
+        decoder.receive_data(chunk)
+        event = decoder.next_event()
+        while not isinstance(event, (Epilogue, NeedData)):
+            if isinstance(event, Field):
+                part = event
+                field_size = 0
+                container = []
+                write = container.append
+            elif isinstance(event, File):
+                part = event
+                field_size = None
+                container = _body.spooled_file()
+                write = container.write
+            elif isinstance(event, Data):
+                if field_size is not None:
+                    field_size += len(event.data)
+                    if field_size > _body.MAX_FORM_MEMORY_BYTES:
+                        raise RequestEntityTooLarge()
+                write(event.data)
+                if not event.more_data:
+                    if isinstance(part, Field):
+                        value = b"".join(container).decode(
+                            _charset(part.headers), "replace"
+                        )
+                        fields.append((part.name, value))
+                    else:
+                        container.seek(0)
+                        files.append(
+                            (
+                                part.name,
+                                FileStorage(
+                                    container,
+                                    part.filename,
+                                    part.name,
+                                    headers=part.headers,
+                                ),
+                            )
+                        )
+            event = decoder.next_event()
+    return MultiDict(fields), MultiDict(files)
+
+
+async def parse_form(request: Request):
+    """Parse a form body as it streams in, without buffering uploaded files.
+
+    Unlike Starlette's `request.form()`, this needs no extra dependency.
+    Files are spooled to a temporary file once they grow past
+    REQUEST_SPOOL_BYTES.
+
+    Returns:
+        The `(form, files)` MultiDicts that Flask's `request.form` and
+        `request.files` hold. Both are empty if the body isn't a form.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    try:
+        if content_type == "multipart/form-data" and "boundary" in options:
+            return await _parse_multipart(request, options["boundary"])
+    except (RequestEntityTooLarge, ValueError) as e:
+        status = 413 if isinstance(e, RequestEntityTooLarge) else 400
+        raise HTTPException(status, detail=f"Invalid form body: {e}") from None
+    if content_type == "application/x-www-form-urlencoded":
+        body = (await request.body()).decode(_charset(request.headers), "replace")
+        return (
+            MultiDict(urllib.parse.parse_qsl(body, keep_blank_values=True)),
+            MultiDict(),
+        )
+    return MultiDict(), MultiDict()
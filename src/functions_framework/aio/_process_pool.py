@@ -0,0 +1,116 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.requests import Request
+
+from functions_framework import _function_registry, execution_id
+
+logger = logging.getLogger(__name__)
+
+# Scope keys needed to rebuild a Request in the pool process. Everything else
+# in the scope (app, router, state, ...) is either unpicklable or meaningless
+# outside the server process.
+_REQUEST_SCOPE_KEYS = (
+    "type",
+    "asgi",
+    "http_version",
+    "method",
+    "scheme",
+    "server",
+    "client",
+    "root_path",
+    "path",
+    "raw_path",
+    "query_string",
+    "headers",
+)
+
+# The user function, loaded once per pool process by _init_process.
+_function = None
+
+
+def _init_process(source, target, enable_id_logging=False):
+    global _function
+    if enable_id_logging:
+        # Each pool process runs one call at a time, so its streams can be
+        # wrapped for good rather than per call
+        sys.stdout = execution_id.LoggingHandlerAddExecutionId(sys.stdout)
+        sys.stderr = execution_id.LoggingHandlerAddExecutionId(sys.stderr)
+    source_module, spec = _function_registry.load_function_module(source)
+    spec.loader.exec_module(source_module)
+    _function = _function_registry.get_user_function(source, source_module, target)
+
+
+def _invoke(arg, context=None):
+    start = time.perf_counter()
+    if isinstance(arg, _RequestView):
+        arg = Request(arg.scope)
+    token = execution_id.execution_context_var.set(context)
+    try:
+        result = _function(arg)
+    finally:
+        execution_id.execution_context_var.reset(token)
+    return result, time.perf_counter() - start
+
+
+class _RequestView:
+    """The picklable part of an HTTP request sent to a pool process."""
+
+    __slots__ = ("scope",)
+
+    def __init__(self, request):
+        self.scope = {
+            key: request.scope[key]
+            for key in _REQUEST_SCOPE_KEYS
+            if key in request.scope
+        }
+
+
+class FunctionProcessPool(ProcessPoolExecutor):
+    """Process pool that runs a CPU-bound sync user function.
+
+    Each pool process loads the user's source file once at startup. Calls
+    send only a minimal request view (or the CloudEvent) and the execution
+    context to the pool, and the time spent outside the user function is
+    recorded as IPC overhead.
+    """
+
+    def __init__(self, source, target, max_workers, enable_id_logging=False):
+        super().__init__(
+            max_workers=max_workers,
+            initializer=_init_process,
+            initargs=(source, target, enable_id_logging),
+        )
+        self.calls = 0
+        self.ipc_overhead_seconds = 0.0
+
+    async def call(self, arg):
+        if isinstance(arg, Request):
+            arg = _RequestView(arg)
+        loop = asyncio.get_event_loop()
+        start = time.perf_counter()
+        context = execution_id.execution_context_var.get()
+        result, elapsed = await loop.run_in_executor(self, _invoke, arg, context)
+        overhead = time.perf_counter() - start - elapsed
+        self.calls += 1
+        self.ipc_overhead_seconds += overhead
+        logger.debug("Process pool call IPC overhead: %.3fms", overhead * 1000)
+        return result
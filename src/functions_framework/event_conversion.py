@@ -17,8 +17,9 @@ from datetime import datetime
 from typing import Any, Optional, Tuple
 
 from cloudevents.exceptions import MissingRequiredFields
-from cloudevents.http import CloudEvent, from_http, is_binary
+from cloudevents.http import CloudEvent, is_binary
 
+from functions_framework import _decoding
 from functions_framework.background_event import BackgroundEvent
 from functions_framework.exceptions import EventConversionException
 from google.cloud.functions.context import Context
@@ -210,7 +211,7 @@ def _split_ce_source(source) -> Tuple[str, str]:
 def cloud_event_to_background_event(request) -> Tuple[Any, Context]:
     """Converts a background event represented by the given HTTP request into a CloudEvent."""
     try:
-        event = from_http(request.headers, request.get_data())
+        event = _decoding.to_cloud_event(request)
         data = event.data
         service, name = _split_ce_source(event["source"])
 
@@ -39,3 +39,7 @@ class EventConversionException(FunctionsFrameworkException):
 
 class RequestTimeoutException(FunctionsFrameworkException):
     pass
+
+
+class StartupTimeoutException(FunctionsFrameworkException):
+    pass
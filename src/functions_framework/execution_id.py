@@ -12,29 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
 import contextlib
 import contextvars
 import functools
 import inspect
 import io
-import json
 import logging
-import random
+import os
+import queue
 import re
 import string
 import sys
+import threading
 
 import flask
 
 from werkzeug.local import LocalProxy
 
+from functions_framework import _json
+
 _EXECUTION_ID_LENGTH = 12
 _EXECUTION_ID_CHARSET = string.digits + string.ascii_letters
+# Random bytes are mapped onto the charset with a single bytes.translate call.
+# 248 is the largest multiple of len(_EXECUTION_ID_CHARSET) below 256; bytes
+# at or above it are dropped so that every character is equally likely.
+_EXECUTION_ID_TABLE = (_EXECUTION_ID_CHARSET * 5)[:256].encode("ascii")
+_EXECUTION_ID_REJECTED_BYTES = bytes(range(248, 256))
 _LOGGING_API_LABELS_FIELD = "logging.googleapis.com/labels"
 _LOGGING_API_SPAN_ID_FIELD = "logging.googleapis.com/spanId"
 _TRACE_CONTEXT_REGEX_PATTERN = re.compile(
     r"^(?P<trace_id>[\w\d]+)/(?P<span_id>\d+);o=(?P<options>[01])$"
 )
+# Defaults for the async log writer enabled by LOG_WRITER_ASYNC
+_LOG_BUFFER_SIZE = 10000
+_LOG_BATCH_SIZE = 256
+_TRUTHY_VALUES = ("y", "yes", "t", "true", "on", "1")
 EXECUTION_ID_REQUEST_HEADER = "Function-Execution-Id"
 TRACE_CONTEXT_REQUEST_HEADER = "X-Cloud-Trace-Context"
 
@@ -69,10 +82,12 @@ def _set_current_context(context):
 
 
 def _generate_execution_id():
-    return "".join(
-        _EXECUTION_ID_CHARSET[random.randrange(len(_EXECUTION_ID_CHARSET))]
-        for _ in range(_EXECUTION_ID_LENGTH)
-    )
+    execution_id = b""
+    while len(execution_id) < _EXECUTION_ID_LENGTH:
+        execution_id += os.urandom(16).translate(
+            _EXECUTION_ID_TABLE, _EXECUTION_ID_REJECTED_BYTES
+        )
+    return execution_id[:_EXECUTION_ID_LENGTH].decode("ascii")
 
 
 def _extract_context_from_headers(headers):
@@ -107,20 +122,18 @@ class AsgiMiddleware:
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http":  # pragma: no branch
             execution_id_header = b"function-execution-id"
-            execution_id = None
+            headers = scope.get("headers", [])
 
-            for name, value in scope.get("headers", []):
-                if name.lower() == execution_id_header:
-                    execution_id = value.decode("latin-1")
+            # ASGI servers always send lowercased header names.
+            for name, value in headers:
+                if name == execution_id_header and value:
                     break
-
-            if not execution_id:
-                execution_id = _generate_execution_id()
-                new_headers = list(scope.get("headers", []))
-                new_headers.append(
-                    (execution_id_header, execution_id.encode("latin-1"))
-                )
-                scope["headers"] = new_headers
+            else:
+                header = (execution_id_header, _generate_execution_id().encode())
+                if isinstance(headers, list):
+                    headers.append(header)
+                else:
+                    scope["headers"] = [*headers, header]
 
         await self.app(scope, receive, send)
 
@@ -220,6 +233,123 @@ def logging_stream():
     return LoggingHandlerAddExecutionId(stream=flask.logging.wsgi_errors_stream)
 
 
+def _format_log_entry(contents, context):
+    if context is None:
+        return contents + "\n"
+    try:
+        execution_id = context.execution_id
+        span_id = context.span_id
+        payload = _json.loads(contents)
+        if not isinstance(payload, dict):
+            payload = {"message": contents}
+    except _json.JSONDecodeError:
+        if len(contents) > 0 and contents[-1] == "\n":
+            contents = contents[:-1]
+        payload = {"message": contents}
+    if execution_id:
+        payload[_LOGGING_API_LABELS_FIELD] = payload.get(_LOGGING_API_LABELS_FIELD, {})
+        payload[_LOGGING_API_LABELS_FIELD]["execution_id"] = execution_id
+    if span_id:
+        payload[_LOGGING_API_SPAN_ID_FIELD] = span_id
+    return _json.dumps(payload) + "\n"
+
+
+class AsyncLogWriter:
+    """Formats and writes log entries in batches on a background thread.
+
+    Request threads only enqueue the raw entry and its execution context, so
+    they never wait on the underlying stream. When the buffer is full, entries
+    are either dropped (and counted) or the writer blocks until there is room.
+    """
+
+    def __init__(self, maxsize=_LOG_BUFFER_SIZE, drop_when_full=False):
+        self.drop_when_full = drop_when_full
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name="ff-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, stream, contents, context):
+        entry = (stream, contents, context)
+        if not self.drop_when_full:
+            self._queue.put(entry)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until every entry enqueued so far has been written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            streams = {}
+            for stream, contents, context in batch:
+                try:
+                    stream.write(_format_log_entry(contents, context))
+                    streams[id(stream)] = stream
+                except Exception:  # pragma: no cover
+                    # The request that logged this has moved on; there is no
+                    # caller left to report the error to.
+                    pass
+            for stream in streams.values():
+                try:
+                    stream.flush()
+                except Exception:  # pragma: no cover
+                    pass
+            for _ in batch:
+                self._queue.task_done()
+
+
+_log_writer = None
+_log_writer_pid = None
+_log_writer_lock = threading.Lock()
+
+
+def _enable_async_log_writer():
+    return os.environ.get("LOG_WRITER_ASYNC", "").lower() in _TRUTHY_VALUES
+
+
+def _get_log_writer():
+    """Return the async log writer of the current process."""
+    global _log_writer, _log_writer_pid
+    # Threads don't survive a fork, so each gunicorn worker gets its own writer.
+    pid = os.getpid()
+    if _log_writer_pid != pid:
+        with _log_writer_lock:
+            if _log_writer_pid != pid:  # pragma: no branch
+                _log_writer = AsyncLogWriter(
+                    maxsize=int(
+                        os.environ.get("LOG_WRITER_BUFFER_SIZE", _LOG_BUFFER_SIZE)
+                    ),
+                    drop_when_full=(
+                        os.environ.get("LOG_WRITER_FULL_POLICY", "block").lower()
+                        == "drop"
+                    ),
+                )
+                _log_writer_pid = pid
+    return _log_writer
+
+
+def flush_logs():
+    """Write out all buffered log entries of the current process."""
+    if _log_writer is not None and _log_writer_pid == os.getpid():
+        _log_writer.flush()
+
+
+atexit.register(flush_logs)
+
+
 class LoggingHandlerAddExecutionId(io.TextIOWrapper):
     def __new__(cls, stream=sys.stdout):
         if isinstance(stream, LoggingHandlerAddExecutionId):
@@ -230,32 +360,14 @@ class LoggingHandlerAddExecutionId(io.TextIOWrapper):
     def __init__(self, stream=sys.stdout):
         io.TextIOWrapper.__init__(self, io.StringIO())
         self.stream = stream
+        self.async_writer_enabled = _enable_async_log_writer()
 
     def write(self, contents):
         if contents == "\n":
             return
         current_context = _get_current_context()
-        if current_context is None:
-            self.stream.write(contents + "\n")
-            self.stream.flush()
+        if self.async_writer_enabled:
+            _get_log_writer().put(self.stream, contents, current_context)
             return
-        try:
-            execution_id = current_context.execution_id
-            span_id = current_context.span_id
-            payload = json.loads(contents)
-            if not isinstance(payload, dict):
-                payload = {"message": contents}
-        except json.JSONDecodeError:
-            if len(contents) > 0 and contents[-1] == "\n":
-                contents = contents[:-1]
-            payload = {"message": contents}
-        if execution_id:
-            payload[_LOGGING_API_LABELS_FIELD] = payload.get(
-                _LOGGING_API_LABELS_FIELD, {}
-            )
-            payload[_LOGGING_API_LABELS_FIELD]["execution_id"] = execution_id
-        if span_id:
-            payload[_LOGGING_API_SPAN_ID_FIELD] = span_id
-        self.stream.write(json.dumps(payload))
-        self.stream.write("\n")
+        self.stream.write(_format_log_entry(contents, current_context))
         self.stream.flush()
@@ -1,25 +1,139 @@
 import ctypes
 import logging
+import math
+import os
 import threading
+import time
 
 from .exceptions import RequestTimeoutException
 
 logger = logging.getLogger(__name__)
 
+# Resolution of the timer wheel. Request timeouts are configured in whole
+# seconds, so firing up to one tick late is not observable.
+_TICK_SECONDS = 0.05
+_WHEEL_SLOTS = 512
 
-class ThreadingTimeout(object):  # pragma: no cover
+
+class _Timer(object):
+    __slots__ = ("deadline", "callback", "slot")
+
+    def __init__(self, deadline, callback, slot):
+        self.deadline = deadline
+        self.callback = callback
+        self.slot = slot
+
+
+class TimerWheel(object):
+    """A hashed timer wheel driven by a single daemon thread.
+
+    Timers are hashed into a fixed number of slots by their deadline tick, so
+    both scheduling and cancelling a timer are O(1). Timers further away than
+    one revolution of the wheel stay in their slot until their tick comes
+    around.
+    """
+
+    def __init__(self, tick=_TICK_SECONDS, slots=_WHEEL_SLOTS):
+        self.tick = tick
+        self._slots = [set() for _ in range(slots)]
+        self._cond = threading.Condition(threading.Lock())
+        self._epoch = time.monotonic()
+        self._last_tick = 0
+        self._pending = 0
+        self._thread = None
+
+    def _now_tick(self):
+        return int((time.monotonic() - self._epoch) / self.tick)
+
+    def schedule(self, seconds, callback):
+        """Call `callback` from the wheel thread after `seconds` have passed."""
+        with self._cond:
+            now = self._now_tick()
+            if not self._pending:
+                # The wheel was idle, so there is nothing to catch up on.
+                self._last_tick = now
+            deadline = now + max(1, math.ceil(seconds / self.tick))
+            slot = self._slots[deadline % len(self._slots)]
+            timer = _Timer(deadline, callback, slot)
+            slot.add(timer)
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ff-timer-wheel", daemon=True
+                )
+                self._thread.start()
+            elif self._pending == 1:
+                self._cond.notify()
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a timer returned by `schedule`; a no-op if it already fired."""
+        with self._cond:
+            if timer in timer.slot:
+                timer.slot.discard(timer)
+                self._pending -= 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                expired = self._collect_expired()
+            for timer in expired:
+                try:
+                    timer.callback()
+                except Exception:
+                    logger.exception("Error in request timeout callback")
+            time.sleep(self.tick)
+
+    def _collect_expired(self):
+        now = self._now_tick()
+        ticks = range(self._last_tick + 1, now + 1)
+        if len(ticks) > len(self._slots):
+            ticks = range(now - len(self._slots) + 1, now + 1)
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % len(self._slots)]
+            for timer in [t for t in slot if t.deadline <= now]:
+                slot.discard(timer)
+                expired.append(timer)
+        self._last_tick = now
+        self._pending -= len(expired)
+        return expired
+
+
+_wheel = None
+_wheel_pid = None
+_wheel_lock = threading.Lock()
+
+
+def get_timer_wheel():
+    """Return the timer wheel shared by all threads of the current process."""
+    global _wheel, _wheel_pid
+    # Threads don't survive a fork, so each gunicorn worker gets its own wheel.
+    pid = os.getpid()
+    if _wheel_pid != pid:
+        with _wheel_lock:
+            if _wheel_pid != pid:  # pragma: no branch
+                _wheel = TimerWheel()
+                _wheel_pid = pid
+    return _wheel
+
+
+class ThreadingTimeout(object):
     def __init__(self, seconds):
         self.seconds = seconds
         self.target_tid = threading.current_thread().ident
         self.timer = None
+        self.exited = False
 
     def __enter__(self):
-        self.timer = threading.Timer(self.seconds, self._raise_exc)
-        self.timer.start()
+        self.timer = get_timer_wheel().schedule(self.seconds, self._raise_exc)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.timer.cancel()
+        self.exited = True
+        get_timer_wheel().cancel(self.timer)
         if exc_type is RequestTimeoutException:
             logger.warning(
                 "Request handling exceeded {0} seconds timeout; terminating request handling...".format(
@@ -30,12 +144,15 @@ class ThreadingTimeout(object):  # pragma: no cover
         return False
 
     def _raise_exc(self):
+        if self.exited:  # pragma: no cover
+            # The request finished while the wheel was collecting this timer.
+            return
         ret = ctypes.pythonapi.PyThreadState_SetAsyncExc(
             ctypes.c_long(self.target_tid), ctypes.py_object(RequestTimeoutException)
         )
-        if ret == 0:
+        if ret == 0:  # pragma: no cover
             raise ValueError("Invalid thread ID {}".format(self.target_tid))
-        elif ret > 1:
+        elif ret > 1:  # pragma: no cover
             ctypes.pythonapi.PyThreadState_SetAsyncExc(
                 ctypes.c_long(self.target_tid), None
             )
@@ -0,0 +1,275 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import pathlib
+import threading
+import time
+
+import httpx
+import pytest
+
+from functions_framework import _admission, _metrics, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "admission" / "main.py"
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    registry = _metrics._default_registry()
+    monkeypatch.setattr(_metrics, "registry", registry)
+    return registry
+
+
+def _shed(registry):
+    return registry.snapshot().counters.get((_metrics.SHED, ()), 0)
+
+
+def test_disabled_by_default():
+    assert _admission.limiter() is None
+    assert _admission.async_limiter() is None
+
+
+def test_limiter_from_env(monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENCY", "4")
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "8")
+    monkeypatch.setenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "0.5")
+    monkeypatch.setenv("ADMISSION_TARGET_LATENCY_SECONDS", "0.2")
+
+    limiter = _admission.limiter()
+
+    assert isinstance(limiter, _admission.Limiter)
+    assert limiter.limit == 4
+    assert limiter.max_queue == 8
+    assert limiter.queue_timeout == 0.5
+    assert limiter.target == 0.2
+    assert isinstance(_admission.async_limiter(), _admission.AsyncLimiter)
+
+
+def test_limiter_sheds_without_queue():
+    limiter = _admission.Limiter(max_concurrency=2)
+
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+    limiter.release(0.1)
+
+    assert limiter.acquire()
+
+
+def test_limiter_queues_until_release():
+    limiter = _admission.Limiter(max_concurrency=1, max_queue=1, queue_timeout=5)
+    limiter.acquire()
+    threading.Timer(0.05, limiter.release, args=(0.1,)).start()
+
+    start = time.monotonic()
+    assert limiter.acquire()
+    assert time.monotonic() - start < 5
+    assert limiter.active == 1
+    assert limiter.queued == 0
+
+
+def test_limiter_queue_timeout():
+    limiter = _admission.Limiter(max_concurrency=1, max_queue=1, queue_timeout=0.01)
+    limiter.acquire()
+
+    assert not limiter.acquire()
+    assert limiter.active == 1
+    assert limiter.queued == 0
+
+
+def test_limit_adapts_to_latency():
+    limiter = _admission.Limiter(max_concurrency=10, target=0.1)
+    for _ in range(10):
+        limiter.acquire()
+
+    for _ in range(5):
+        limiter.release(1.0)
+
+    assert limiter.limit == 5  # 10 * 0.9 ** 5 = 5.9
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(0.01)
+
+    assert limiter.limit == 10
+
+
+def test_limit_never_drops_below_one():
+    limiter = _admission.Limiter(max_concurrency=2, target=0.1)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(1.0)
+
+    assert limiter.limit == 1
+
+
+def test_async_limiter():
+    async def run():
+        limiter = _admission.AsyncLimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=5
+        )
+        assert await limiter.acquire()
+        # The queue is full once one request waits
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert not await limiter.acquire()
+
+        limiter.release(0.1)
+
+        assert await waiting
+        assert limiter.active == 1
+        assert limiter.queued == 0
+
+    asyncio.run(run())
+
+
+def test_async_limiter_queue_timeout():
+    async def run():
+        limiter = _admission.AsyncLimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=0.01
+        )
+        await limiter.acquire()
+
+        assert not await limiter.acquire()
+        assert limiter.active == 1
+        assert limiter.queued == 0
+
+        # A release after the timeout doesn't admit the expired request
+        limiter.release(0.1)
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_async_limiter_cancelled_while_queued():
+    async def run():
+        limiter = _admission.AsyncLimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=5
+        )
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert limiter.queued == 0
+        limiter.release(0.1)
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_async_limiter_cancelled_once_admitted():
+    async def run():
+        limiter = _admission.AsyncLimiter(
+            max_concurrency=1, max_queue=2, queue_timeout=5
+        )
+        await limiter.acquire()
+        first = asyncio.ensure_future(limiter.acquire())
+        second = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # The slot goes to the first waiter, which is cancelled before it runs
+        limiter.release(0.1)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # ...so it's handed on to the second
+        assert await second
+        assert limiter.active == 1
+
+    asyncio.run(run())
+
+
+def test_async_limiter_skips_expired_waiters():
+    async def run():
+        limiter = _admission.AsyncLimiter(max_concurrency=1, max_queue=1)
+        await limiter.acquire()
+        # Expired, but its request hasn't resumed to leave the queue yet
+        waiter = asyncio.get_event_loop().create_future()
+        limiter._waiters.append(waiter)
+        limiter._expire(waiter)
+        limiter._expire(waiter)
+
+        limiter.release(0.1)
+
+        assert waiter.result() is False
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_wsgi_sheds_excess_requests(monkeypatch, registry):
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENCY", "1")
+    app = create_app("function", SOURCE)
+    responses = []
+    first = threading.Thread(
+        target=lambda: responses.append(app.test_client().get("/"))
+    )
+    first.start()
+    time.sleep(0.1)
+
+    response = app.test_client().get("/")
+    first.join()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert responses[0].text == "done"
+    assert _shed(registry) == 1
+
+
+def test_asgi_sheds_excess_requests(monkeypatch, registry):
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "1")
+    monkeypatch.setenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5")
+    app = create_asgi_app("async_function", SOURCE, "http")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                client.get("/"), client.get("/"), client.get("/")
+            )
+
+    responses = asyncio.run(run())
+
+    statuses = sorted(response.status_code for response in responses)
+    # One request runs, one waits for it, and the last one is shed
+    assert statuses == [200, 200, 503]
+    (shed,) = [r for r in responses if r.status_code == 503]
+    assert shed.headers["retry-after"] == "1"
+    assert _shed(registry) == 1
+
+
+def test_admission_skips_other_routes(monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    app = create_app("function", SOURCE)
+    first = threading.Thread(target=app.test_client().get, args=("/",))
+    first.start()
+    time.sleep(0.1)
+
+    response = app.test_client().get("/metrics")
+    first.join()
+
+    assert response.status_code == 200
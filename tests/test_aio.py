@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import json
+import os
 import pathlib
+import pickle
 import re
 import sys
 import tempfile
+import threading
+import time
 
 from unittest.mock import Mock, call
 
@@ -24,13 +30,21 @@ if sys.version_info >= (3, 8):
 
 import pytest
 
-from functions_framework import exceptions
+from cloudevents.http import CloudEvent
+from starlette.requests import Request
+from starlette.testclient import TestClient as StarletteTestClient
+
+from functions_framework import _function_registry, exceptions, execution_id
 from functions_framework.aio import (
+    FunctionExecutor,
     LazyASGIApp,
     _cloudevent_func_wrapper,
     _http_func_wrapper,
+    _process_pool,
+    batched,
     create_asgi_app,
 )
+from functions_framework.aio._process_pool import FunctionProcessPool
 
 TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
 
@@ -169,3 +183,383 @@ async def test_cloudevent_func_wrapper_sync_function():
     assert called_with_event is not None
     assert called_with_event["type"] == "test.event"
     assert called_with_event["source"] == "test-source"
+
+
+@pytest.mark.asyncio
+async def test_http_func_wrapper_timeout_only_cancels_slow_request():
+    async def http_func(request):
+        await asyncio.sleep(float(request.headers.get("sleep")))
+        return "done"
+
+    wrapper = _http_func_wrapper(http_func, is_async=True, timeout=0.1)
+
+    slow_request = Mock(headers={"sleep": "5"})
+    fast_request = Mock(headers={"sleep": "0"})
+    slow, fast = await asyncio.gather(
+        wrapper(slow_request), wrapper(fast_request), return_exceptions=True
+    )
+
+    assert isinstance(slow, exceptions.RequestTimeoutException)
+    assert "exceeded 0.1 seconds timeout" in str(slow)
+    assert fast.body == b"done"
+
+
+@pytest.mark.asyncio
+async def test_http_func_wrapper_timeout_sync_function():
+    def http_func(request):
+        time.sleep(0.5)
+        return "done"
+
+    wrapper = _http_func_wrapper(http_func, is_async=False, timeout=0.1)
+
+    with pytest.raises(exceptions.RequestTimeoutException):
+        await wrapper(Mock(headers={}))
+
+
+@pytest.mark.parametrize(
+    "target, signature_type",
+    [
+        ("function", "http"),
+        ("sync_function", "http"),
+        ("cloud_event_function", "cloudevent"),
+    ],
+)
+def test_asgi_request_timeout_returns_crash(monkeypatch, target, signature_type):
+    monkeypatch.setenv("CLOUD_RUN_TIMEOUT_SECONDS", "1")
+    source = TEST_FUNCTIONS_DIR / "timeout" / "async_main.py"
+    app = create_asgi_app(target, source, signature_type)
+    client = StarletteTestClient(app, raise_server_exceptions=False)
+
+    resp = client.post(
+        "/",
+        headers={
+            "ce-specversion": "1.0",
+            "ce-type": "com.example.test",
+            "ce-source": "test",
+            "ce-id": "1",
+        },
+    )
+
+    assert resp.status_code == 500
+    assert resp.headers["X-Google-Status"] == "crash"
+
+
+def test_asgi_request_within_timeout_succeeds(monkeypatch):
+    monkeypatch.setenv("CLOUD_RUN_TIMEOUT_SECONDS", "2")
+    source = TEST_FUNCTIONS_DIR / "timeout" / "async_main.py"
+    client = StarletteTestClient(create_asgi_app("function", source))
+
+    resp = client.get("/")
+
+    assert resp.status_code == 200
+    assert resp.text == "success"
+
+
+def test_function_executor_sized_from_threads_env(monkeypatch):
+    monkeypatch.setenv("THREADS", "3")
+
+    executor = FunctionExecutor()
+
+    assert executor._max_workers == 3
+    executor.shutdown()
+
+
+def test_function_executor_reports_load():
+    executor = FunctionExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait()
+        return "done"
+
+    first = executor.submit(blocking)
+    started.wait()
+    second = executor.submit(lambda: "queued")
+
+    assert executor.active_workers == 1
+    assert executor.queue_depth == 1
+
+    release.set()
+    assert first.result() == "done"
+    assert second.result() == "queued"
+    assert executor.active_workers == 0
+    assert executor.queue_depth == 0
+    executor.shutdown()
+
+
+def test_asgi_sync_function_uses_framework_executor(monkeypatch):
+    monkeypatch.setenv("THREADS", "2")
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "async_main.py"
+    app = create_asgi_app("function", source)
+
+    assert app.state.executor is None
+
+    source = TEST_FUNCTIONS_DIR / "timeout" / "async_main.py"
+    app = create_asgi_app("sync_function", source)
+    executor = app.state.executor
+
+    assert isinstance(executor, FunctionExecutor)
+    assert executor._max_workers == 2
+
+    with StarletteTestClient(app) as client:
+        assert client.get("/").text == "success"
+        assert executor._threads
+        assert all(t.name.startswith("ff-function") for t in executor._threads)
+
+    # Lifespan shutdown stops the pool
+    assert executor._shutdown
+
+
+def test_asgi_process_pool_http_function(monkeypatch):
+    monkeypatch.setenv("FUNCTION_PROCESSES", "1")
+    source = TEST_FUNCTIONS_DIR / "process_pool" / "main.py"
+    app = create_asgi_app("function", source)
+    pool = app.state.executor
+
+    assert isinstance(pool, FunctionProcessPool)
+
+    with StarletteTestClient(app) as client:
+        resp = client.post("/some/path?q=query", headers={"X-Test": "header"})
+
+    assert resp.status_code == 200
+    result = resp.json()
+    assert result.pop("pid") != os.getpid()
+    assert result == {
+        "method": "POST",
+        "path": "/some/path",
+        "query": "query",
+        "header": "header",
+    }
+    assert pool.calls == 1
+    assert pool.ipc_overhead_seconds > 0
+
+
+def test_asgi_process_pool_cloud_event_function(monkeypatch):
+    monkeypatch.setenv("FUNCTION_PROCESSES", "1")
+    source = TEST_FUNCTIONS_DIR / "process_pool" / "main.py"
+    app = create_asgi_app("cloud_event_function", source, "cloudevent")
+
+    with StarletteTestClient(app) as client:
+        resp = client.post(
+            "/",
+            headers={
+                "ce-specversion": "1.0",
+                "ce-type": "com.example.test",
+                "ce-source": "test",
+                "ce-id": "1",
+            },
+        )
+
+    assert resp.status_code == 200
+    assert resp.text == "OK"
+    assert app.state.executor.calls == 1
+
+
+def test_asgi_process_pool_passes_execution_id(monkeypatch):
+    monkeypatch.setenv("FUNCTION_PROCESSES", "1")
+    source = TEST_FUNCTIONS_DIR / "process_pool" / "main.py"
+    app = create_asgi_app("execution_id_function", source)
+
+    with StarletteTestClient(app) as client:
+        resp = client.get("/", headers={"Function-Execution-Id": "exec-id"})
+
+    assert resp.text == "exec-id"
+
+
+def test_process_pool_invoke_logs_with_execution_id(monkeypatch, capsys):
+    source = str(TEST_FUNCTIONS_DIR / "process_pool" / "main.py")
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(sys, "stderr", sys.stderr)
+    _process_pool._init_process(source, "execution_id_function", True)
+    view = _process_pool._RequestView(
+        Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    )
+
+    outer_context = execution_id.execution_context_var.get()
+
+    result, _ = _process_pool._invoke(view, execution_id.ExecutionContext("exec-id"))
+
+    assert result == "exec-id"
+    record = json.loads(capsys.readouterr().out)
+    assert record["message"] == "logged from a pool process"
+    assert record["logging.googleapis.com/labels"]["execution_id"] == "exec-id"
+    assert execution_id.execution_context_var.get() is outer_context
+
+
+def test_asgi_process_pool_not_used_for_async_functions(monkeypatch):
+    monkeypatch.setenv("FUNCTION_PROCESSES", "1")
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "async_main.py"
+    app = create_asgi_app("function", source)
+
+    assert app.state.executor is None
+
+
+def test_process_pool_invoke_rebuilds_request():
+    source = str(TEST_FUNCTIONS_DIR / "process_pool" / "main.py")
+    _process_pool._init_process(source, "function")
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/path",
+            "query_string": b"q=1",
+            "headers": [(b"x-test", b"value")],
+            "app": object(),
+        }
+    )
+
+    view = pickle.loads(pickle.dumps(_process_pool._RequestView(request)))
+    result, elapsed = _process_pool._invoke(view)
+
+    assert "app" not in view.scope
+    assert result["query"] == "1"
+    assert result["header"] == "value"
+    assert elapsed >= 0
+
+
+def test_process_pool_invoke_passes_cloud_event():
+    source = str(TEST_FUNCTIONS_DIR / "process_pool" / "main.py")
+    _process_pool._init_process(source, "cloud_event_function")
+    event = CloudEvent({"type": "com.example.test", "source": "test"})
+
+    result, _ = _process_pool._invoke(pickle.loads(pickle.dumps(event)))
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_asgi_batched_function_coalesces_concurrent_requests(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(_function_registry, "REGISTRY_MAP", {})
+    monkeypatch.setattr(_function_registry, "ASGI_FUNCTIONS", set())
+    source = TEST_FUNCTIONS_DIR / "batched" / "async_main.py"
+    app = create_asgi_app("function", source)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        responses = await asyncio.gather(
+            *(client.get("/", params={"name": str(i)}) for i in range(6))
+        )
+
+    assert [resp.status_code for resp in responses] == [200] * 6
+    assert [resp.text for resp in responses] == [
+        "0 of 4",
+        "1 of 4",
+        "2 of 4",
+        "3 of 4",
+        "4 of 2",
+        "5 of 2",
+    ]
+
+
+def test_asgi_batched_sync_function_runs_on_framework_executor(monkeypatch):
+    monkeypatch.setattr(_function_registry, "REGISTRY_MAP", {})
+    monkeypatch.setattr(_function_registry, "ASGI_FUNCTIONS", set())
+    source = TEST_FUNCTIONS_DIR / "batched" / "async_main.py"
+    app = create_asgi_app("sync_function", source)
+
+    assert isinstance(app.state.executor, FunctionExecutor)
+
+    with StarletteTestClient(app) as client:
+        assert client.get("/").text.startswith("ff-function")
+
+
+@pytest.mark.asyncio
+async def test_batched_collects_until_max_wait():
+    calls = []
+
+    @batched(max_batch_size=10, max_wait_seconds=0.01)
+    async def double(values):
+        calls.append(values)
+        return [value * 2 for value in values]
+
+    assert await asyncio.gather(double(1), double(2), double(3)) == [2, 4, 6]
+    assert calls == [[1, 2, 3]]
+    assert await double(4) == 8
+    assert calls == [[1, 2, 3], [4]]
+
+    stats = double.stats
+    assert stats.batches == 2
+    assert stats.requests == 4
+    assert stats.batch_sizes == {3: 1, 1: 1}
+    assert stats.mean_batch_size == 2
+    assert 0.01 <= stats.max_queue_seconds < 1
+    assert 0 < stats.mean_queue_seconds <= stats.max_queue_seconds
+
+
+def test_batched_stats_empty():
+    @batched
+    async def function(values):
+        return values
+
+    assert function.stats.mean_batch_size == 0
+    assert function.stats.mean_queue_seconds == 0
+
+
+@pytest.mark.asyncio
+async def test_batched_sync_function():
+    @batched(max_batch_size=1)
+    def double(values):
+        assert threading.current_thread() is not threading.main_thread()
+        return [value * 2 for value in values]
+
+    assert await asyncio.gather(double(1), double(2)) == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_batched_exception_result_fails_only_its_request():
+    @batched(max_batch_size=2)
+    async def function(values):
+        return [ValueError(value) if value < 0 else value for value in values]
+
+    ok, failed = await asyncio.gather(function(1), function(-1), return_exceptions=True)
+
+    assert ok == 1
+    assert isinstance(failed, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_batched_exception_fails_every_request():
+    @batched(max_batch_size=2)
+    async def function(values):
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(function(1), function(2), return_exceptions=True)
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+@pytest.mark.asyncio
+async def test_batched_wrong_number_of_results():
+    @batched(max_batch_size=2)
+    async def function(values):
+        return values[:1]
+
+    results = await asyncio.gather(function(1), function(2), return_exceptions=True)
+
+    for result in results:
+        assert isinstance(result, exceptions.FunctionsFrameworkException)
+        assert "returned 1 results for 2 requests" in str(result)
+
+
+@pytest.mark.asyncio
+async def test_batched_skips_timed_out_requests():
+    release = asyncio.Event()
+
+    @batched(max_batch_size=2)
+    async def function(values):
+        await release.wait()
+        return values
+
+    slow = asyncio.ensure_future(function(1))
+    other = asyncio.ensure_future(function(2))
+    await asyncio.sleep(0)
+    slow.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await other == 2
+    assert slow.cancelled()
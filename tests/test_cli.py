@@ -130,6 +130,30 @@ def test_cli(monkeypatch, args, env, create_app_calls, run_calls):
     assert wsgi_server.run.calls == run_calls
 
 
+@pytest.mark.parametrize(
+    "args, env", [(["--target", "foo", "--preload"], {}), ([], {"PRELOAD_APP": "1"})]
+)
+def test_cli_preload(monkeypatch, args, env):
+    monkeypatch.delenv("PRELOAD_APP", raising=False)
+    server_env = {}
+    wsgi_server = pretend.stub(run=pretend.call_recorder(lambda *a, **kw: None))
+
+    def create_server(*args, **kwargs):
+        server_env.update(os.environ)
+        return wsgi_server
+
+    monkeypatch.setattr(
+        functions_framework._cli, "create_app", lambda *a, **kw: pretend.stub()
+    )
+    monkeypatch.setattr(functions_framework._cli, "create_server", create_server)
+
+    runner = CliRunner(env={"FUNCTION_TARGET": "foo", **env})
+    result = runner.invoke(_cli, args)
+
+    assert result.exit_code == 0
+    assert server_env["PRELOAD_APP"] == "true"
+
+
 def test_asgi_cli(monkeypatch):
     asgi_server = pretend.stub(run=pretend.call_recorder(lambda *a, **kw: None))
     asgi_app = pretend.stub()
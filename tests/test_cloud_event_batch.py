@@ -0,0 +1,260 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import json
+import pathlib
+import sys
+
+import pretend
+import pytest
+
+from cloudevents import conversion as ce_conversion
+from cloudevents.http import CloudEvent
+from starlette.testclient import TestClient as StarletteTestClient
+
+import functions_framework._function_registry as registry
+
+from functions_framework import _cloudevent_batch, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+BATCH_HEADERS = {"Content-Type": "application/cloudevents-batch+json"}
+
+
+@pytest.fixture(autouse=True)
+def clean_registries():
+    """Clean up the registries that the test functions' decorators write to."""
+    original_registry_map = registry.REGISTRY_MAP.copy()
+    original_asgi = registry.ASGI_FUNCTIONS.copy()
+    original_batch = registry.BATCH_FUNCTIONS.copy()
+    yield
+    registry.REGISTRY_MAP.clear()
+    registry.REGISTRY_MAP.update(original_registry_map)
+    registry.ASGI_FUNCTIONS.clear()
+    registry.ASGI_FUNCTIONS.update(original_asgi)
+    registry.BATCH_FUNCTIONS.clear()
+    registry.BATCH_FUNCTIONS.update(original_batch)
+
+
+def _event(event_id, data=None):
+    attributes = {
+        "specversion": "1.0",
+        "id": event_id,
+        "source": "from-galaxy-far-far-away",
+        "type": "cloud_event.greet.you",
+    }
+    return json.loads(
+        ce_conversion.to_json(CloudEvent(attributes, data or {"name": event_id}))
+    )
+
+
+@pytest.fixture(params=["flask", "asgi"])
+def create_client(request, make_client):
+    asgi = request.param == "asgi"
+    module = "async_batch" if asgi else "batch"
+
+    def create(target):
+        source = TEST_FUNCTIONS_DIR / "cloud_events" / f"{module}.py"
+        client = make_client(target, source, "cloudevent", asgi=asgi)
+        return client, sys.modules[module].received
+
+    return create
+
+
+def test_batch_invokes_function_per_event(create_client):
+    client, received = create_client("function")
+
+    resp = client.post(
+        "/", headers=BATCH_HEADERS, data=json.dumps([_event("1"), _event("2")])
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["Content-Type"] == "application/json"
+    assert json.loads(resp.text) == {
+        "results": [{"id": "1", "status": "OK"}, {"id": "2", "status": "OK"}]
+    }
+    assert [event["id"] for event in received] == ["1", "2"]
+    assert received[0].data == {"name": "1"}
+
+
+def test_batch_reports_failed_events(create_client, monkeypatch):
+    logger = pretend.stub(error=pretend.call_recorder(lambda msg: None))
+    monkeypatch.setattr(_cloudevent_batch, "logger", logger)
+    client, received = create_client("function")
+    missing_specversion = _event("3")
+    del missing_specversion["specversion"]
+
+    resp = client.post(
+        "/",
+        headers={"Content-Type": "application/cloudevents-batch+json; charset=utf-8"},
+        data=json.dumps(
+            [_event("1"), _event("2", {"fail": True}), missing_specversion, "4"]
+        ),
+    )
+
+    assert resp.status_code == 207
+    assert json.loads(resp.text) == {
+        "results": [
+            {"id": "1", "status": "OK"},
+            {"id": "2", "status": "error", "error": "ValueError('failed 2')"},
+            {
+                "id": "3",
+                "status": "error",
+                "error": "MissingRequiredFields('Failed to find specversion in CloudEvent')",
+            },
+            {
+                "id": None,
+                "status": "error",
+                "error": "InvalidStructuredJSON('Expected a CloudEvent object, got str')",
+            },
+        ]
+    }
+    assert [event["id"] for event in received] == ["1"]
+    (call,) = logger.error.calls
+    assert call.args[0].startswith("Exception on CloudEvent 2\nTraceback")
+    assert call.args[0].endswith("ValueError: failed 2")
+
+
+def test_batch_handler_receives_whole_batch(create_client):
+    client, received = create_client("batch_function")
+
+    resp = client.post(
+        "/",
+        headers=BATCH_HEADERS,
+        data=json.dumps([_event("1"), _event("2", {"fail": True}), _event("3")]),
+    )
+
+    assert resp.status_code == 207
+    assert json.loads(resp.text) == {
+        "results": [
+            {"id": "1", "status": "OK"},
+            {"id": "2", "status": "error", "error": "asked to fail"},
+            {"id": "3", "status": "OK"},
+        ]
+    }
+    ((first, second, third),) = received
+    assert [first["id"], second["id"], third["id"]] == ["1", "2", "3"]
+
+
+def test_batch_handler_invalid_return_value(create_client):
+    client, _ = create_client("invalid_batch_function")
+
+    resp = client.post("/", headers=BATCH_HEADERS, data=json.dumps([_event("1")]))
+
+    assert resp.status_code == 500
+
+
+def test_record_handler_failures_rejects_invalid_return_value():
+    batch = _cloudevent_batch.Batch([_event("1")])
+
+    with pytest.raises(TypeError, match="must return None or a dict"):
+        batch.record_handler_failures(["1"])
+
+
+def test_batch_timeout_is_not_an_event_failure():
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "batch.py"
+    client = create_app("function", source, "cloudevent").test_client()
+
+    resp = client.post(
+        "/",
+        headers=BATCH_HEADERS,
+        data=json.dumps([_event("1", {"timeout": True}), _event("2")]),
+    )
+
+    assert resp.status_code == 500
+    assert sys.modules["batch"].received == []
+
+
+def test_aio_batch_has_one_deadline(monkeypatch):
+    monkeypatch.setenv("CLOUD_RUN_TIMEOUT_SECONDS", "1")
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "async_batch.py"
+    client = StarletteTestClient(
+        create_asgi_app("function", source, "cloudevent"), raise_server_exceptions=False
+    )
+
+    # Each event is within the timeout, but the batch isn't
+    resp = client.post(
+        "/",
+        headers=BATCH_HEADERS,
+        data=json.dumps([_event("1", {"sleep": 0.6}), _event("2", {"sleep": 0.6})]),
+    )
+
+    assert resp.status_code == 500
+    assert [event["id"] for event in sys.modules["async_batch"].received] == ["1"]
+
+
+def test_batch_handler_receives_single_event(create_client):
+    client, received = create_client("batch_function")
+    headers, data = ce_conversion.to_structured(
+        CloudEvent(
+            {"id": "1", "source": "from-galaxy-far-far-away", "type": "greet"},
+            {"name": "john"},
+        )
+    )
+
+    resp = client.post("/", headers=headers, data=data)
+
+    assert resp.status_code == 200
+    assert json.loads(resp.text) == {"results": [{"id": "1", "status": "OK"}]}
+    ((event,),) = received
+    assert event.data == {"name": "john"}
+
+
+def test_batch_decodes_data_base64(create_client):
+    client, received = create_client("function")
+    event = _event("1")
+    del event["data"]
+    event["data_base64"] = base64.b64encode(b"\x00binary").decode()
+
+    resp = client.post("/", headers=BATCH_HEADERS, data=json.dumps([event]))
+
+    assert resp.status_code == 200
+    assert received[0].data == b"\x00binary"
+
+
+@pytest.mark.parametrize("body", ["not json", '{"id": "1"}'])
+def test_invalid_batch_is_bad_request(create_client, body):
+    client, received = create_client("function")
+
+    resp = client.post("/", headers=BATCH_HEADERS, data=body)
+
+    assert resp.status_code == 400
+    assert "Failed to parse CloudEvents batch" in resp.text
+    assert received == []
+
+
+def test_batch_handler_converted_background_event():
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "batch.py"
+    client = create_app("batch_function", source, "cloudevent").test_client()
+    with open(
+        TEST_FUNCTIONS_DIR.parent / "test_data" / "pubsub_text-legacy-input.json"
+    ) as f:
+        background_event = json.load(f)
+
+    resp = client.post("/", json=background_event)
+
+    assert resp.status_code == 200
+    ((event,),) = sys.modules["batch"].received
+    assert json.loads(resp.text) == {"results": [{"id": event["id"], "status": "OK"}]}
+
+
+def test_aio_sync_batch_handler():
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "async_batch.py"
+    client = StarletteTestClient(create_asgi_app("sync_batch_function", source))
+
+    resp = client.post("/", headers=BATCH_HEADERS, data=json.dumps([_event("1")]))
+
+    assert resp.status_code == 200
+    ((event,),) = sys.modules["async_batch"].received
+    assert event["id"] == "1"
@@ -0,0 +1,537 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import gzip
+import json
+import pathlib
+import sys
+import threading
+import types
+import zlib
+
+import pytest
+
+from werkzeug.test import EnvironBuilder
+
+from functions_framework import _compression, create_app
+from functions_framework.exceptions import InvalidConfigurationException
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "compression" / "main.py"
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def _gzip_only(min_bytes=_compression.DEFAULT_MIN_BYTES, encoder_class=None):
+    return _compression.Compression(
+        [_compression.Encoding("gzip", 6, encoder_class or _compression._GzipEncoder)],
+        min_bytes,
+    )
+
+
+class _HoldingEncoder:
+    """Holds back all data until the end, like brotli and zstd may."""
+
+    def __init__(self, level):
+        self.held = []
+
+    def compress(self, data):
+        self.held.append(data)
+        return b""
+
+    def finish(self, data=b""):
+        return b"".join(self.held) + data
+
+
+def _environ():
+    return EnvironBuilder(method="GET", headers=GZIP).get_environ()
+
+
+async def _asgi_messages(middleware, method="GET", headers=GZIP):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+    }
+    await middleware(scope, None, send)
+    return messages
+
+
+@pytest.fixture(autouse=True)
+def compression_enabled(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENABLED", "true")
+    monkeypatch.setenv("COMPRESSION_ENCODINGS", "gzip")
+
+
+def test_large_response_compressed(make_client):
+    response = make_client("large", SOURCE).get("/", headers=GZIP)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert len(json.loads(gzip.decompress(response.data))["items"]) == 2000
+
+
+def test_compression_disabled_by_default(monkeypatch, make_client):
+    monkeypatch.delenv("COMPRESSION_ENABLED")
+
+    response = make_client("large", SOURCE).get("/", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+
+
+def test_not_compressed_without_accept_encoding(make_client):
+    response = make_client("large", SOURCE).get("/")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert len(response.get_json()["items"]) == 2000
+
+
+def test_not_compressed_when_refused(make_client):
+    response = make_client("large", SOURCE).get(
+        "/", headers={"Accept-Encoding": "gzip;q=0, *"}
+    )
+
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "target", ["small", "image", "archive", "encoded", "no_transform", "not_modified"]
+)
+def test_not_compressed(target, make_client):
+    response = make_client(target, SOURCE).get("/", headers=GZIP)
+
+    assert response.headers.get("Content-Encoding") != "gzip"
+
+
+def test_svg_compressed(make_client):
+    response = make_client("svg", SOURCE).get("/", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_vary_appended(make_client):
+    response = make_client("vary", SOURCE).get("/", headers=GZIP)
+
+    assert response.headers["Vary"] == "Origin, Accept-Encoding"
+
+
+@pytest.mark.parametrize(
+    "etag, expected", [('"abc"', 'W/"abc"'), ('W/"abc"', 'W/"abc"')]
+)
+def test_compressed_etag_is_weak(make_client, etag, expected):
+    response = make_client("etag", SOURCE).get(
+        "/", query_string={"etag": etag}, headers=GZIP
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == expected
+
+
+def test_uncompressed_etag_is_kept(make_client):
+    response = make_client("etag", SOURCE).get("/", query_string={"etag": '"abc"'})
+
+    assert response.headers["ETag"] == '"abc"'
+
+
+def test_head_not_compressed(make_client):
+    response = make_client("large", SOURCE).head("/", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_min_bytes(monkeypatch, make_client):
+    monkeypatch.setenv("COMPRESSION_MIN_BYTES", "1")
+
+    response = make_client("small", SOURCE).get("/", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == b"ok"
+
+
+def test_streamed_response_compressed_incrementally():
+    app = create_app("stream", SOURCE)
+    environ = EnvironBuilder(method="GET", headers=GZIP).get_environ()
+    started = []
+
+    app_iter = app(environ, lambda status, headers: started.append(headers))
+    decompressor = zlib.decompressobj(31)
+    chunks = iter(app_iter)
+    first = next(chunks)
+
+    headers = dict(started[0])
+    assert headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in headers
+    assert decompressor.decompress(first) == b"<html><body><ul>"
+
+    body = b"".join(decompressor.decompress(chunk) for chunk in chunks)
+    app_iter.close()
+    assert body.endswith(b"</ul></body></html>")
+    assert decompressor.eof
+
+
+@pytest.mark.parametrize("length", [None, 4096])
+def test_wsgi_lazy_start_response(length):
+    headers = [("Content-Type", "text/plain")]
+    if length:
+        headers.append(("Content-Length", str(length)))
+
+    def app(environ, start_response):
+        start_response("200 OK", headers)
+        yield b"x" * 2048
+        yield b"x" * 2048
+
+    started = []
+    middleware = _compression.WsgiMiddleware(app, _gzip_only())
+
+    body = b"".join(
+        middleware(_environ(), lambda status, headers: started.append(headers))
+    )
+
+    assert dict(started[0])["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == b"x" * 4096
+
+
+def test_wsgi_lazy_start_response_error_closes_app_iter():
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            raise RuntimeError("boom")
+
+        def close(self):
+            closed.append(True)
+
+    middleware = _compression.WsgiMiddleware(lambda *args: Body(), _gzip_only())
+
+    with pytest.raises(RuntimeError):
+        middleware(_environ(), None)
+
+    assert closed == [True]
+
+
+def test_wsgi_buffered_body_without_close():
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Length", "4096")])
+        return [b"x" * 4096]
+
+    middleware = _compression.WsgiMiddleware(app, _gzip_only())
+
+    (body,) = middleware(_environ(), lambda status, headers: None)
+
+    assert gzip.decompress(body) == b"x" * 4096
+
+
+def test_wsgi_buffered_body_rejects_write():
+    def app(environ, start_response):
+        write = start_response("200 OK", [("Content-Length", "4096")])
+        write(b"x" * 4096)
+
+    middleware = _compression.WsgiMiddleware(app, _gzip_only())
+
+    with pytest.raises(RuntimeError, match="write"):
+        middleware(_environ(), lambda status, headers: None)
+
+
+def test_wsgi_streamed_write_compressed():
+    written = []
+
+    def app(environ, start_response):
+        write = start_response("200 OK", [])
+        write(b"x" * 4096)
+        return []
+
+    middleware = _compression.WsgiMiddleware(app, _gzip_only())
+
+    app_iter = middleware(_environ(), lambda status, headers: written.append)
+    written.extend(app_iter)
+
+    assert gzip.decompress(b"".join(written)) == b"x" * 4096
+
+
+def test_wsgi_streamed_encoder_holding_data_back():
+    def app(environ, start_response):
+        start_response("200 OK", [])
+        return [b"first", b"", b"second"]
+
+    middleware = _compression.WsgiMiddleware(
+        app, _gzip_only(encoder_class=_HoldingEncoder)
+    )
+
+    app_iter = middleware(_environ(), lambda status, headers: None)
+
+    assert list(app_iter) == [b"firstsecond"]
+
+
+def test_asgi_large_response_compressed(make_client):
+    response = make_client("async_large", SOURCE, asgi=True).get("/", headers=GZIP)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert len(response.json()["items"]) == 2000
+
+
+def test_asgi_head_not_compressed(make_client):
+    with make_client("async_large", SOURCE, asgi=True) as client:
+        response = client.head("/", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.parametrize("target", ["async_small", "async_image"])
+def test_asgi_not_compressed(target, make_client):
+    response = make_client(target, SOURCE, asgi=True).get("/", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+
+
+def test_asgi_streamed_response_compressed(make_client):
+    response = make_client("async_stream", SOURCE, asgi=True).get("/", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.text.startswith("<html><body><ul><li>0</li>")
+
+
+def test_asgi_large_body_compressed_off_event_loop(monkeypatch, make_client):
+    threads = []
+    finish = _compression._GzipEncoder.finish
+
+    def recording_finish(self, data=b""):
+        threads.append(threading.get_ident())
+        return finish(self, data)
+
+    monkeypatch.setattr(_compression._GzipEncoder, "finish", recording_finish)
+
+    response = make_client("async_thread", SOURCE, asgi=True).get("/", headers=GZIP)
+
+    loop_thread = int(response.text.split("\n", 1)[0])
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert threads and loop_thread not in threads
+
+
+async def _stream(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    for part in (b"first", b"second"):
+        await send({"type": "http.response.body", "body": part, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_asgi_middleware_flushes_each_chunk():
+    middleware = _compression.AsgiMiddleware(_stream, _gzip_only())
+
+    start, *bodies = asyncio.run(_asgi_messages(middleware))
+
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(bodies[0]["body"]) == b"first"
+    assert decompressor.decompress(bodies[1]["body"]) == b"second"
+    assert bodies[-1]["more_body"] is False
+    decompressor.decompress(bodies[-1]["body"])
+    assert decompressor.eof
+
+
+def test_asgi_encoder_holding_data_back():
+    middleware = _compression.AsgiMiddleware(
+        _stream, _gzip_only(encoder_class=_HoldingEncoder)
+    )
+
+    start, *bodies = asyncio.run(_asgi_messages(middleware))
+
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert bodies == [
+        {"type": "http.response.body", "body": b"firstsecond", "more_body": False}
+    ]
+
+
+@pytest.mark.parametrize(
+    "message, headers",
+    [
+        # Too small to compress
+        ({"type": "http.response.body", "body": b"ok"}, GZIP),
+        # Without an encoding the client accepts
+        ({"type": "http.response.body", "body": b"x" * 4096}, {}),
+        # Not a body message, e.g. from an ASGI extension
+        ({"type": "http.response.pathsend", "path": "/tmp/file"}, GZIP),
+    ],
+)
+def test_asgi_response_sent_as_is(message, headers):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send(message)
+
+    middleware = _compression.AsgiMiddleware(app, _gzip_only())
+
+    start, sent = asyncio.run(_asgi_messages(middleware, headers=headers))
+
+    assert start["headers"] == [(b"vary", b"Accept-Encoding")]
+    assert sent == message
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "Accept-Encoding"),
+        ("Origin", "Origin, Accept-Encoding"),
+        ("origin, accept-encoding", "origin, accept-encoding"),
+        ("*", "*"),
+    ],
+)
+def test_vary(value, expected):
+    assert _compression._vary(value) == expected
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("*", "br"),
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0, gzip;q=0, *", None),
+        ("GZIP;Q=0.5", "gzip"),
+        ("gzip;q=invalid", None),
+        ("gzip;level=1", "gzip"),
+    ],
+)
+def test_negotiate(accept_encoding, expected):
+    compression = _compression.Compression(
+        [
+            _compression.Encoding("br", 4, _compression._GzipEncoder),
+            _compression.Encoding("gzip", 6, _compression._GzipEncoder),
+        ]
+    )
+
+    encoding = compression.negotiate(accept_encoding)
+
+    assert (encoding and encoding.name) == expected
+
+
+def test_encodings_from_env(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENCODINGS", "gzip:1")
+    monkeypatch.setenv("COMPRESSION_MIN_BYTES", "10")
+
+    compression = _compression.Compression.from_env()
+
+    assert [(e.name, e.level) for e in compression.encodings] == [("gzip", 1)]
+    assert compression.min_bytes == 10
+
+
+def test_default_encodings_skip_missing_libraries(monkeypatch):
+    monkeypatch.delenv("COMPRESSION_ENCODINGS")
+
+    compression = _compression.Compression.from_env()
+
+    assert compression.encodings[-1].name == "gzip"
+
+
+@pytest.mark.parametrize("value", ["deflate", "gzip:fast"])
+def test_invalid_encodings(monkeypatch, value):
+    monkeypatch.setenv("COMPRESSION_ENCODINGS", value)
+
+    with pytest.raises(InvalidConfigurationException):
+        _compression.Compression.from_env()
+
+
+@pytest.fixture
+def no_codec_libraries(monkeypatch):
+    for name in ("brotli", "brotlicffi", "zstandard"):
+        monkeypatch.setitem(sys.modules, name, None)
+
+
+@pytest.mark.usefixtures("no_codec_libraries")
+def test_configured_encoding_not_installed(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENCODINGS", "zstd,gzip")
+
+    with pytest.raises(InvalidConfigurationException, match="not installed"):
+        create_app("large", SOURCE)
+
+
+@pytest.mark.usefixtures("no_codec_libraries")
+def test_default_encodings_without_codec_libraries(monkeypatch):
+    monkeypatch.delenv("COMPRESSION_ENCODINGS")
+
+    compression = _compression.Compression.from_env()
+
+    assert [e.name for e in compression.encodings] == ["gzip"]
+
+
+class _FakeCompressor:
+    """Records the calls made to a brotli or zstandard compressor."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        self.instances.append(self)
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name,) + args)
+            return b""
+
+        return method
+
+
+FAKE_BROTLI = types.SimpleNamespace(Compressor=_FakeCompressor)
+FAKE_ZSTANDARD = types.SimpleNamespace(
+    COMPRESSOBJ_FLUSH_BLOCK=1,
+    ZstdCompressor=lambda level: types.SimpleNamespace(compressobj=_FakeCompressor),
+)
+BROTLI_CALLS = [("process", b"a"), ("flush",), ("process", b"b"), ("finish",)]
+
+
+@pytest.mark.parametrize(
+    "modules, name, expected_calls",
+    [
+        ({"brotli": FAKE_BROTLI}, "br", BROTLI_CALLS),
+        # brotlicffi is used when brotli isn't installed
+        ({"brotli": None, "brotlicffi": FAKE_BROTLI}, "br", BROTLI_CALLS),
+        (
+            {"zstandard": FAKE_ZSTANDARD},
+            "zstd",
+            [("compress", b"a"), ("flush", 1), ("compress", b"b"), ("flush",)],
+        ),
+    ],
+)
+def test_optional_encoders(monkeypatch, modules, name, expected_calls):
+    for module, value in modules.items():
+        monkeypatch.setitem(sys.modules, module, value)
+    monkeypatch.setenv("COMPRESSION_ENCODINGS", name)
+
+    (encoding,) = _compression.Compression.from_env().encodings
+    encoder = encoding.encoder()
+    encoder.compress(b"a")
+    encoder.finish(b"b")
+
+    assert _FakeCompressor.instances[-1].calls == expected_calls
@@ -0,0 +1,207 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import json
+import pathlib
+
+import cloudevents.exceptions as cloud_exceptions
+import pytest
+import werkzeug.exceptions
+
+from cloudevents.http import from_http
+from starlette.testclient import TestClient as StarletteTestClient
+
+from functions_framework import _decoding, _json, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+TEST_DATA_DIR = pathlib.Path(__file__).resolve().parent / "test_data"
+
+STRUCTURED = {"Content-Type": "application/cloudevents+json"}
+
+ATTRIBUTES = {
+    "specversion": "1.0",
+    "id": "my-id",
+    "source": "//pubsub.googleapis.com/projects/my-project/topics/my-topic",
+    "type": "google.cloud.pubsub.topic.v1.messagePublished",
+    "time": "2020-08-16T13:58:54.471765",
+}
+
+
+@pytest.fixture
+def count_loads(monkeypatch):
+    calls = []
+    loads = _json.loads
+
+    def counting_loads(s):
+        calls.append(s)
+        return loads(s)
+
+    monkeypatch.setattr(_json, "loads", counting_loads)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {**ATTRIBUTES, "data": {"message": {"data": "MTA="}}},
+        {**ATTRIBUTES, "specversion": "0.3", "data": {"a": 1}},
+        {**ATTRIBUTES, "data": "text"},
+        {**ATTRIBUTES, "data": ""},
+        {**ATTRIBUTES, "data": [1, 2]},
+        {**ATTRIBUTES},
+        {**ATTRIBUTES, "subject": None, "myextension": "value"},
+        {**ATTRIBUTES, "myextension": None},
+        {**ATTRIBUTES, "specversion": "0.3", "schemaurl": None, "data": {"a": 1}},
+        {**ATTRIBUTES, "data_base64": base64.b64encode(b"\x00\x01").decode()},
+        {**ATTRIBUTES, "data_base64": base64.b64encode(b'{"a": 1}').decode()},
+    ],
+)
+def test_to_cloud_event_matches_from_http(event):
+    body = json.dumps(event).encode()
+    decoded = _decoding.DecodedRequest(STRUCTURED, body)
+
+    assert _decoding.to_cloud_event(decoded) == from_http(STRUCTURED, body)
+
+
+def test_to_cloud_event_binary():
+    headers = {f"ce-{name}": value for name, value in ATTRIBUTES.items()}
+    body = b'{"a": 1}'
+
+    event = _decoding.to_cloud_event(_decoding.DecodedRequest(headers, body))
+
+    assert event == from_http(headers, body)
+
+
+@pytest.mark.parametrize(
+    "body, exception",
+    [
+        (b"", cloud_exceptions.MissingRequiredFields),
+        (b"not json", cloud_exceptions.MissingRequiredFields),
+        (b"[1, 2]", cloud_exceptions.MissingRequiredFields),
+        (b'{"id": "my-id"}', cloud_exceptions.MissingRequiredFields),
+        (
+            json.dumps({**ATTRIBUTES, "specversion": "2.0"}).encode(),
+            cloud_exceptions.InvalidRequiredFields,
+        ),
+        (
+            json.dumps({**ATTRIBUTES, "specversion": ["1.0"]}).encode(),
+            cloud_exceptions.InvalidRequiredFields,
+        ),
+        (
+            json.dumps({k: v for k, v in ATTRIBUTES.items() if k != "id"}).encode(),
+            cloud_exceptions.MissingRequiredFields,
+        ),
+        (
+            json.dumps({**ATTRIBUTES, "data_base64": "abc"}).encode(),
+            cloud_exceptions.DataUnmarshallerError,
+        ),
+    ],
+)
+def test_to_cloud_event_invalid(body, exception):
+    with pytest.raises(exception):
+        _decoding.to_cloud_event(_decoding.DecodedRequest(STRUCTURED, body))
+
+
+def test_structured_cloud_event_is_parsed_once(count_loads):
+    body = json.dumps({**ATTRIBUTES, "data": {"a": 1}}).encode()
+
+    _decoding.to_cloud_event(_decoding.DecodedRequest(STRUCTURED, body))
+
+    assert count_loads == [body]
+
+
+@pytest.mark.parametrize(
+    "content_type, body, exception",
+    [
+        ("text/plain", b"{}", werkzeug.exceptions.UnsupportedMediaType),
+        ("application/json", b"{", werkzeug.exceptions.BadRequest),
+    ],
+)
+def test_get_json_fails_like_flask(content_type, body, exception):
+    decoded = _decoding.DecodedRequest({"Content-Type": content_type}, body)
+
+    with pytest.raises(exception):
+        decoded.get_json()
+
+
+@pytest.mark.parametrize(
+    "content_type", ["application/json", "application/cloudevents+json; charset=utf-8"]
+)
+def test_get_json(content_type):
+    decoded = _decoding.DecodedRequest({"Content-Type": content_type}, b'{"a": 1}')
+
+    assert decoded.get_json() == {"a": 1}
+
+
+def test_diagnostics_are_truncated():
+    headers = {"X-Long": "h" * 5000}
+    decoded = _decoding.DecodedRequest(headers, b"b" * 5000)
+
+    diagnostics = decoded.diagnostics()
+
+    assert len(diagnostics) < 3 * _decoding.MAX_DIAGNOSTIC_CHARS
+    assert "(5000 bytes)" in diagnostics
+
+
+def test_diagnostics():
+    decoded = _decoding.DecodedRequest({"X-Short": "h"}, b"body")
+
+    assert decoded.diagnostics() == (
+        "Got HTTP headers: {'X-Short': 'h'}\nGot data: b'body'"
+    )
+
+
+def test_cloud_event_function_parses_background_event_once(count_loads):
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "converted_background_event.py"
+    client = create_app("function", source, "cloudevent").test_client()
+
+    with open(TEST_DATA_DIR / "pubsub_text-legacy-input.json") as f:
+        body = f.read()
+
+    response = client.post("/", data=body, content_type="application/json")
+
+    assert response.status_code == 200
+    assert len(count_loads) == 1
+
+
+def test_cloud_event_function_bad_request_is_truncated():
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "main.py"
+    client = create_app("function", source, "cloudevent").test_client()
+
+    body = json.dumps({"data": "x" * 100000})
+
+    response = client.post("/", data=body, content_type="application/json")
+
+    assert response.status_code == 400
+    assert len(response.text) < 10000
+    assert f"({len(body)} bytes)" in response.text
+
+
+def test_async_cloud_event_function_parses_once(count_loads):
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "async_main.py"
+    client = StarletteTestClient(create_asgi_app("function", source, "cloudevent"))
+    body = json.dumps(
+        {
+            **ATTRIBUTES,
+            "source": "from-galaxy-far-far-away",
+            "type": "cloud_event.greet.you",
+            "data": {"name": "john"},
+        }
+    )
+
+    response = client.post("/", content=body, headers=STRUCTURED)
+
+    assert response.status_code == 200
+    assert len(count_loads) == 1
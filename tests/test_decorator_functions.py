@@ -14,6 +14,7 @@
 import pathlib
 import sys
 
+import flask
 import pytest
 
 from cloudevents import conversion as ce_conversion
@@ -27,7 +28,7 @@ if sys.version_info >= (3, 8):
 else:
     StarletteTestClient = None
 
-from functions_framework import create_app
+from functions_framework import _lifecycle, create_app
 
 # Conditional import for async functionality
 if sys.version_info >= (3, 8):
@@ -175,3 +176,39 @@ def test_aio_decorators_register_asgi_functions():
 
     assert "test_http_sync" in registry.ASGI_FUNCTIONS
     assert "test_cloud_event_sync" in registry.ASGI_FUNCTIONS
+
+
+def test_create_app_skips_flask_for_aio_functions(monkeypatch):
+    def no_flask(*args, **kwargs):
+        raise AssertionError("Flask app created for an @aio function")
+
+    monkeypatch.setattr("flask.Flask", no_flask)
+    source = TEST_FUNCTIONS_DIR / "decorators" / "async_decorator.py"
+
+    client = StarletteTestClient(create_app("function_http_sync", source))
+
+    resp = client.post("/other_path")
+    assert resp.status_code == 200
+    assert resp.text == "sync response"
+
+
+def test_create_app_falls_back_to_flask_for_plain_functions(monkeypatch):
+    monkeypatch.setattr(_lifecycle, "_STARTUP_HOOKS", [])
+    source = TEST_FUNCTIONS_DIR / "decorators" / "async_decorator_shadowed.py"
+
+    app = create_app("function_http", source)
+
+    assert isinstance(app, flask.Flask)
+    assert app.test_client().post("/").text == "wsgi response"
+    # The module only ran once
+    assert len(_lifecycle._STARTUP_HOOKS) == 1
+
+
+def test_create_app_aio_function_registered_at_runtime():
+    source = TEST_FUNCTIONS_DIR / "decorators" / "async_decorator_alias.py"
+
+    client = StarletteTestClient(create_app("function_http", source))
+
+    resp = client.get("/")
+    assert resp.status_code == 200
+    assert resp.text == "OK"
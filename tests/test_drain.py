@@ -0,0 +1,321 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import os
+import pathlib
+import signal
+import socket
+import threading
+import time
+
+from multiprocessing import Process
+
+import pretend
+import pytest
+import requests
+
+from starlette.testclient import TestClient as StarletteTestClient
+from werkzeug.wsgi import FileWrapper
+
+from functions_framework import _drain, _lifecycle, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+TEST_HOST = "127.0.0.1"
+TEST_PORT = "8085"
+
+
+@pytest.fixture
+def source():
+    return TEST_FUNCTIONS_DIR / "http_trigger" / "main.py"
+
+
+@pytest.fixture
+def grace_period(monkeypatch):
+    monkeypatch.setenv("GRACEFUL_TIMEOUT_SECONDS", "5")
+
+
+@pytest.mark.usefixtures("grace_period")
+def test_wsgi_counts_requests_until_body_is_closed(source):
+    client = create_app("function", source).test_client()
+
+    response = client.post("/", json={"mode": "SUCCESS"})
+
+    assert response.status_code == 200
+    assert _drain.tracker.in_flight == 1
+
+    response.close()
+
+    assert _drain.tracker.in_flight == 0
+
+
+@pytest.mark.usefixtures("grace_period")
+def test_wsgi_rejects_requests_while_draining(source):
+    client = create_app("function", source).test_client()
+    _drain.tracker.begin_drain()
+
+    response = client.post("/", json={"mode": "SUCCESS"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert _drain.tracker.rejected == 1
+
+
+def test_wsgi_app_errors_leave_no_request_in_flight():
+    def broken(environ, start_response):
+        raise RuntimeError("boom")
+
+    app = _drain.WsgiMiddleware(broken)
+
+    with pytest.raises(RuntimeError):
+        app({}, pretend.stub())
+
+    assert _drain.tracker.in_flight == 0
+
+
+def test_wsgi_keeps_file_wrapper():
+    def send_file(environ, start_response):
+        start_response("200 OK", [])
+        return environ["wsgi.file_wrapper"](io.BytesIO(b"data"))
+
+    app = _drain.WsgiMiddleware(send_file)
+    environ = {"wsgi.file_wrapper": FileWrapper}
+
+    app_iter = app(environ, lambda status, headers: None)
+
+    assert isinstance(app_iter, FileWrapper)
+    assert _drain.tracker.in_flight == 1
+
+    app_iter.close()
+
+    assert app_iter.file.closed
+    assert _drain.tracker.in_flight == 0
+
+
+def test_drain_is_off_without_grace_period(source):
+    wsgi_client = create_app("function", source).test_client()
+    asgi_source = TEST_FUNCTIONS_DIR / "http_trigger" / "async_main.py"
+    asgi_client = StarletteTestClient(create_asgi_app("function", asgi_source))
+    _drain.tracker.begin_drain()
+
+    response = wsgi_client.post("/", json={"mode": "SUCCESS"})
+    assert response.status_code == 200
+    assert asgi_client.post("/", json={"mode": "SUCCESS"}).status_code == 200
+    assert _drain.tracker.in_flight == 0
+    assert _drain.tracker.rejected == 0
+
+
+@pytest.mark.usefixtures("grace_period")
+def test_asgi_rejects_requests_while_draining():
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "async_main.py"
+    client = StarletteTestClient(create_asgi_app("function", source))
+
+    assert client.post("/", json={"mode": "SUCCESS"}).status_code == 200
+    assert _drain.tracker.in_flight == 0
+
+    _drain.tracker.begin_drain()
+    response = client.post("/", json={"mode": "SUCCESS"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.headers["connection"] == "close"
+    assert _drain.tracker.rejected == 1
+
+
+@pytest.mark.usefixtures("grace_period")
+def test_asgi_lifespan_shutdown_drains(source):
+    with StarletteTestClient(create_asgi_app("function", source)):
+        assert not _drain.tracker.draining
+
+    assert _drain.tracker.draining
+
+
+def test_drain_waits_for_every_in_flight_request():
+    _drain.tracker.enter()
+    _drain.tracker.enter()
+    threading.Timer(0.05, _drain.tracker.exit).start()
+    threading.Timer(0.1, _drain.tracker.exit).start()
+
+    assert _drain.drain(timeout=1) < 1
+    assert _drain.tracker.in_flight == 0
+
+
+def test_drain_waits_for_in_flight_requests():
+    _drain.tracker.enter()
+    threading.Timer(0.05, _drain.tracker.exit).start()
+
+    assert _drain.drain(timeout=1) < 1
+    assert _drain.tracker.in_flight == 0
+
+
+def test_drain_logs_requests_left_after_grace_period(monkeypatch):
+    logger = pretend.stub(warning=pretend.call_recorder(lambda *args: None))
+    monkeypatch.setattr(_drain, "logger", logger)
+    _drain.tracker.enter()
+
+    _drain.drain(timeout=0.01)
+
+    assert logger.warning.calls == [
+        pretend.call(
+            "Grace period of %ss elapsed with %d requests still in flight", 0.01, 1
+        )
+    ]
+
+
+def test_shutdown_drains_with_grace_period(monkeypatch):
+    monkeypatch.setenv("GRACEFUL_TIMEOUT_SECONDS", "5")
+    drain = pretend.call_recorder(lambda timeout: 0)
+    monkeypatch.setattr(_drain, "drain", drain)
+
+    _lifecycle.run_shutdown()
+
+    assert drain.calls == [pretend.call(5.0)]
+
+
+@pytest.mark.parametrize("grace_period, kwargs", [("", {}), ("5", {"drain": False})])
+def test_shutdown_skips_drain(monkeypatch, grace_period, kwargs):
+    monkeypatch.setenv("GRACEFUL_TIMEOUT_SECONDS", grace_period)
+    drain = pretend.call_recorder(lambda timeout: 0)
+    monkeypatch.setattr(_drain, "drain", drain)
+
+    _lifecycle.run_shutdown(**kwargs)
+
+    assert drain.calls == []
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+def test_signal_handler_chains_to_server_handler(monkeypatch):
+    previous = pretend.call_recorder(lambda signum, frame: None)
+    monkeypatch.setattr(signal, "getsignal", lambda signum: previous)
+    installed = {}
+    monkeypatch.setattr(signal, "signal", installed.__setitem__)
+
+    _drain.install_signal_handler()
+    handler = installed[signal.SIGTERM]
+    handler(signal.SIGTERM, None)
+
+    assert _drain.tracker.draining
+    assert previous.calls == [pretend.call(signal.SIGTERM, None)]
+
+    # Installing again, e.g. from a second app in the same worker, is a no-op
+    monkeypatch.setattr(signal, "getsignal", lambda signum: handler)
+    installed.clear()
+    _drain.install_signal_handler()
+    assert installed == {}
+
+
+@pytest.mark.parametrize(
+    "current_handler, thread",
+    [(signal.SIG_DFL, threading.main_thread()), (lambda *a: None, None)],
+)
+def test_signal_handler_is_only_installed_over_server_handlers(
+    monkeypatch, current_handler, thread
+):
+    monkeypatch.setattr(signal, "getsignal", lambda signum: current_handler)
+    thread = thread or threading.Thread()
+    monkeypatch.setattr(threading, "current_thread", lambda: thread)
+    installed = {}
+    monkeypatch.setattr(signal, "signal", installed.__setitem__)
+
+    _drain.install_signal_handler()
+
+    assert installed == {}
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+def test_gunicorn_graceful_timeout_from_env(monkeypatch):
+    from functions_framework._http import gunicorn
+
+    monkeypatch.setenv("GRACEFUL_TIMEOUT_SECONDS", "12")
+
+    for app_class in (gunicorn.GunicornApplication, gunicorn.UvicornApplication):
+        app = app_class(pretend.stub(), "1.2.3.4", "1234", False)
+        assert app.cfg.graceful_timeout == 12
+
+
+def _wait_for_listen(host, port, timeout=10):
+    # Used in tests to make sure that the gunicorn app has booted and is
+    # listening before sending a test request
+    start_time = time.perf_counter()
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                break
+        except OSError as ex:
+            time.sleep(0.01)
+            if time.perf_counter() - start_time >= timeout:
+                raise TimeoutError(
+                    "Waited too long for port {} on host {} to start accepting "
+                    "connections.".format(port, host)
+                ) from ex
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+@pytest.mark.skipif("platform.system() == 'Darwin'")
+@pytest.mark.slow_integration_test
+@pytest.mark.parametrize(
+    "target, app_class, keep_alive_status",
+    [
+        ("function", "GunicornApplication", 503),
+        # uvicorn closes idle keep-alive connections itself on shutdown
+        ("async_function", "UvicornApplication", None),
+    ],
+)
+def test_sigterm_finishes_accepted_requests(
+    monkeypatch, target, app_class, keep_alive_status
+):
+    monkeypatch.setenv("GRACEFUL_TIMEOUT_SECONDS", "5")
+    gunicorn = pytest.importorskip("functions_framework._http.gunicorn")
+    source = TEST_FUNCTIONS_DIR / "drain" / "main.py"
+    if app_class == "UvicornApplication":
+        app = create_asgi_app(target, source)
+    else:
+        app = create_app(target, source)
+    server = getattr(gunicorn, app_class)(app, TEST_HOST, TEST_PORT, False)
+    server_p = Process(target=server.run)
+    server_p.start()
+    _wait_for_listen(TEST_HOST, TEST_PORT)
+
+    url = "http://{}:{}/".format(TEST_HOST, TEST_PORT)
+    keep_alive = requests.Session()
+    assert keep_alive.get(url, timeout=10).status_code == 200
+
+    results = []
+
+    def send():
+        results.append(requests.get(url, timeout=10).status_code)
+
+    clients = [threading.Thread(target=send) for _ in range(4)]
+    for client in clients:
+        client.start()
+    # Let the requests reach the worker, then ask it to shut down
+    time.sleep(0.3)
+    os.kill(server_p.pid, signal.SIGTERM)
+    # Give the arbiter time to pass SIGTERM on to the worker
+    time.sleep(0.2)
+    try:
+        response = keep_alive.get(url, timeout=10)
+    except requests.ConnectionError:
+        response = None
+    for client in clients:
+        client.join()
+    server_p.join(timeout=10)
+
+    assert results == [200] * len(clients)
+    assert server_p.exitcode == 0
+    if keep_alive_status is None:
+        assert response is None
+    else:
+        assert response.status_code == keep_alive_status
+        assert response.headers["Retry-After"] == "1"
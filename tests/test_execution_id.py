@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import io
 import json
 import pathlib
 import re
 import sys
+import threading
 
 from functools import partial
 from unittest.mock import Mock
@@ -182,6 +184,14 @@ def test_generate_execution_id():
     assert match == actual_execution_id
 
 
+def test_generate_execution_id_discards_biased_bytes(monkeypatch):
+    draws = iter([bytes(range(240, 256)), bytes(range(16))])
+    monkeypatch.setattr(execution_id.os, "urandom", lambda n: next(draws))
+
+    # 240-247 map to the last 8 characters, 248-255 are dropped
+    assert execution_id._generate_execution_id() == "STUVWXYZ0123"
+
+
 @pytest.mark.parametrize(
     "headers,expected_execution_id,expected_span_id",
     [
@@ -320,6 +330,87 @@ def test_log_handler_omits_empty_execution_context(monkeypatch, capsys):
     assert json.loads(record.out) == expected_json
 
 
+@pytest.mark.parametrize("batch_size", [1, 256])
+def test_log_handler_async_writer(monkeypatch, batch_size):
+    monkeypatch.setenv("LOG_WRITER_ASYNC", "true")
+    monkeypatch.setattr(execution_id, "_LOG_BATCH_SIZE", batch_size)
+    monkeypatch.setattr(
+        execution_id,
+        "_get_current_context",
+        lambda: execution_id.ExecutionContext(
+            span_id=TEST_SPAN_ID, execution_id=TEST_EXECUTION_ID
+        ),
+    )
+    stream = io.StringIO()
+    log_handler = execution_id.LoggingHandlerAddExecutionId(stream=stream)
+
+    log_handler.write("first")
+    log_handler.write("second")
+    execution_id.flush_logs()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["first", "second"]
+    assert all(
+        line["logging.googleapis.com/labels"]["execution_id"] == TEST_EXECUTION_ID
+        for line in lines
+    )
+
+
+def test_get_log_writer_is_per_process(monkeypatch):
+    monkeypatch.setenv("LOG_WRITER_BUFFER_SIZE", "5")
+    monkeypatch.setenv("LOG_WRITER_FULL_POLICY", "drop")
+    monkeypatch.setattr(execution_id, "_log_writer", None)
+    monkeypatch.setattr(execution_id, "_log_writer_pid", None)
+
+    # Nothing to flush before the writer is created
+    execution_id.flush_logs()
+
+    writer = execution_id._get_log_writer()
+
+    assert execution_id._get_log_writer() is writer
+    assert writer._queue.maxsize == 5
+    assert writer.drop_when_full
+
+
+@pytest.mark.parametrize("drop_when_full", [True, False])
+def test_async_log_writer_full_buffer(drop_when_full):
+    release = threading.Event()
+    writing = threading.Event()
+    output = []
+
+    class SlowStream:
+        def write(self, contents):
+            writing.set()
+            release.wait()
+            output.append(contents)
+
+        def flush(self):
+            pass
+
+    writer = execution_id.AsyncLogWriter(maxsize=1, drop_when_full=drop_when_full)
+    stream = SlowStream()
+    # The first entry blocks the writer thread, the second fills the buffer
+    writer.put(stream, "1", None)
+    writing.wait()
+    writer.put(stream, "2", None)
+
+    blocked = threading.Thread(target=writer.put, args=(stream, "3", None))
+    blocked.start()
+    blocked.join(timeout=0.1)
+    assert blocked.is_alive() is not drop_when_full
+
+    release.set()
+    blocked.join()
+    writer.flush()
+
+    if drop_when_full:
+        assert output == ["1\n", "2\n"]
+        assert writer.dropped == 1
+    else:
+        assert output == ["1\n", "2\n", "3\n"]
+        assert writer.dropped == 0
+
+
 @pytest.mark.asyncio
 async def test_maintains_execution_id_for_concurrent_requests(monkeypatch, capsys):
     monkeypatch.setenv("LOG_EXECUTION_ID", "true")
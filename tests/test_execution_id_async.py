@@ -17,7 +17,7 @@ import pathlib
 import re
 
 from functools import partial
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
@@ -189,6 +189,35 @@ def test_generate_execution_id():
     assert match == actual_execution_id
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("container", [list, tuple])
+async def test_asgi_middleware_adds_execution_id(container):
+    app = AsyncMock()
+    headers = container([(b"content-type", b"text/plain")])
+    scope = {"type": "http", "headers": headers}
+
+    await execution_id.AsgiMiddleware(app)(scope, None, None)
+
+    assert len(scope["headers"]) == 2
+    name, value = scope["headers"][-1]
+    assert name == b"function-execution-id"
+    assert re.match(b"^[0-9a-zA-Z]{12}$", value)
+    if container is list:
+        # The server's header list is extended in place
+        assert scope["headers"] is headers
+    app.assert_called_once_with(scope, None, None)
+
+
+@pytest.mark.asyncio
+async def test_asgi_middleware_keeps_existing_execution_id():
+    headers = [(b"function-execution-id", TEST_EXECUTION_ID.encode())]
+    scope = {"type": "http", "headers": headers}
+
+    await execution_id.AsgiMiddleware(AsyncMock())(scope, None, None)
+
+    assert scope["headers"] == [(b"function-execution-id", TEST_EXECUTION_ID.encode())]
+
+
 @pytest.mark.parametrize(
     "headers,expected_execution_id,expected_span_id,should_generate",
     [
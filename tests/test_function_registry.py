@@ -76,3 +76,86 @@ def test_get_function_signature_default():
     signature_type = _function_registry.get_func_signature_type("my_func", None)
 
     assert signature_type == "http"
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        (
+            "import functions_framework.aio\n"
+            "@functions_framework.aio.http\n"
+            "async def target(request): ...\n",
+            True,
+        ),
+        (
+            "from functions_framework import aio\n"
+            "@aio.cloud_event\n"
+            "def target(event): ...\n",
+            True,
+        ),
+        (
+            "import functions_framework.aio\n"
+            "@functions_framework.aio.cloud_event_batch\n"
+            "async def target(events): ...\n",
+            True,
+        ),
+        (
+            "import functions_framework.aio as ffaio\n"
+            "@ffaio.http\n"
+            "def target(request): ...\n",
+            True,
+        ),
+        (
+            "from functions_framework.aio import http as aio_http\n"
+            "@aio_http\n"
+            "def target(request): ...\n",
+            True,
+        ),
+        (
+            "import functions_framework\n"
+            "@functions_framework.http\n"
+            "def target(request): ...\n",
+            False,
+        ),
+        (
+            "import functions_framework.aio\n"
+            "@functions_framework.aio.http\n"
+            "def other(request): ...\n"
+            "def target(request): ...\n",
+            False,
+        ),
+        (
+            "import functions_framework\n"
+            "import functions_framework.aio\n"
+            "class Handlers:\n"
+            "    @functions_framework.aio.http\n"
+            "    def target(self, request): ...\n"
+            "def outer():\n"
+            "    @functions_framework.aio.http\n"
+            "    def target(request): ...\n"
+            "@functions_framework.http\n"
+            "def target(request): ...\n",
+            False,
+        ),
+        (
+            "from . import aio\n"
+            "@aio.http\n"
+            "@decorators[0]\n"
+            "@unknown.http\n"
+            "def target(request): ...\n",
+            False,
+        ),
+        ("def target(request:\n", False),
+    ],
+)
+def test_declares_asgi_function(tmp_path, code, expected):
+    source = tmp_path / "main.py"
+    source.write_text(code)
+
+    assert _function_registry.declares_asgi_function(str(source), "target") is expected
+
+
+def test_declares_asgi_function_missing_source(tmp_path):
+    source = str(tmp_path / "main.py")
+
+    assert _function_registry.declares_asgi_function(source, "target") is False
@@ -18,6 +18,7 @@ import re
 import sys
 import time
 
+import flask
 import pretend
 import pytest
 
@@ -488,6 +489,37 @@ def test_error_paths(http_trigger_client, path):
     assert "Not Found" in resp.text
 
 
+@pytest.mark.parametrize(
+    "path", ["/", "/my_path", "/nested/path/", "/robots.txt", "/favicon.ico"]
+)
+def test_lean_dispatch_matches_url_map(monkeypatch, path):
+    source = TEST_FUNCTIONS_DIR / "http_request_check" / "main.py"
+    app = create_app("function", source)
+    monkeypatch.setenv("LEAN_DISPATCH_ENABLED", "true")
+    lean_app = create_app("function", source)
+
+    with app.test_request_context(path):
+        expected = (flask.request.url_rule.rule, flask.request.view_args)
+    with lean_app.test_request_context(path):
+        assert (flask.request.url_rule.rule, flask.request.view_args) == expected
+        assert flask.url_for("run", path="other") == "/other"
+        assert flask.url_for("run", path="again") == "/again"
+
+
+def test_lean_dispatch_http_function(monkeypatch):
+    monkeypatch.setenv("LEAN_DISPATCH_ENABLED", "true")
+    source = TEST_FUNCTIONS_DIR / "http_request_check" / "main.py"
+    client = create_app("function", source).test_client()
+
+    resp = client.post("/my_path?q=1", json={"mode": "url"})
+    assert resp.status_code == 200
+    assert resp.text == "http://localhost/my_path?q=1"
+
+    resp = client.get("/robots.txt")
+    assert resp.status_code == 404
+    assert "Not Found" in resp.text
+
+
 @pytest.mark.parametrize(
     "target, source, signature_type",
     [(None, None, None), (pretend.stub(), pretend.stub(), pretend.stub())],
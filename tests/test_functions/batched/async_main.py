@@ -0,0 +1,32 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Function used to test coalescing concurrent requests into batches."""
+
+import threading
+
+import functions_framework.aio
+
+
+@functions_framework.aio.http
+@functions_framework.aio.batched(max_batch_size=4, max_wait_seconds=0.05)
+async def function(requests):
+    names = [request.query_params["name"] for request in requests]
+    return [f"{name} of {len(names)}" for name in names]
+
+
+@functions_framework.aio.http
+@functions_framework.aio.batched(max_batch_size=2, max_wait_seconds=0.01)
+def sync_function(requests):
+    return [threading.current_thread().name for _ in requests]
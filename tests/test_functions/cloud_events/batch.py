@@ -0,0 +1,47 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Functions used to test CloudEvents batches."""
+
+import functions_framework
+
+from functions_framework.exceptions import RequestTimeoutException
+
+received = []
+
+
+def function(cloud_event):
+    """Records each event and fails the ones that ask for it."""
+    if cloud_event.data == {"fail": True}:
+        raise ValueError(f"failed {cloud_event['id']}")
+    if cloud_event.data == {"timeout": True}:
+        # As raised in the request thread once the request times out
+        raise RequestTimeoutException()
+    received.append(cloud_event)
+
+
+@functions_framework.cloud_event_batch
+def batch_function(cloud_events):
+    """Receives every event at once and fails the ones that ask for it."""
+    received.append(cloud_events)
+    return {
+        event["id"]: "asked to fail"
+        for event in cloud_events
+        if event.data == {"fail": True}
+    }
+
+
+@functions_framework.cloud_event_batch
+def invalid_batch_function(cloud_events):
+    return [event["id"] for event in cloud_events]
@@ -0,0 +1,99 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Functions used to test response compression."""
+
+import threading
+
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+ITEMS = [{"id": i, "name": f"item-{i}", "tags": ["a", "b", "c"]} for i in range(2000)]
+PARTS = (
+    ["<html><body><ul>"]
+    + [f"<li>{i}</li>" for i in range(10)]
+    + ["</ul></body></html>"]
+)
+
+
+def _parts():
+    yield from PARTS
+
+
+def large(request):
+    return {"items": ITEMS}
+
+
+def small(request):
+    return "ok"
+
+
+def image(request):
+    return b"\x89PNG" + bytes(4096), {"Content-Type": "image/png"}
+
+
+def svg(request):
+    return "<svg>" + " " * 4096 + "</svg>", {"Content-Type": "image/svg+xml"}
+
+
+def archive(request):
+    return b"PK" + bytes(4096), {"Content-Type": "application/zip"}
+
+
+def etag(request):
+    return "x" * 4096, {"ETag": request.args["etag"]}
+
+
+def encoded(request):
+    return b"x" * 4096, {"Content-Encoding": "br"}
+
+
+def no_transform(request):
+    return "x" * 4096, {"Cache-Control": "no-transform"}
+
+
+def vary(request):
+    return "x" * 4096, {"Vary": "Origin"}
+
+
+def not_modified(request):
+    return "", 304
+
+
+def stream(request):
+    return _parts(), {"Content-Type": "text/html"}
+
+
+async def async_large(request):
+    return JSONResponse({"items": ITEMS})
+
+
+async def async_small(request):
+    return Response("ok")
+
+
+async def async_image(request):
+    return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+
+async def async_stream(request):
+    async def parts():
+        for part in _parts():
+            yield part
+
+    return StreamingResponse(parts(), media_type="text/html")
+
+
+async def async_thread(request):
+    """Reports the thread the event loop runs on, in a large response."""
+    return Response(f"{threading.get_ident()}\n" + "x" * (256 * 1024))
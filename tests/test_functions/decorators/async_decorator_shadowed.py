@@ -0,0 +1,33 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Plain function whose decorator looks like an aio decorator to the scan."""
+
+import types
+
+import functions_framework
+
+from functions_framework import aio
+
+aio = types.SimpleNamespace(http=lambda function: function)
+
+
+@functions_framework.on_startup
+def startup():
+    pass
+
+
+@aio.http
+def function_http(request):
+    return "wsgi response"
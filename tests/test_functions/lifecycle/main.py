@@ -0,0 +1,35 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Function used to test startup and shutdown hooks."""
+import asyncio
+
+import functions_framework
+
+events = []
+
+
+@functions_framework.on_startup
+async def open_pool():
+    await asyncio.sleep(0)
+    events.append("startup")
+
+
+@functions_framework.on_shutdown
+def close_pool():
+    events.append("shutdown")
+
+
+async def function(request):
+    return ",".join(events)
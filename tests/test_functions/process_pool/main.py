@@ -0,0 +1,36 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+from functions_framework import execution_id
+
+
+def function(request):
+    return {
+        "pid": os.getpid(),
+        "method": request.method,
+        "path": request.url.path,
+        "query": request.query_params.get("q"),
+        "header": request.headers.get("x-test"),
+    }
+
+
+def cloud_event_function(cloud_event):
+    if cloud_event["type"] != "com.example.test":
+        raise ValueError("Unexpected event type")
+
+
+def execution_id_function(request):
+    print("logged from a pool process")
+    return execution_id.execution_context_var.get().execution_id
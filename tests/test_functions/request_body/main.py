@@ -0,0 +1,46 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Functions used to test handling of large request bodies."""
+
+from functions_framework.aio import parse_form
+
+
+def _files(files):
+    result = {}
+    for name, file in files.items():
+        file.stream.seek(0, 2)
+        result[name] = {"size": file.stream.tell(), "spooled": file.stream._rolled}
+    return result
+
+
+def upload(request):
+    return {"form": request.form.to_dict(), "files": _files(request.files)}
+
+
+def ignore_body(request):
+    return "ok"
+
+
+def read_body(request):
+    return str(len(request.get_data()))
+
+
+async def async_upload(request):
+    form, files = await parse_form(request)
+    return {"form": form.to_dict(), "files": _files(files)}
+
+
+async def async_read_body(request):
+    return str(len(await request.body()))
@@ -0,0 +1,34 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Function used to test instance resources."""
+import functions_framework
+
+events = []
+
+
+@functions_framework.resource
+def client():
+    events.append("open")
+    yield {"requests": 0}
+    events.append("close")
+
+
+def function(request):
+    client()["requests"] += 1
+    return str(client()["requests"])
+
+
+async def async_function(request):
+    return function(request)
@@ -0,0 +1,30 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+
+
+async def function(request):
+    # sleep for 1200 total ms (1.2 sec)
+    await asyncio.sleep(1.2)
+    return "success", 200
+
+
+def sync_function(request):
+    time.sleep(1.2)
+    return "success", 200
+
+
+async def cloud_event_function(cloud_event):
+    await asyncio.sleep(1.2)
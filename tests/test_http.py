@@ -103,6 +103,8 @@ def test_gunicorn_application(debug):
         "timeout": 0,
         "loglevel": "error",
         "limit_request_line": 0,
+        "post_worker_init": functions_framework._http.gunicorn._worker_started,
+        "worker_exit": functions_framework._http.gunicorn._worker_exiting,
     }
 
     assert gunicorn_app.cfg.bind == ["1.2.3.4:1234"]
@@ -112,6 +114,44 @@ def test_gunicorn_application(debug):
     assert gunicorn_app.load() == app
 
 
+@pytest.mark.skipif("platform.system() == 'Windows'")
+@pytest.mark.parametrize("app_class", ["GunicornApplication", "UvicornApplication"])
+def test_gunicorn_application_preload(monkeypatch, app_class):
+    monkeypatch.setenv("PRELOAD_APP", "True")
+    app = pretend.stub()
+
+    from functions_framework._http import gunicorn
+
+    gunicorn_app = getattr(gunicorn, app_class)(app, "1.2.3.4", "1234", False)
+
+    assert gunicorn_app.options["preload_app"] is True
+    assert gunicorn_app.cfg.preload_app is True
+    assert gunicorn_app.cfg.pre_fork is gunicorn._freeze_gc
+    assert gunicorn_app.cfg.post_fork is gunicorn._set_gc_threshold
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+def test_gunicorn_preload_gc_hooks(monkeypatch):
+    from functions_framework._http import gunicorn
+
+    freeze = pretend.call_recorder(lambda: None)
+    set_threshold = pretend.call_recorder(lambda *a: None)
+    monkeypatch.setattr(gunicorn.gc, "freeze", freeze)
+    monkeypatch.setattr(gunicorn.gc, "set_threshold", set_threshold)
+    server, worker = pretend.stub(), pretend.stub()
+
+    gunicorn._freeze_gc(server, worker)
+    gunicorn._set_gc_threshold(server, worker)
+
+    assert freeze.calls == [pretend.call()]
+    assert set_threshold.calls == []
+
+    monkeypatch.setenv("GC_THRESHOLD", "50000,20,30")
+    gunicorn._set_gc_threshold(server, worker)
+
+    assert set_threshold.calls == [pretend.call(50000, 20, 30)]
+
+
 @pytest.mark.parametrize("debug", [True, False])
 def test_flask_application(debug):
     app = pretend.stub(run=pretend.call_recorder(lambda *a, **kw: None))
@@ -0,0 +1,118 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import sys
+
+import flask
+import pretend
+import pytest
+
+from functions_framework import _json
+from functions_framework.aio import _CodecJSONResponse
+from functions_framework.exceptions import InvalidConfigurationException
+
+
+def _missing():
+    raise ImportError
+
+
+def test_default_codec_is_stdlib():
+    name, dumps, loads, error = _json.select_codec()
+
+    assert name == "json"
+    assert dumps is json.dumps
+    assert loads is json.loads
+    assert error is json.JSONDecodeError
+
+
+def test_codec_from_env(monkeypatch):
+    monkeypatch.setenv("FUNCTION_JSON_CODEC", "JSON")
+
+    assert _json.select_codec()[0] == "json"
+
+
+def test_auto_codec_prefers_installed_fast_codec(monkeypatch):
+    monkeypatch.setitem(_json._LOADERS, "orjson", _missing)
+    monkeypatch.setitem(_json._LOADERS, "ujson", lambda: ("dumps", "loads", "error"))
+
+    assert _json.select_codec("auto") == ("ujson", "dumps", "loads", "error")
+
+
+def test_auto_codec_falls_back_to_stdlib(monkeypatch):
+    monkeypatch.setitem(_json._LOADERS, "orjson", _missing)
+    monkeypatch.setitem(_json._LOADERS, "ujson", _missing)
+
+    assert _json.select_codec("auto")[0] == "json"
+
+
+def test_invalid_codec():
+    with pytest.raises(InvalidConfigurationException) as excinfo:
+        _json.select_codec("simplejson")
+
+    assert "Invalid FUNCTION_JSON_CODEC 'simplejson'" in str(excinfo.value)
+
+
+def test_requested_codec_not_installed(monkeypatch):
+    monkeypatch.setitem(_json._LOADERS, "ujson", _missing)
+
+    with pytest.raises(InvalidConfigurationException) as excinfo:
+        _json.select_codec("ujson")
+
+    assert "'ujson' but it is not installed" in str(excinfo.value)
+
+
+def test_orjson_codec(monkeypatch):
+    orjson = pretend.stub(
+        dumps=lambda obj: b'{"a":1}', loads=json.loads, JSONDecodeError=ValueError
+    )
+    monkeypatch.setitem(sys.modules, "orjson", orjson)
+
+    name, dumps, loads, error = _json.select_codec("orjson")
+
+    assert name == "orjson"
+    assert dumps({"a": 1}) == '{"a":1}'
+    assert loads is json.loads
+    assert error is ValueError
+
+
+def test_ujson_codec(monkeypatch):
+    ujson = pretend.stub(
+        dumps=pretend.call_recorder(lambda obj, **kwargs: '{"a":"/"}'),
+        loads=json.loads,
+        JSONDecodeError=ValueError,
+    )
+    monkeypatch.setitem(sys.modules, "ujson", ujson)
+
+    name, dumps, loads, error = _json.select_codec("ujson")
+
+    assert name == "ujson"
+    assert dumps({"a": "/"}) == '{"a":"/"}'
+    assert ujson.dumps.calls == [pretend.call({"a": "/"}, escape_forward_slashes=False)]
+
+
+def test_flask_json_provider_uses_codec(monkeypatch):
+    loads = pretend.call_recorder(lambda s: {"decoded": s})
+    monkeypatch.setattr(_json, "loads", loads)
+    provider = _json.FlaskJSONProvider(flask.Flask("test"))
+
+    assert provider.loads("{}") == {"decoded": "{}"}
+    assert loads.calls == [pretend.call("{}")]
+    # Extra arguments are only understood by the standard library
+    assert provider.loads('{"a": 1.5}', parse_float=str) == {"a": "1.5"}
+
+
+def test_codec_json_response(monkeypatch):
+    monkeypatch.setattr(_json, "dumps", lambda obj: "encoded")
+
+    assert _CodecJSONResponse({"a": 1}).body == b"encoded"
@@ -0,0 +1,188 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import pathlib
+import sys
+import time
+
+import pretend
+import pytest
+
+from starlette.testclient import TestClient as StarletteTestClient
+
+import functions_framework
+
+from functions_framework import _lifecycle, _resources
+from functions_framework._http.flask import FlaskApplication
+from functions_framework.aio import create_asgi_app
+from functions_framework.exceptions import StartupTimeoutException
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+
+
+@pytest.fixture(autouse=True)
+def hooks(monkeypatch):
+    monkeypatch.setattr(_lifecycle, "_STARTUP_HOOKS", [])
+    monkeypatch.setattr(_lifecycle, "_SHUTDOWN_HOOKS", [])
+    monkeypatch.setattr(_resources, "_RESOURCES", [])
+
+
+def test_hooks_run_in_order_around_resources():
+    events = []
+
+    @functions_framework.on_startup
+    def first():
+        events.append("first")
+
+    @functions_framework.on_startup(timeout=1)
+    async def second():
+        events.append("second")
+
+    @functions_framework.resource
+    def client():
+        events.append("resource")
+        yield
+        events.append("resource closed")
+
+    @functions_framework.on_shutdown
+    async def stop_first():
+        events.append("stop first")
+
+    @functions_framework.on_shutdown(timeout=1)
+    def stop_second():
+        events.append("stop second")
+
+    _lifecycle.run_startup()
+    assert events == ["first", "second", "resource"]
+
+    _lifecycle.run_shutdown()
+    assert events[3:] == ["stop second", "stop first", "resource closed"]
+
+
+@pytest.mark.parametrize("is_async", [True, False])
+def test_startup_hook_timeout(is_async):
+    if is_async:
+
+        @functions_framework.on_startup(timeout=0.05)
+        async def slow():
+            await asyncio.sleep(1)
+
+    else:
+
+        @functions_framework.on_startup(timeout=0.05)
+        def slow():
+            time.sleep(0.2)
+
+    with pytest.raises(StartupTimeoutException) as exc_info:
+        _lifecycle.run_startup()
+
+    assert str(exc_info.value) == "Hook slow did not finish within 0.05 seconds"
+
+
+def test_startup_timeout_from_env(monkeypatch):
+    monkeypatch.setenv("STARTUP_TIMEOUT_SECONDS", "0.05")
+
+    @functions_framework.on_startup
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(StartupTimeoutException):
+        _lifecycle.run_startup()
+
+
+def test_startup_hook_failure_is_raised():
+    @functions_framework.on_startup
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _lifecycle.run_startup()
+
+
+def test_shutdown_hook_failures_are_logged(monkeypatch):
+    logger = pretend.stub(exception=pretend.call_recorder(lambda *args: None))
+    monkeypatch.setattr(_lifecycle, "logger", logger)
+    events = []
+
+    @functions_framework.on_shutdown
+    def last():
+        events.append("last")
+
+    @functions_framework.on_shutdown
+    def broken():
+        raise RuntimeError("boom")
+
+    _lifecycle.run_shutdown()
+
+    assert events == ["last"]
+    assert logger.exception.calls == [pretend.call("Shutdown hook %s failed", "broken")]
+
+
+def test_asgi_lifespan_runs_hooks():
+    source = TEST_FUNCTIONS_DIR / "lifecycle" / "main.py"
+    app = create_asgi_app("function", source)
+    events = sys.modules["main"].events
+
+    with StarletteTestClient(app) as client:
+        assert client.get("/").text == "startup"
+
+    assert events == ["startup", "shutdown"]
+
+
+def test_asgi_lifespan_startup_failure():
+    @functions_framework.on_startup
+    def broken():
+        raise RuntimeError("boom")
+
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "main.py"
+    app = create_asgi_app("function", source)
+
+    with pytest.raises(RuntimeError):
+        with StarletteTestClient(app):
+            pass
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+def test_gunicorn_worker_hooks(monkeypatch):
+    from functions_framework._http import gunicorn
+
+    startup = pretend.call_recorder(lambda: None)
+    shutdown = pretend.call_recorder(lambda drain: None)
+    monkeypatch.setattr(_lifecycle, "run_startup", startup)
+    monkeypatch.setattr(_lifecycle, "run_shutdown", shutdown)
+    app = gunicorn.GunicornApplication(pretend.stub(), "1.2.3.4", "1234", False)
+    worker = pretend.stub()
+
+    app.cfg.post_worker_init(worker)
+    app.cfg.worker_exit(pretend.stub(), worker)
+
+    assert startup.calls == [pretend.call()]
+    assert shutdown.calls == [pretend.call(drain=False)]
+
+
+@pytest.mark.parametrize(
+    "debug, from_reloader, runs_hooks",
+    [(False, False, True), (True, False, False), (True, True, True)],
+)
+def test_flask_application_runs_hooks(monkeypatch, debug, from_reloader, runs_hooks):
+    if from_reloader:
+        monkeypatch.setenv("WERKZEUG_RUN_MAIN", "true")
+    events = []
+    functions_framework.on_startup(lambda: events.append("startup"))
+    functions_framework.on_shutdown(lambda: events.append("shutdown"))
+    app = pretend.stub(run=lambda *args, **kwargs: events.append("run"))
+
+    FlaskApplication(app, "localhost", 8080, debug).run()
+
+    assert events == (["startup", "run", "shutdown"] if runs_hooks else ["run"])
@@ -0,0 +1,193 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import pathlib
+import tracemalloc
+
+import pytest
+
+from functions_framework import _memory
+from functions_framework.exceptions import InvalidConfigurationException
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "memory" / "main.py"
+
+TOKEN = "s3cret"
+HEADERS = {"X-FF-Memory": TOKEN}
+
+# Kept alive between requests, like a leak
+_leaked = []
+
+
+@pytest.fixture(autouse=True)
+def memory_env(monkeypatch):
+    monkeypatch.setenv("MEMORY_DIAGNOSTICS_ENABLED", "true")
+    monkeypatch.setenv("MEMORY_DIAGNOSTICS_TOKEN", TOKEN)
+    monkeypatch.setenv("MEMORY_SAMPLE_EVERY", "2")
+    yield
+    tracemalloc.stop()
+    _leaked.clear()
+
+
+def _json(response):
+    return response.get_json() if hasattr(response, "get_json") else response.json()
+
+
+@pytest.fixture(params=[False, True], ids=["flask", "asgi"])
+def client(request, make_client):
+    return make_client("function", SOURCE, asgi=request.param)
+
+
+def test_snapshot_diff(client):
+    response = client.post("/_ff/memory/start?frames=2", headers=HEADERS)
+    assert response.status_code == 200
+    assert _json(response)["tracing"] is True
+    assert tracemalloc.get_traceback_limit() == 2
+
+    first = client.post("/_ff/memory/snapshot", headers=HEADERS)
+    assert first.status_code == 200
+    _leaked.extend(bytearray(1000) for _ in range(100))
+    second = client.post("/_ff/memory/snapshot", headers=HEADERS)
+
+    first_id = _json(first)["id"]
+    second_id = _json(second)["id"]
+    assert _json(second)["snapshots"] == [first_id, second_id]
+    response = client.get(
+        f"/_ff/memory/diff?from={first_id}&to={second_id}&top=5", headers=HEADERS
+    )
+    assert response.status_code == 200
+    stats = _json(response)["stats"]
+    assert len(stats) <= 5
+    top = stats[0]
+    assert top["file"] == __file__
+    assert top["size_diff"] >= 100 * 1000
+    assert top["count_diff"] >= 100
+
+    # Without `to`, the diff is against a new snapshot
+    response = client.get(f"/_ff/memory/diff?from={first_id}", headers=HEADERS)
+    assert _json(response)["stats"][0]["file"] == __file__
+
+    response = client.post("/_ff/memory/stop", headers=HEADERS)
+    assert _json(response)["tracing"] is False
+    assert _json(response)["snapshots"] == []
+
+
+def test_requests_are_sampled(client):
+    client.post("/_ff/memory/start", headers=HEADERS)
+    for _ in range(4):
+        assert client.get("/function").text == "done"
+
+    response = client.get("/_ff/memory/requests", headers=HEADERS)
+
+    body = _json(response)
+    assert body["sample_every"] == 2
+    samples = [s for s in body["requests"] if s["path"] == "/function"]
+    assert len(samples) == 2
+    assert all(isinstance(s["allocated_bytes"], int) for s in samples)
+
+
+def test_requests_are_not_sampled_unless_tracing(client):
+    for _ in range(4):
+        client.get("/function")
+
+    response = client.get("/_ff/memory/requests", headers=HEADERS)
+
+    assert _json(response)["requests"] == []
+
+
+@pytest.mark.parametrize(
+    "method, url, headers, status",
+    [
+        ("post", "/_ff/memory/start", {}, 403),
+        ("post", "/_ff/memory/start", {"X-FF-Memory": "wrong"}, 403),
+        ("post", "/_ff/memory/start?frames=abc", HEADERS, 400),
+        ("post", "/_ff/memory/start?frames=0", HEADERS, 400),
+        ("post", "/_ff/memory/snapshot", HEADERS, 409),
+        ("get", "/_ff/memory/diff", HEADERS, 400),
+        ("get", "/_ff/memory/diff?from=1", HEADERS, 404),
+    ],
+)
+def test_errors(client, method, url, headers, status):
+    response = getattr(client, method)(url, headers=headers)
+
+    assert response.status_code == status
+
+
+def test_only_last_snapshots_are_kept(client, monkeypatch):
+    monkeypatch.setattr(_memory, "MAX_SNAPSHOTS", 2)
+    client.post("/_ff/memory/start", headers=HEADERS)
+    for _ in range(3):
+        response = client.post("/_ff/memory/snapshot", headers=HEADERS)
+
+    assert _json(response)["snapshots"] == [2, 3]
+
+
+def test_start_while_tracing_keeps_tracing(client):
+    tracemalloc.start(3)
+
+    response = client.post("/_ff/memory/start", headers=HEADERS)
+
+    assert _json(response)["tracing"] is True
+    assert tracemalloc.get_traceback_limit() == 3
+
+
+def test_tracing_stopped_during_request():
+    diagnostics = _memory.Diagnostics(sample_every=1)
+    tracemalloc.start()
+
+    async def app(scope, receive, send):
+        tracemalloc.stop()
+
+    middleware = _memory.AsgiMiddleware(app, diagnostics)
+    asyncio.run(middleware({"type": "http", "path": "/"}, None, None))
+
+    assert list(diagnostics.samples) == []
+
+
+def test_custom_path(monkeypatch, make_client):
+    monkeypatch.setenv("MEMORY_DIAGNOSTICS_PATH", "/_debug/memory")
+    client = make_client("function", SOURCE)
+
+    response = client.post("/_debug/memory/start", headers=HEADERS)
+
+    assert response.status_code == 200
+
+
+def test_with_lean_dispatch(monkeypatch, make_client):
+    monkeypatch.setenv("LEAN_DISPATCH_ENABLED", "true")
+    client = make_client("function", SOURCE)
+
+    response = client.post("/_ff/memory/start", headers=HEADERS)
+
+    assert _json(response)["tracing"] is True
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+def test_token_is_required(monkeypatch, asgi, make_client):
+    monkeypatch.delenv("MEMORY_DIAGNOSTICS_TOKEN")
+
+    with pytest.raises(InvalidConfigurationException):
+        make_client("function", SOURCE, asgi=asgi)
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+def test_disabled_by_default(monkeypatch, asgi, make_client):
+    monkeypatch.delenv("MEMORY_DIAGNOSTICS_ENABLED")
+    client = make_client("function", SOURCE, asgi=asgi)
+
+    response = client.post("/_ff/memory/start", headers=HEADERS)
+
+    # Served by the function
+    assert response.text == "done"
+    assert not tracemalloc.is_tracing()
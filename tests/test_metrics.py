@@ -0,0 +1,247 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import pathlib
+import re
+import threading
+import time
+
+import pretend
+import pytest
+
+from starlette.testclient import TestClient as StarletteTestClient
+
+from functions_framework import _drain, _function_registry, _metrics, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    registry = _metrics._default_registry()
+    monkeypatch.setattr(_metrics, "registry", registry)
+    return registry
+
+
+def _value(text, sample):
+    match = re.search("^" + re.escape(sample) + r" (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+@pytest.fixture(params=["main.py", "async_main.py"])
+def http_client(request, make_client):
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / request.param
+    return make_client("function", source, asgi=request.param.startswith("async_"))
+
+
+def test_http_requests_are_counted_and_timed(http_client):
+    http_client.post("/", json={"mode": "SUCCESS"})
+    http_client.post("/path", json={"mode": "SUCCESS"})
+    http_client.post("/", json={"mode": "FAILURE"})
+
+    response = http_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == _metrics.CONTENT_TYPE
+    text = response.text
+    requests = 'function_requests_total{signature_type="http",code="%s"}'
+    assert _value(text, requests % "200") == 2
+    assert _value(text, requests % "400") == 1
+    latency = 'function_request_duration_seconds_%s{signature_type="http"}'
+    assert _value(text, latency % "count") == 3
+    assert _value(text, latency % "sum") > 0
+    bucket = 'function_request_duration_seconds_bucket{signature_type="http",le="+Inf"}'
+    assert _value(text, bucket) == 3
+    # Scrapes themselves aren't counted
+    assert "/metrics" not in text
+
+
+def test_crashes_are_counted(http_client):
+    response = http_client.post("/", json={"mode": "THROW"})
+
+    text = http_client.get("/metrics").text
+
+    assert response.status_code == 500
+    assert _value(text, "function_crashes_total") == 1
+    assert _value(text, 'function_requests_total{signature_type="http",code="500"}')
+
+
+def test_asgi_executor_gauges():
+    source = TEST_FUNCTIONS_DIR / "http_check_env" / "main.py"
+    client = StarletteTestClient(create_asgi_app("function", source, "http"))
+
+    text = client.get("/metrics").text
+
+    assert _value(text, "function_executor_queue_depth") == 0
+    assert _value(text, "function_executor_active_threads") == 0
+
+
+@pytest.mark.parametrize("source", ["main.py", "async_main.py"])
+@pytest.mark.parametrize(
+    "headers, data",
+    [
+        ({"Content-Type": "application/json"}, '{"foo": 1}'),
+        ({"Content-Type": "application/cloudevents-batch+json"}, "{}"),
+    ],
+)
+def test_event_conversion_failures_are_counted(source, headers, data):
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / source
+    if source.name.startswith("async_"):
+        app = create_asgi_app("function", source, "cloudevent")
+        client = StarletteTestClient(app)
+        response = client.post("/", headers=headers, content=data)
+    else:
+        client = create_app("function", source, "cloudevent").test_client()
+        response = client.post("/", headers=headers, data=data)
+
+    assert response.status_code == 400
+    text = client.get("/metrics").text
+    assert _value(text, "function_event_conversion_failures_total") == 1
+    assert _value(
+        text, 'function_requests_total{signature_type="cloudevent",code="400"}'
+    )
+
+
+def test_background_event_conversion_failures_are_counted():
+    source = TEST_FUNCTIONS_DIR / "background_trigger" / "main.py"
+    client = create_app("function", source, "event").test_client()
+
+    client.post("/", headers={"Content-Type": "application/json"}, data="{}")
+
+    text = client.get("/metrics").text
+    assert _value(text, "function_event_conversion_failures_total") == 1
+
+
+def test_metrics_path_with_lean_dispatch(monkeypatch):
+    monkeypatch.setenv("LEAN_DISPATCH_ENABLED", "true")
+    monkeypatch.setenv("METRICS_PATH", "/_ff/metrics")
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "main.py"
+    client = create_app("function", source).test_client()
+
+    assert client.post("/metrics", json={"mode": "SUCCESS"}).text == "success"
+    assert client.get("/robots.txt").status_code == 404
+    assert "function_requests_total" in client.get("/_ff/metrics").text
+
+
+def test_metrics_path_other_methods_with_lean_dispatch(monkeypatch):
+    monkeypatch.setenv("LEAN_DISPATCH_ENABLED", "true")
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "main.py"
+    client = create_app("function", source).test_client()
+
+    assert client.post("/metrics", json={"mode": "SUCCESS"}).text == "success"
+    assert "function_requests_total" in client.get("/metrics").text
+
+
+def test_metrics_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("METRICS_ENABLED")
+    source = TEST_FUNCTIONS_DIR / "http_trigger" / "main.py"
+    client = create_app("function", source).test_client()
+
+    assert client.post("/metrics", json={"mode": "SUCCESS"}).text == "success"
+    assert not isinstance(client.application.wsgi_app, _metrics.WsgiMiddleware)
+
+
+def test_wsgi_app_errors_are_counted(registry):
+    def broken(environ, start_response):
+        raise RuntimeError("boom")
+
+    app = _metrics.WsgiMiddleware(broken, "http")
+
+    with pytest.raises(RuntimeError):
+        app({"PATH_INFO": "/"}, pretend.stub())
+
+    sample = 'function_requests_total{signature_type="http",code="500"}'
+    assert _value(registry.render(), sample) == 1
+
+
+def test_asgi_batch_stats(monkeypatch):
+    monkeypatch.setattr(_function_registry, "REGISTRY_MAP", {})
+    monkeypatch.setattr(_function_registry, "ASGI_FUNCTIONS", set())
+    source = TEST_FUNCTIONS_DIR / "batched" / "async_main.py"
+    client = StarletteTestClient(create_asgi_app("sync_function", source))
+
+    client.get("/")
+    text = client.get("/metrics").text
+
+    assert _value(text, "function_batches_total") == 1
+    assert _value(text, "function_batched_requests_total") == 1
+    assert _value(text, "function_batch_queue_seconds_total") > 0
+    assert _value(text, "function_batch_queue_seconds_max") > 0
+
+
+def test_asgi_app_errors_are_counted(registry):
+    async def broken(scope, receive, send):
+        raise RuntimeError("boom")
+
+    app = _metrics.AsgiMiddleware(broken, "http")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(app({"type": "http", "path": "/"}, None, None))
+
+    sample = 'function_requests_total{signature_type="http",code="500"}'
+    assert _value(registry.render(), sample) == 1
+
+
+def test_shards_of_exited_threads_are_kept(registry):
+    registry.inc(_metrics.CRASHES)
+    thread = threading.Thread(target=registry.inc, args=(_metrics.CRASHES,))
+    thread.start()
+    thread.join()
+
+    assert _value(registry.render(), "function_crashes_total") == 2
+    # The exited thread's shard was folded into the retired shard
+    assert len(registry._shards) == 1
+    assert _value(registry.render(), "function_crashes_total") == 2
+
+
+def test_render_escapes_label_values(registry):
+    registry.counter("example_total", "Example.", ("name",))
+    registry.inc("example_total", ('a "quoted" \\ value',))
+
+    assert 'example_total{name="a \\"quoted\\" \\\\ value"} 1' in registry.render()
+
+
+def test_gauges_read_request_trackers(registry, monkeypatch):
+    monkeypatch.setattr(_metrics, "requests_in_flight", _drain.InFlightTracker())
+    _metrics.requests_in_flight.enter()
+    _drain.tracker.reject()
+
+    text = registry.render()
+
+    assert _value(text, "function_requests_in_flight") == 1
+    assert _value(text, "function_requests_rejected_total") == 1
+
+
+@pytest.mark.parametrize("source", ["main.py", "async_main.py"])
+def test_requests_in_flight_while_running(make_client, source):
+    source = TEST_FUNCTIONS_DIR / "http_trigger_sleep" / source
+    client = make_client("function", source, asgi=source.name.startswith("async_"))
+    request = threading.Thread(
+        target=client.post, args=("/",), kwargs={"json": {"mode": 500}}
+    )
+    request.start()
+    try:
+        deadline = time.monotonic() + 0.4
+        in_flight = 0
+        while not in_flight and time.monotonic() < deadline:
+            in_flight = _value(
+                client.get("/metrics").text, "function_requests_in_flight"
+            )
+    finally:
+        request.join()
+
+    assert in_flight == 1
+    assert _value(client.get("/metrics").text, "function_requests_in_flight") == 0
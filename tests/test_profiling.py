@@ -0,0 +1,274 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import cProfile
+import json
+import pathlib
+import threading
+
+import pretend
+import pytest
+
+from functions_framework import _profiling
+from functions_framework.exceptions import InvalidConfigurationException
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "profiling" / "main.py"
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture(autouse=True)
+def profiling_env(monkeypatch):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILING_TOKEN", TOKEN)
+
+
+@pytest.fixture(
+    params=[("main.py", False), ("main.py", True), ("async_main.py", True)],
+    ids=["flask", "asgi-sync", "asgi-async"],
+)
+def client(request, make_client):
+    source, asgi = request.param
+    return make_client("function", TEST_FUNCTIONS_DIR / "profiling" / source, asgi=asgi)
+
+
+def _profiles(capsys):
+    lines = capsys.readouterr().err.splitlines()
+    return [json.loads(line)["profile"] for line in lines if '"profile"' in line]
+
+
+def test_requests_with_token_are_profiled(client, capsys):
+    response = client.get("/some/path", headers={"X-FF-Profile": TOKEN})
+
+    assert response.status_code == 200
+    assert response.text == "done"
+    (profile,) = _profiles(capsys)
+    assert profile["path"] == "/some/path"
+    assert profile["seconds"] > 0
+    stacks = profile["collapsed"].splitlines()
+    assert any(
+        "function (" in line and "busy (" in line and "<genexpr>" in line
+        for line in stacks
+    )
+    for line in stacks:
+        assert int(line.rsplit(" ", 1)[1]) > 0
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-FF-Profile": "wrong"}])
+def test_requests_without_token_are_not_profiled(client, capsys, headers):
+    response = client.get("/", headers=headers)
+
+    assert response.text == "done"
+    assert _profiles(capsys) == []
+
+
+def test_cloudevent_requests_are_profiled(capsys, make_client):
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "main.py"
+    client = make_client("function", source, "cloudevent")
+    headers = {
+        "ce-id": "my-id",
+        "ce-source": "from-galaxy-far-far-away",
+        "ce-type": "cloud_event.greet.you",
+        "ce-specversion": "1.0",
+        "ce-time": "2020-08-16T13:58:54.471765",
+        "Content-Type": "application/json",
+        "X-FF-Profile": TOKEN,
+    }
+
+    response = client.post("/", headers=headers, json={"name": "john"})
+
+    assert response.status_code == 200
+    (profile,) = _profiles(capsys)
+    assert "function (" in profile["collapsed"]
+
+
+def test_async_cloudevent_requests_are_profiled(capsys, make_client):
+    source = TEST_FUNCTIONS_DIR / "cloud_events" / "async_main.py"
+    client = make_client("function", source, "cloudevent", asgi=True)
+    headers = {
+        "ce-id": "my-id",
+        "ce-source": "from-galaxy-far-far-away",
+        "ce-type": "cloud_event.greet.you",
+        "ce-specversion": "1.0",
+        "ce-time": "2020-08-16T13:58:54.471765",
+        "Content-Type": "application/json",
+        "X-FF-Profile": TOKEN,
+    }
+
+    response = client.post("/", headers=headers, json={"name": "john"})
+
+    assert response.status_code == 200
+    assert len(_profiles(capsys)) == 1
+
+
+def test_only_one_request_is_profiled_at_a_time(monkeypatch, capsys):
+    warning = pretend.call_recorder(lambda *args: None)
+    monkeypatch.setattr(_profiling.logger, "warning", warning)
+
+    with _profiling.profiling("/outer"):
+        with _profiling.profiling("/inner"):
+            pass
+
+    assert [profile["path"] for profile in _profiles(capsys)] == ["/outer"]
+    assert len(warning.calls) == 1
+
+
+def test_not_profiled_while_another_profiler_is_active(monkeypatch, capsys):
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(
+        _profiling.cProfile,
+        "Profile",
+        type("Profile", (cProfile.Profile,), {"enable": enable}),
+    )
+    warning = pretend.call_recorder(lambda *args: None)
+    monkeypatch.setattr(_profiling.logger, "warning", warning)
+
+    with _profiling.profiling("/"):
+        pass
+
+    assert _profiles(capsys) == []
+    assert len(warning.calls) == 1
+    assert not _profiling._profile_lock.locked()
+
+
+def test_collapse_profile_splits_time_between_callers():
+    def leaf():
+        return sum(range(20000))
+
+    def first():
+        return leaf()
+
+    def second():
+        return leaf(), leaf()
+
+    profile = cProfile.Profile()
+    profile.enable()
+    first()
+    second()
+    profile.disable()
+
+    stacks = {}
+    for line in _profiling.collapse_profile(profile).splitlines():
+        stack, value = line.rsplit(" ", 1)
+        stacks[tuple(frame.split(" (")[0] for frame in stack.split(";"))] = int(value)
+
+    # The builtin called by leaf() shows up under both of its callers
+    first_sum = stacks[("first", "leaf", "<built-in method builtins.sum>")]
+    second_sum = stacks[("second", "leaf", "<built-in method builtins.sum>")]
+    assert second_sum > first_sum
+
+
+def test_collapse_profile_max_depth(monkeypatch):
+    monkeypatch.setattr(_profiling, "_MAX_DEPTH", 2)
+
+    def leaf():
+        return sum(range(20000))
+
+    def outer():
+        return leaf()
+
+    profile = cProfile.Profile()
+    profile.enable()
+    outer()
+    profile.disable()
+
+    collapsed = _profiling.collapse_profile(profile)
+
+    assert "outer (" in collapsed
+    assert "sum" not in collapsed
+
+
+def test_collapsed_leaves_out_stacks_that_round_to_zero():
+    stacks = {("main", "fast"): 0.4, ("main", "slow"): 2.0}
+
+    assert _profiling._collapsed(stacks, 1) == "main;slow 2\n"
+
+
+def test_collapse_profile_empty():
+    assert _profiling.collapse_profile(cProfile.Profile()) == ""
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+def test_sample_endpoint(asgi, make_client):
+    client = make_client("function", SOURCE, asgi=asgi)
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, name="waiting-thread")
+    thread.start()
+    try:
+        response = client.get(
+            "/_ff/profile?seconds=0.05", headers={"X-FF-Profile": TOKEN}
+        )
+    finally:
+        stop.set()
+        thread.join()
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert any(line.startswith("waiting-thread;") for line in lines)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+@pytest.mark.parametrize(
+    "url, headers, status",
+    [
+        ("/_ff/profile", {}, 403),
+        ("/_ff/profile", {"X-FF-Profile": "wrong"}, 403),
+        ("/_ff/profile?seconds=abc", {"X-FF-Profile": TOKEN}, 400),
+        ("/_ff/profile?seconds=0", {"X-FF-Profile": TOKEN}, 400),
+        ("/_ff/profile?seconds=61", {"X-FF-Profile": TOKEN}, 400),
+    ],
+)
+def test_sample_endpoint_rejects(asgi, url, headers, status, make_client):
+    client = make_client("function", SOURCE, asgi=asgi)
+
+    assert client.get(url, headers=headers).status_code == status
+
+
+def test_sample_seconds_default():
+    assert _profiling.sample_seconds(None) == _profiling.DEFAULT_SAMPLE_SECONDS
+
+
+def test_profiling_path(monkeypatch, make_client):
+    monkeypatch.setenv("PROFILING_PATH", "/_debug/profile")
+    client = make_client("function", SOURCE)
+
+    response = client.get(
+        "/_debug/profile?seconds=0.01", headers={"X-FF-Profile": TOKEN}
+    )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+def test_token_is_required(monkeypatch, asgi, make_client):
+    monkeypatch.delenv("PROFILING_TOKEN")
+
+    with pytest.raises(InvalidConfigurationException):
+        make_client("function", SOURCE, asgi=asgi)
+
+
+@pytest.mark.parametrize("asgi", [False, True])
+def test_profiling_disabled_by_default(monkeypatch, capsys, asgi, make_client):
+    monkeypatch.delenv("PROFILING_ENABLED")
+    client = make_client("function", SOURCE, asgi=asgi)
+
+    response = client.get("/_ff/profile", headers={"X-FF-Profile": TOKEN})
+
+    # Served by the function, without being profiled
+    assert response.text == "done"
+    assert _profiles(capsys) == []
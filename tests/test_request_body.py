@@ -0,0 +1,426 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import io
+import json
+import pathlib
+import threading
+import tracemalloc
+
+import pytest
+
+from starlette.testclient import TestClient as StarletteTestClient
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.test import EnvironBuilder
+
+from functions_framework import _body, create_app
+from functions_framework.aio import _forms, create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "request_body" / "main.py"
+
+MIB = 1024 * 1024
+UPLOAD_SIZE = 16 * MIB
+CONCURRENT_UPLOADS = 4
+# Far less than a single upload
+PEAK_MEMORY_BOUND = 8 * MIB
+
+BOUNDARY = "ff-boundary"
+MULTIPART = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _multipart(size, field="value"):
+    return (
+        (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="field"\r\n\r\n'
+            f"{field}\r\n"
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        + b"x" * size
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+
+def _environ(body, content_type, chunked=False):
+    environ = EnvironBuilder(
+        method="POST",
+        path="/",
+        content_type=content_type,
+        input_stream=io.BytesIO(body),
+        content_length=len(body),
+    ).get_environ()
+    if chunked:
+        # As gunicorn passes chunked bodies
+        del environ["CONTENT_LENGTH"]
+        environ["wsgi.input_terminated"] = True
+    return environ
+
+
+def _call_wsgi(app, environ):
+    status = []
+    body = b"".join(app(environ, lambda s, headers, exc_info=None: status.append(s)))
+    return int(status[0][:3]), body
+
+
+def _peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _concurrently(calls):
+    results = [None] * len(calls)
+
+    def run(i):
+        results[i] = calls[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_wsgi_concurrent_uploads_in_bounded_memory():
+    app = create_app("upload", SOURCE)
+    environs = [
+        _environ(_multipart(UPLOAD_SIZE), MULTIPART) for _ in range(CONCURRENT_UPLOADS)
+    ]
+    results = []
+
+    peak = _peak_memory(
+        lambda: results.extend(
+            _concurrently(
+                [lambda e=environ: _call_wsgi(app, e) for environ in environs]
+            )
+        )
+    )
+
+    assert peak < PEAK_MEMORY_BOUND
+    for status, body in results:
+        assert status == 200
+        assert json.loads(body) == {
+            "form": {"field": "value"},
+            "files": {"file": {"size": UPLOAD_SIZE, "spooled": True}},
+        }
+
+
+def test_wsgi_unread_bodies_are_dropped_in_bounded_memory(monkeypatch):
+    monkeypatch.setenv("REQUEST_DRAIN_MAX_BYTES", str(UPLOAD_SIZE))
+    app = create_app("ignore_body", SOURCE)
+    environs = [
+        _environ(b"x" * UPLOAD_SIZE, "application/octet-stream")
+        for _ in range(CONCURRENT_UPLOADS)
+    ]
+    results = []
+
+    peak = _peak_memory(
+        lambda: results.extend(
+            _concurrently(
+                [lambda e=environ: _call_wsgi(app, e) for environ in environs]
+            )
+        )
+    )
+
+    assert peak < PEAK_MEMORY_BOUND
+    assert results == [(200, b"ok")] * CONCURRENT_UPLOADS
+    assert all(environ["wsgi.input"].read() == b"" for environ in environs)
+
+
+@pytest.mark.parametrize("size, closed", [(1000, False), (4 * _body.CHUNK_SIZE, True)])
+def test_wsgi_unread_body_over_drain_limit(monkeypatch, size, closed):
+    monkeypatch.setenv("REQUEST_DRAIN_MAX_BYTES", "1000")
+    client = create_app("ignore_body", SOURCE).test_client()
+    stream = io.BytesIO(b"x" * size)
+
+    response = client.post("/", input_stream=stream, content_length=size)
+
+    assert response.text == "ok"
+    assert ("Connection" in response.headers) is closed
+    assert (stream.tell() < size) is closed
+
+
+def test_wsgi_unread_chunked_body_over_size_limit_closes_connection(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = create_app("ignore_body", SOURCE)
+    started = []
+
+    body = app(
+        _environ(b"x" * 1001, "text/plain", chunked=True),
+        lambda status, headers: started.append(dict(headers)),
+    )
+
+    assert b"".join(body) == b"ok"
+    assert started[0]["Connection"] == "close"
+
+
+def test_drain_reuses_a_buffer_per_thread():
+    stream = io.BytesIO(b"x" * (3 * _body.CHUNK_SIZE))
+    buffers = set()
+    readinto = stream.readinto
+
+    def record(buffer):
+        buffers.add(id(buffer))
+        return readinto(buffer)
+
+    stream.readinto = record
+
+    assert _body.drain(stream)
+    assert _body.drain(io.BytesIO(b"x"))
+    assert buffers == {id(_body._scratch_buffer())}
+
+
+def test_drain_read_only_stream():
+    class Stream:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+
+        def read(self, size):
+            return self.stream.read(size)
+
+    assert _body.drain(Stream(b"x" * 1000), 1000)
+    assert not _body.drain(Stream(b"x" * 1001), 1000)
+
+
+def test_wsgi_spool_threshold(monkeypatch):
+    monkeypatch.setenv("REQUEST_SPOOL_BYTES", "1000")
+    client = create_app("upload", SOURCE).test_client()
+
+    small = client.post("/", data=_multipart(999), content_type=MULTIPART)
+    large = client.post("/", data=_multipart(1001), content_type=MULTIPART)
+
+    assert small.get_json()["files"]["file"]["spooled"] is False
+    assert large.get_json()["files"]["file"]["spooled"] is True
+
+
+def test_wsgi_chunked_body():
+    app = create_app("read_body", SOURCE)
+
+    status, body = _call_wsgi(
+        app, _environ(b"x" * 1000, "application/octet-stream", chunked=True)
+    )
+
+    assert (status, body) == (200, b"1000")
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_wsgi_max_body_size(monkeypatch, chunked):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = create_app("read_body", SOURCE)
+
+    under = _call_wsgi(app, _environ(b"x" * 1000, "text/plain", chunked))
+    over = _call_wsgi(app, _environ(b"x" * 1001, "text/plain", chunked))
+
+    assert under == (200, b"1000")
+    assert over[0] == 413
+
+
+def test_wsgi_max_body_size_rejects_before_reading(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = create_app("read_body", SOURCE)
+    environ = _environ(b"x" * 1001, "text/plain")
+
+    status, body = _call_wsgi(app, environ)
+
+    assert (status, body) == (413, _body.TOO_LARGE_BODY)
+    assert len(environ["wsgi.input"].read()) == 1001
+
+
+def test_wsgi_unread_chunked_body_over_limit(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = create_app("ignore_body", SOURCE)
+
+    status, body = _call_wsgi(app, _environ(b"x" * 1001, "text/plain", chunked=True))
+
+    # The function already answered
+    assert (status, body) == (200, b"ok")
+
+
+def test_wsgi_invalid_content_length(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = create_app("read_body", SOURCE)
+    environ = _environ(b"x" * 10, "text/plain")
+    environ["CONTENT_LENGTH"] = "ten"
+
+    status, _ = _call_wsgi(app, environ)
+
+    assert status == 200
+
+
+def test_wsgi_limited_input_readline():
+    stream = _body._LimitedInput(io.BytesIO(b"line\n" * 3), 10)
+
+    assert stream.readline() == b"line\n"
+    assert stream.readline() == b"line\n"
+    with pytest.raises(RequestEntityTooLarge):
+        stream.readline()
+
+
+def _scope(body, content_type, chunked=False):
+    headers = [(b"content-type", content_type.encode())]
+    if not chunked:
+        headers.append((b"content-length", str(len(body)).encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8080),
+    }
+
+
+async def _call_asgi(app, body, content_type, chunked=False):
+    """Send `body` to `app` in chunks, as a server reading from a socket does."""
+    view = memoryview(body)
+    offset = 0
+    messages = []
+
+    async def receive():
+        nonlocal offset
+        chunk = bytes(view[offset : offset + _body.CHUNK_SIZE])
+        offset += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": offset < len(body)}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(_scope(body, content_type, chunked), receive, send)
+    status = messages[0]["status"]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return status, body
+
+
+def test_asgi_concurrent_uploads_in_bounded_memory():
+    app = create_asgi_app("async_upload", SOURCE, "http")
+    bodies = [_multipart(UPLOAD_SIZE) for _ in range(CONCURRENT_UPLOADS)]
+
+    async def run():
+        return await asyncio.gather(
+            *(_call_asgi(app, body, MULTIPART) for body in bodies)
+        )
+
+    results = []
+    peak = _peak_memory(lambda: results.extend(asyncio.run(run())))
+
+    assert peak < PEAK_MEMORY_BOUND
+    for status, body in results:
+        assert status == 200
+        assert json.loads(body) == {
+            "form": {"field": "value"},
+            "files": {"file": {"size": UPLOAD_SIZE, "spooled": True}},
+        }
+
+
+def test_asgi_parse_form_urlencoded():
+    client = StarletteTestClient(create_asgi_app("async_upload", SOURCE, "http"))
+
+    response = client.post("/", data={"a": "1", "b": ""})
+
+    assert response.json() == {"form": {"a": "1", "b": ""}, "files": {}}
+
+
+def test_asgi_parse_form_not_a_form():
+    client = StarletteTestClient(create_asgi_app("async_upload", SOURCE, "http"))
+
+    response = client.post("/", json={"a": 1})
+
+    assert response.json() == {"form": {}, "files": {}}
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_asgi_parse_form_field_too_large(chunked):
+    app = create_asgi_app("async_upload", SOURCE, "http")
+    body = _multipart(10, field="x" * (_body.MAX_FORM_MEMORY_BYTES + 1))
+
+    if chunked:
+        status, _ = asyncio.run(_call_asgi(app, body, MULTIPART, chunked=True))
+    else:
+        client = StarletteTestClient(app)
+        status = client.post(
+            "/", content=body, headers={"Content-Type": MULTIPART}
+        ).status_code
+
+    assert status == 413
+
+
+def test_asgi_parse_form_invalid():
+    client = StarletteTestClient(create_asgi_app("async_upload", SOURCE, "http"))
+    body = f"--{BOUNDARY}\r\nno headers end".encode() + b"x" * 10000
+
+    response = client.post("/", content=body, headers={"Content-Type": MULTIPART})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_asgi_max_body_size(monkeypatch, chunked):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", str(_body.CHUNK_SIZE + 1))
+    app = create_asgi_app("async_read_body", SOURCE, "http")
+    size = _body.CHUNK_SIZE + 1
+
+    under = asyncio.run(_call_asgi(app, b"x" * size, "text/plain", chunked))
+    over = asyncio.run(_call_asgi(app, b"x" * (size + 1), "text/plain", chunked))
+
+    assert under == (200, str(size).encode())
+    assert over[0] == 413
+
+
+def test_asgi_max_body_size_rejects_before_reading(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+    app = StarletteTestClient(create_asgi_app("async_read_body", SOURCE, "http"))
+
+    response = app.post("/", content=b"x" * 1001)
+
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+
+
+def test_asgi_max_body_size_lifespan(monkeypatch):
+    monkeypatch.setenv("MAX_REQUEST_BODY_BYTES", "1000")
+
+    with StarletteTestClient(
+        create_asgi_app("async_read_body", SOURCE, "http")
+    ) as client:
+        response = client.post("/", content=b"x" * 1000)
+
+    assert response.text == "1000"
+
+
+def test_asgi_max_body_size_passes_disconnect_through():
+    received = []
+
+    async def app(scope, receive, send):
+        received.append(await receive())
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    app = _forms.BodyLimitMiddleware(app, max_bytes=10)
+    asyncio.run(app({"type": "http", "headers": []}, receive, None))
+
+    assert received == [{"type": "http.disconnect"}]
@@ -0,0 +1,204 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import pathlib
+import sys
+import threading
+import time
+
+import pretend
+import pytest
+
+from starlette.testclient import TestClient as StarletteTestClient
+
+import functions_framework
+
+from functions_framework import _metrics, _resources, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+
+
+@pytest.fixture(autouse=True)
+def resources(monkeypatch):
+    registered = []
+    monkeypatch.setattr(_resources, "_RESOURCES", registered)
+    return registered
+
+
+def test_resource_is_created_once_on_first_use(resources):
+    calls = []
+
+    @functions_framework.resource
+    def client():
+        calls.append(1)
+        return object()
+
+    assert resources == [client]
+    assert client.__name__ == "client"
+    assert not client.initialized
+    assert calls == []
+
+    assert client() is client()
+    assert calls == [1]
+    assert client.initialized
+    assert client.init_seconds >= 0
+
+    client.close()
+    assert not client.initialized
+
+
+def test_resource_is_thread_safe():
+    calls = []
+
+    @functions_framework.resource
+    def client():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(set(map(id, results))) == 1
+
+
+def test_resource_is_recreated_after_fork(monkeypatch):
+    @functions_framework.resource
+    def client():
+        return object()
+
+    parent = client()
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+
+    assert client() is not parent
+
+
+def test_generator_resource_is_torn_down_on_close():
+    events = []
+
+    @functions_framework.resource
+    def client():
+        events.append("open")
+        yield "client"
+        events.append("close")
+
+    client.close()
+    assert events == []
+
+    assert client() == "client"
+    client.close()
+    assert events == ["open", "close"]
+    assert not client.initialized
+
+    assert client() == "client"
+    assert events == ["open", "close", "open"]
+
+
+def test_warm_resources_reports_init_times(monkeypatch):
+    registry = _metrics._default_registry()
+    monkeypatch.setattr(_metrics, "registry", registry)
+    logger = pretend.stub(
+        info=pretend.call_recorder(lambda *args: None),
+        exception=pretend.call_recorder(lambda *args: None),
+    )
+    monkeypatch.setattr(_resources, "logger", logger)
+    attempts = []
+
+    @functions_framework.resource
+    def client():
+        time.sleep(0.01)
+        return "client"
+
+    @functions_framework.resource
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("not yet")
+        return "flaky"
+
+    _resources.warm_resources()
+
+    histograms = registry.snapshot().histograms
+    assert list(histograms) == [(_metrics.RESOURCE_INIT, ("client",))]
+    assert histograms[(_metrics.RESOURCE_INIT, ("client",))][-1] >= 0.01
+    assert logger.exception.calls == [
+        pretend.call("Failed to initialize resource %s", "flaky")
+    ]
+    assert logger.info.calls[0].args[:2] == (
+        "Initialized resource %s in %.3fms",
+        "client",
+    )
+    # Left to be retried on first use
+    assert flaky() == "flaky"
+
+
+def test_close_resources_in_reverse_order(monkeypatch):
+    logger = pretend.stub(
+        info=lambda *args: None,
+        exception=pretend.call_recorder(lambda *args: None),
+    )
+    monkeypatch.setattr(_resources, "logger", logger)
+    events = []
+
+    @functions_framework.resource
+    def first():
+        yield
+        events.append("first")
+
+    @functions_framework.resource
+    def broken():
+        yield
+        raise RuntimeError("boom")
+
+    @functions_framework.resource
+    def last():
+        yield
+        events.append("last")
+
+    _resources.warm_resources()
+    _resources.close_resources()
+
+    assert events == ["last", "first"]
+    assert logger.exception.calls == [
+        pretend.call("Failed to close resource %s", "broken")
+    ]
+
+
+def test_flask_function_uses_resource():
+    source = TEST_FUNCTIONS_DIR / "resources" / "main.py"
+    client = create_app("function", source).test_client()
+
+    assert client.get("/").text == "1"
+    assert client.get("/").text == "2"
+
+
+@pytest.mark.parametrize("target", ["function", "async_function"])
+def test_asgi_lifespan_warms_and_closes_resources(target):
+    source = TEST_FUNCTIONS_DIR / "resources" / "main.py"
+    app = create_asgi_app(target, source)
+    events = sys.modules["main"].events
+
+    with StarletteTestClient(app) as client:
+        assert events == ["open"]
+        assert client.get("/").text == "1"
+
+    assert events == ["open", "close"]
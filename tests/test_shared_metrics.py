@@ -0,0 +1,347 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+import os
+import platform
+import re
+import time
+
+import pretend
+import pytest
+
+from functions_framework import _metrics, _shared_metrics
+
+
+def _value(text, sample):
+    match = re.search("^" + re.escape(sample) + r" (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def _registry(in_flight=0):
+    registry = _metrics.Registry()
+    registry.counter(_metrics.REQUESTS, "Requests.", ("signature_type", "code"))
+    registry.histogram(_metrics.LATENCY, "Latency.", ("signature_type",))
+    registry.gauge("in_flight", "In flight.", lambda: in_flight)
+    return registry
+
+
+def _worker(store, registry, monkeypatch):
+    """Attach `registry` to a new slot as if it were a freshly forked worker."""
+    monkeypatch.setattr(_shared_metrics, "_publish_interval", lambda: 3600)
+    worker = pretend.stub(slot=store.assign())
+    store.attach(worker.slot, registry)
+    return worker
+
+
+@pytest.fixture
+def store():
+    store = _shared_metrics.SharedStore(workers=2)
+    yield store
+    store._stop.set()
+
+
+def test_encode_decode_roundtrip():
+    snapshot = _metrics._Shard()
+    snapshot.counters[(_metrics.REQUESTS, ("http", "200"))] = 3
+    snapshot.histograms[(_metrics.LATENCY, ("http",))] = [1, 2, 0.5]
+    snapshot.gauges = {"in_flight": 4}
+
+    decoded = _shared_metrics.decode(_shared_metrics.encode(snapshot))
+
+    assert decoded.counters == snapshot.counters
+    assert decoded.histograms == snapshot.histograms
+    assert decoded.gauges == snapshot.gauges
+
+
+def test_render_sums_up_all_workers(store, monkeypatch):
+    first = _registry(in_flight=1)
+    second = _registry(in_flight=2)
+    _worker(store, first, monkeypatch)
+    first.inc(_metrics.REQUESTS, ("http", "200"))
+    first.observe(_metrics.LATENCY, 0.1, ("http",))
+    store.publish()
+
+    # Forked workers share the mapping, but each has its own slot
+    other = copy.copy(store)
+    _worker(other, second, monkeypatch)
+    second.inc(_metrics.REQUESTS, ("http", "200"), 2)
+    second.observe(_metrics.LATENCY, 0.2, ("http",))
+
+    # Live metrics of the scraped worker, published ones of the other
+    text = second.render()
+
+    assert (
+        _value(text, 'function_requests_total{signature_type="http",code="200"}') == 3
+    )
+    assert (
+        _value(text, 'function_request_duration_seconds_count{signature_type="http"}')
+        == 2
+    )
+    assert _value(text, "in_flight") == 3
+
+
+def test_exited_workers_are_retired(store, monkeypatch):
+    registry = _registry(in_flight=5)
+    worker = _worker(store, registry, monkeypatch)
+    registry.inc(_metrics.REQUESTS, ("http", "200"), 4)
+    store.detach()
+
+    store.release(worker.slot)
+
+    assert worker.slot in store._free
+    assert store._read(worker.slot) == (0, None)
+    retired = store._snapshot(_shared_metrics._RETIRED_SLOT)
+    assert retired.counters == {(_metrics.REQUESTS, ("http", "200")): 4}
+    # Gauges of exited workers are dropped
+    assert retired.gauges == {}
+
+    # Counters of later workers add up with those of the exited ones
+    registry = _registry()
+    _worker(store, registry, monkeypatch)
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+    text = registry.render()
+    assert (
+        _value(text, 'function_requests_total{signature_type="http",code="200"}') == 5
+    )
+    assert _value(text, "in_flight") == 0
+
+
+def test_release_without_slot(store):
+    store.release(None)
+
+    assert len(store._free) == store.slots - 1
+
+
+def test_no_free_slot(monkeypatch):
+    store = _shared_metrics.SharedStore(workers=1)
+    registry = _registry()
+    slots = [store.assign() for _ in range(store.slots - 1)]
+
+    assert store.assign() is None
+
+    store.attach(None, registry)
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+    store.publish()
+
+    assert all(store._read(slot) == (0, None) for slot in slots)
+    assert store._publisher is None
+    assert "function_requests_total" in registry.render()
+
+
+def test_metrics_too_large_for_slot(monkeypatch):
+    store = _shared_metrics.SharedStore(workers=2, slot_size=64)
+    warning = pretend.call_recorder(lambda *args: None)
+    monkeypatch.setattr(_shared_metrics.logger, "warning", warning)
+    registry = _registry()
+    worker = _worker(store, registry, monkeypatch)
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+
+    store.publish()
+    store.publish()
+
+    assert store._read(worker.slot) == (0, None)
+    assert len(warning.calls) == 1
+    store._stop.set()
+
+
+def test_torn_reads_are_retried(store):
+    store._write(1, 42, b"payload")
+    offset = store._offset(1) + _shared_metrics._SEQUENCE_OFFSET
+    (sequence,) = _shared_metrics._SEQUENCE.unpack_from(store._mmap, offset)
+
+    # A writer in the middle of an update
+    _shared_metrics._SEQUENCE.pack_into(store._mmap, offset, sequence + 1)
+    assert store._read(1) == (42, None)
+
+    _shared_metrics._SEQUENCE.pack_into(store._mmap, offset, sequence)
+    assert store._read(1) == (42, b"payload")
+
+
+def test_reads_overlapping_a_write_are_retried(store, monkeypatch):
+    store._write(1, 42, b"payload")
+    sequence = _shared_metrics._SEQUENCE
+    # The first recheck sees a write that completed while copying the payload
+    rechecks = iter([(0,)])
+    monkeypatch.setattr(
+        _shared_metrics,
+        "_SEQUENCE",
+        pretend.stub(
+            unpack_from=lambda *args: next(rechecks, None)
+            or sequence.unpack_from(*args)
+        ),
+    )
+
+    assert store._read(1) == (42, b"payload")
+
+
+def test_sequence_is_even_only_once_the_payload_is_written(store, monkeypatch):
+    sequence = _shared_metrics._SEQUENCE
+    offset = store._offset(1)
+    written = []
+
+    def pack_into(buffer, at, value):
+        if not value % 2:
+            header = _shared_metrics._HEADER.unpack_from(buffer, offset)
+            start = offset + _shared_metrics._HEADER.size
+            written.append((header, bytes(buffer[start : start + header[2]])))
+        sequence.pack_into(buffer, at, value)
+
+    monkeypatch.setattr(
+        _shared_metrics,
+        "_SEQUENCE",
+        pretend.stub(unpack_from=sequence.unpack_from, pack_into=pack_into),
+    )
+
+    store._write(1, 42, b"payload")
+
+    assert written == [((42, 1, 7), b"payload")]
+
+
+@pytest.mark.parametrize("payload", [b"{torn", b"\xff"])
+def test_undecodable_slots_are_left_out(store, monkeypatch, payload):
+    warning = pretend.call_recorder(lambda *args: None)
+    monkeypatch.setattr(_shared_metrics.logger, "warning", warning)
+    store.slot = 1
+    store._write(2, 42, payload)
+
+    total = store.aggregate(_metrics._Shard())
+
+    assert total.counters == {}
+    assert warning.calls == [
+        pretend.call("Leaving out the unreadable metrics in slot %d", 2)
+    ]
+
+
+def test_slot_left_odd_by_a_killed_writer_is_repaired(store):
+    store._write(1, 42, b"payload")
+    offset = store._offset(1) + _shared_metrics._SEQUENCE_OFFSET
+    (sequence,) = _shared_metrics._SEQUENCE.unpack_from(store._mmap, offset)
+    # The writer died after making the sequence number odd
+    _shared_metrics._SEQUENCE.pack_into(store._mmap, offset, sequence + 1)
+
+    store._write(1, 42, b"again")
+
+    assert store._read(1) == (42, b"again")
+
+
+def test_detach_waits_for_the_publisher(store, monkeypatch):
+    monkeypatch.setattr(_shared_metrics, "_publish_interval", lambda: 0.001)
+    writing = []
+    overlaps = []
+    write = store._write
+
+    def slow_write(*args):
+        overlaps.append(len(writing))
+        writing.append(True)
+        time.sleep(0.01)
+        write(*args)
+        writing.pop()
+
+    monkeypatch.setattr(store, "_write", slow_write)
+    store.attach(store.assign(), _registry())
+    while not overlaps:
+        time.sleep(0.001)
+
+    store.detach()
+
+    assert max(overlaps) == 0
+
+
+def test_publish_periodically(store, monkeypatch):
+    registry = _registry()
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+    monkeypatch.setattr(_shared_metrics, "_publish_interval", lambda: 0.01)
+
+    store.attach(store.assign(), registry)
+    store._stop.wait(0.2)
+    store.detach()
+
+    assert not store._publisher.is_alive()
+
+    pid, payload = store._read(store.slot)
+    assert pid == os.getpid()
+    assert _shared_metrics.decode(payload).counters == {
+        (_metrics.REQUESTS, ("http", "200")): 1
+    }
+
+
+def test_publish_interval_from_env(monkeypatch):
+    monkeypatch.setenv("METRICS_PUBLISH_INTERVAL_SECONDS", "0.5")
+
+    assert _shared_metrics._publish_interval() == 0.5
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+@pytest.mark.parametrize("app_class", ["GunicornApplication", "UvicornApplication"])
+def test_gunicorn_shared_metrics_hooks(monkeypatch, app_class):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("WORKERS", "2")
+    monkeypatch.setattr(_shared_metrics, "_publish_interval", lambda: 3600)
+    registry = _registry()
+    monkeypatch.setattr(_metrics, "registry", registry)
+
+    from functions_framework._http import gunicorn
+
+    app = getattr(gunicorn, app_class)(pretend.stub(), "1.2.3.4", "1234", False)
+    cfg = app.cfg
+    server = pretend.stub()
+    worker = pretend.stub()
+
+    cfg.pre_fork(server, worker)
+    cfg.post_fork(server, worker)
+    registry.inc(_metrics.REQUESTS, ("http", "200"))
+    cfg.worker_exit(server, worker)
+    store = registry.store
+    cfg.child_exit(server, worker)
+
+    assert worker.metrics_slot in store._free
+    retired = store._snapshot(_shared_metrics._RETIRED_SLOT)
+    assert retired.counters == {(_metrics.REQUESTS, ("http", "200")): 1}
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+def test_gunicorn_shared_metrics_keep_other_hooks(monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("WORKERS", "2")
+    monkeypatch.setenv("PRELOAD_APP", "true")
+
+    from functions_framework._http import gunicorn
+
+    freeze = pretend.call_recorder(lambda: None)
+    monkeypatch.setattr(gunicorn.gc, "freeze", freeze)
+    run_shutdown = pretend.call_recorder(lambda drain: None)
+    monkeypatch.setattr(gunicorn._lifecycle, "run_shutdown", run_shutdown)
+
+    app = gunicorn.GunicornApplication(pretend.stub(), "1.2.3.4", "1234", False)
+    worker = pretend.stub()
+    app.cfg.pre_fork(None, worker)
+    app.cfg.worker_exit(None, worker)
+
+    assert freeze.calls == [pretend.call()]
+    assert run_shutdown.calls == [pretend.call(drain=False)]
+    assert worker.metrics_slot is not None
+
+
+@pytest.mark.skipif("platform.system() == 'Windows'")
+@pytest.mark.parametrize("env", [{"WORKERS": "2"}, {"METRICS_ENABLED": "true"}])
+def test_gunicorn_shared_metrics_disabled(monkeypatch, env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+
+    from functions_framework._http import gunicorn
+
+    app = gunicorn.GunicornApplication(pretend.stub(), "1.2.3.4", "1234", False)
+
+    assert "pre_fork" not in app.options
+    assert "child_exit" not in app.options
@@ -0,0 +1,132 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import pathlib
+import sys
+
+import pretend
+import pytest
+
+from functions_framework import _startup_report, create_app
+from functions_framework.aio import create_asgi_app
+
+TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
+SOURCE = TEST_FUNCTIONS_DIR / "startup_report" / "main.py"
+
+
+@pytest.fixture(autouse=True)
+def fresh_imports(monkeypatch):
+    for name in ("startup_report_dependency", "startup_report_nested"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+
+def test_startup_report_disabled_by_default(capsys):
+    create_app("function", SOURCE)
+
+    assert capsys.readouterr().err == ""
+
+
+def test_startup_report(monkeypatch, capsys):
+    monkeypatch.setenv("STARTUP_REPORT", "true")
+
+    create_app("function", SOURCE)
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["target"] == "function"
+    assert report["source"] == str(SOURCE)
+    assert list(report["phases"]) == [
+        "resolve_source",
+        "load_function_module",
+        "create_flask_app",
+        "exec_module",
+        "configure_app",
+    ]
+    assert report["total_seconds"] >= sum(report["phases"].values())
+    assert report["imported_modules"] == 2
+    dependency, nested = report["slowest_imports"]
+    assert dependency["module"] == "startup_report_dependency"
+    assert nested["module"] == "startup_report_nested"
+    assert nested["self_seconds"] >= 0.01
+    assert dependency["cumulative_seconds"] >= nested["cumulative_seconds"]
+    assert dependency["self_seconds"] == pytest.approx(
+        dependency["cumulative_seconds"] - nested["cumulative_seconds"]
+    )
+
+
+def test_startup_report_restores_loaders(monkeypatch):
+    monkeypatch.setenv("STARTUP_REPORT", "true")
+    meta_path = list(sys.meta_path)
+
+    create_app("function", SOURCE)
+
+    module = sys.modules["startup_report_dependency"]
+    assert not isinstance(module.__loader__, _startup_report._TimedLoader)
+    assert not isinstance(module.__spec__.loader, _startup_report._TimedLoader)
+    assert sys.meta_path == meta_path
+
+
+def test_startup_report_file(monkeypatch, capsys, tmp_path):
+    path = tmp_path / "report.json"
+    monkeypatch.setenv("STARTUP_REPORT_FILE", str(path))
+
+    create_asgi_app("function", SOURCE)
+
+    report = json.loads(path.read_text())
+    assert json.loads(capsys.readouterr().err) == report
+    assert list(report["phases"]) == [
+        "resolve_source",
+        "load_function_module",
+        "exec_module",
+        "create_asgi_app",
+    ]
+    assert report["slowest_imports"][0]["module"] == "startup_report_dependency"
+
+
+def test_startup_report_asgi_function(monkeypatch, capsys):
+    monkeypatch.setenv("STARTUP_REPORT", "true")
+    source = TEST_FUNCTIONS_DIR / "decorators" / "async_decorator.py"
+
+    create_app("function_http", source)
+
+    report = json.loads(capsys.readouterr().err)
+    # @aio functions are handed to create_asgi_app before a Flask app is built
+    assert list(report["phases"]) == [
+        "resolve_source",
+        "load_function_module",
+        "exec_module",
+        "create_asgi_app",
+    ]
+
+
+def test_import_timer_ignores_missing_modules():
+    timer = _startup_report._ImportTimer()
+
+    assert timer.find_spec("startup_report_does_not_exist", None) is None
+
+
+def test_import_timer_leaves_specs_without_loader(monkeypatch):
+    timer = _startup_report._ImportTimer()
+    spec = pretend.stub(loader=None)
+    finder = pretend.stub(find_spec=lambda name, path, target=None: spec)
+    monkeypatch.setattr(sys, "meta_path", [timer, object(), finder])
+
+    assert timer.find_spec("namespace", None) is spec
+    assert spec.loader is None
+
+
+def test_timed_loader_delegates_to_loader():
+    loader = pretend.stub(get_filename=lambda name: "main.py")
+    timed = _startup_report._TimedLoader(loader, _startup_report._ImportTimer())
+
+    assert timed.get_filename("main") == "main.py"
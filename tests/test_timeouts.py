@@ -13,17 +13,20 @@
 # limitations under the License.
 import pathlib
 import socket
+import threading
 import time
 
 from multiprocessing import Process
 
+import pretend
 import pytest
 import requests
 
 ff_gunicorn = pytest.importorskip("functions_framework._http.gunicorn")
 
 
-from functions_framework import create_app
+from functions_framework import create_app, request_timeout
+from functions_framework.exceptions import RequestTimeoutException
 
 TEST_FUNCTIONS_DIR = pathlib.Path(__file__).resolve().parent / "test_functions"
 TEST_HOST = "0.0.0.0"
@@ -229,6 +232,116 @@ def test_timeout_sync_worker_does_not_kill_if_less_than_timeout(
     assert result.status_code == 200
 
 
+def test_timer_wheel_fires_callback():
+    wheel = request_timeout.TimerWheel(tick=0.01)
+    fired = threading.Event()
+
+    wheel.schedule(0.05, fired.set)
+
+    assert fired.wait(timeout=2)
+    assert wheel._pending == 0
+
+
+def test_timer_wheel_cancel_prevents_callback():
+    wheel = request_timeout.TimerWheel(tick=0.01)
+    fired = threading.Event()
+
+    timer = wheel.schedule(0.05, fired.set)
+    wheel.cancel(timer)
+    # Cancelling twice is a no-op
+    wheel.cancel(timer)
+
+    assert not fired.wait(timeout=0.2)
+    assert wheel._pending == 0
+
+
+def test_timer_wheel_fires_timers_beyond_one_revolution():
+    wheel = request_timeout.TimerWheel(tick=0.01, slots=4)
+    fired = []
+
+    wheel.schedule(0.01, lambda: fired.append("short"))
+    wheel.schedule(0.1, lambda: fired.append("long"))
+
+    deadline = time.monotonic() + 2
+    while len(fired) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert fired == ["short", "long"]
+
+
+def test_timer_wheel_catches_up_after_falling_behind_a_revolution():
+    wheel = request_timeout.TimerWheel(tick=0.01, slots=4)
+    # Drive the wheel by hand rather than from its thread
+    wheel._thread = object()
+    now = 0
+    wheel._now_tick = lambda: now
+
+    wheel.schedule(0.02, lambda: None)
+    wheel.schedule(0.05, lambda: None)
+    now = 10
+
+    # Ticks 1 to 10 cover every slot more than twice over
+    assert len(wheel._collect_expired()) == 2
+    assert wheel._pending == 0
+    assert wheel._last_tick == 10
+
+
+def test_timer_wheel_survives_callback_errors(monkeypatch):
+    logger = pretend.stub(exception=pretend.call_recorder(lambda *a, **kw: None))
+    monkeypatch.setattr(request_timeout, "logger", logger)
+    wheel = request_timeout.TimerWheel(tick=0.01)
+    fired = threading.Event()
+
+    def bad_callback():
+        raise ValueError("boom")
+
+    wheel.schedule(0.01, bad_callback)
+    time.sleep(0.1)
+    wheel.schedule(0.01, fired.set)
+
+    assert fired.wait(timeout=2)
+    assert logger.exception.calls == [pretend.call("Error in request timeout callback")]
+
+
+def test_get_timer_wheel_is_per_process(monkeypatch):
+    wheel = request_timeout.get_timer_wheel()
+    assert request_timeout.get_timer_wheel() is wheel
+
+    monkeypatch.setattr(request_timeout.os, "getpid", lambda: -1)
+
+    assert request_timeout.get_timer_wheel() is not wheel
+
+
+def test_threading_timeout_raises_in_target_thread(monkeypatch):
+    logger = pretend.stub(warning=pretend.call_recorder(lambda *a, **kw: None))
+    monkeypatch.setattr(request_timeout, "logger", logger)
+    result = {}
+
+    def target():
+        try:
+            with request_timeout.ThreadingTimeout(0.1):
+                for _ in range(100):
+                    time.sleep(0.01)
+        except RequestTimeoutException:
+            result["timed_out"] = True
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert result == {"timed_out": True}
+    assert len(logger.warning.calls) == 1
+    assert "exceeded 0.1 seconds timeout" in logger.warning.calls[0].args[0]
+
+
+def test_threading_timeout_not_exceeded():
+    with request_timeout.ThreadingTimeout(1) as timeout:
+        pass
+
+    assert timeout.exited
+    assert timeout.timer not in timeout.timer.slot
+
+
 @pytest.mark.skip
 def _wait_for_listen(host, port, timeout=10):
     # Used in tests to make sure that the gunicorn app has booted and is
@@ -124,7 +124,7 @@ def test_cloud_event_view_func_wrapper():
         }
     )
 
-    request = pretend.stub(headers=headers, get_data=lambda: data)
+    request = pretend.stub(headers=headers, get_data=lambda: data, path="/")
     event = from_http(request.headers, request.get_data())
 
     function = pretend.call_recorder(lambda cloud_event: cloud_event)
@@ -145,7 +145,7 @@ def test_binary_cloud_event_view_func_wrapper():
     }
     data = json.dumps({"name": "john"})
 
-    request = pretend.stub(headers=headers, get_data=lambda: data)
+    request = pretend.stub(headers=headers, get_data=lambda: data, path="/")
     event = from_http(request.headers, request.get_data())
 
     function = pretend.call_recorder(lambda cloud_event: cloud_event)